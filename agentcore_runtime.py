@@ -1,7 +1,26 @@
 from bedrock_agentcore.runtime import Agent
+from bedrock_agentcore.tools import Tool
 import boto3
 import pymysql
 import os
+import threading
+from mysql_pool import MySQLPool
+from event_writer import EventWriter
+from session_events import session_events
+from preference_cache import preferences_cache
+from themes import theme_extractor
+from bible_references import find_references, format_reference
+from sentiment import sentiment_scorer
+from theme_verses import format_suggestions, theme_verse_index
+from context_loader import fan_out
+from context_packer import ContextItem, context_packer, packed_record_keys, record_items, record_key, turn_items
+from prompt_segments import build_segments, render, stable_prefix
+from response_cache import response_cache
+from session_summary import SUMMARY_INTERVAL, session_summaries, summarize_interactions
+from summary_worker import SummaryJob, SummaryWorker
+from conversation_analysis import conversation_analyzer
+from llm_backends import get_backend_for_route
+from metrics import InvocationMetrics
 import json
 import time
 from datetime import datetime
@@ -10,6 +29,89 @@ from datetime import datetime
 agentcore_client = boto3.client('bedrock-agentcore', region_name='us-east-1')
 MEMORY_ID = os.environ.get('MEMORY_ID', 'memory_bqdqb-jtj3lc48bl')
 
+# Background writer for conversation events (spooled to /tmp, replayed after a freeze)
+event_writer = EventWriter(
+    agentcore_client,
+    MEMORY_ID,
+    spool_path=os.environ.get('EVENT_SPOOL_PATH', '/tmp/agentcore_event_spool.db'),
+    max_attempts=int(os.environ.get('EVENT_WRITER_MAX_ATTEMPTS', 5))
+)
+
+class AgentCoreMemory:
+    """
+    Long-term memory on the AgentCore Memory data plane. Session interactions
+    are rebuilt from the session's events; session summaries are memory
+    records in the user's summaries namespace.
+    """
+    SUMMARY_NAMESPACE = "customer-support/{user_id}/summaries"
+
+    def __init__(self, client, memory_id: str):
+        self.client = client
+        self.memory_id = memory_id
+
+    def get_session_interactions(self, session_id: str, user_id: str) -> list:
+        """Stored interactions of a session, oldest first ({"user_input": ..., "metadata": {...}})."""
+        events = self.client.list_events(
+            memoryId=self.memory_id,
+            actorId=user_id,
+            sessionId=session_id,
+            maxResults=100
+        ).get('events', [])
+        interactions = []
+        for event in sorted(events, key=lambda event: event.get('eventTimestamp', 0)):
+            texts = {}
+            for part in event.get('payload', []):
+                conversational = part.get('conversational', {})
+                texts.setdefault(conversational.get('role'), conversational.get('content', {}).get('text', ''))
+            if 'USER' in texts:
+                interactions.append({
+                    "user_input": texts['USER'],
+                    "metadata": interaction_metadata(texts['USER'], texts.get('ASSISTANT', ''))
+                })
+        return interactions
+
+    def save_long_term_memory(self, user_id: str, content: str, metadata: dict):
+        """Store a session summary as a memory record; raises if the record was rejected."""
+        response = self.client.batch_create_memory_records(
+            memoryId=self.memory_id,
+            records=[{
+                "requestIdentifier": f"summary-{metadata.get('checkpoint', 0)}",
+                "namespaces": [self.SUMMARY_NAMESPACE.format(user_id=user_id)],
+                "content": {"text": content},
+                "timestamp": datetime.now()
+            }]
+        )
+        if response.get('failedRecords'):
+            raise RuntimeError(f"Memory record rejected: {response['failedRecords'][0].get('errorMessage')}")
+
+    def get_long_term_memories(self, user_id: str, limit: int = 5) -> list:
+        """The user's session summaries ({"content": ..., "metadata": {"timestamp": ...}})."""
+        records = self.client.list_memory_records(
+            memoryId=self.memory_id,
+            namespace=self.SUMMARY_NAMESPACE.format(user_id=user_id),
+            maxResults=limit
+        ).get('memoryRecordSummaries', [])
+        return [{"content": record.get('content', {}).get('text', ''),
+                 "metadata": {"timestamp": str(record.get('createdAt', ''))}} for record in records]
+
+    def search_memories(self, user_id: str, query: str, limit: int = 5) -> list:
+        """Session summaries most relevant to query, as memory records."""
+        return self.client.retrieve_memory_records(
+            memoryId=self.memory_id,
+            namespace=self.SUMMARY_NAMESPACE.format(user_id=user_id),
+            searchCriteria={"searchQuery": query, "topK": limit}
+        ).get('memoryRecordSummaries', [])
+
+memory = AgentCoreMemory(agentcore_client, MEMORY_ID)
+
+# Context fan-out: each branch gets its own budget (seconds) and falls back
+# to a default instead of holding up generation.
+CONTEXT_TIMEOUTS = {
+    "preferences": float(os.environ.get('PREFERENCES_TIMEOUT', 1.5)),
+    "recent_events": float(os.environ.get('RECENT_EVENTS_TIMEOUT', 1.0)),
+    "long_term_memories": float(os.environ.get('LONG_TERM_MEMORIES_TIMEOUT', 1.5)),
+}
+
 # MySQL connection
 def get_mysql_connection():
     return pymysql.connect(
@@ -18,13 +120,42 @@ def get_mysql_connection():
         password=os.getenv('MYSQL_PASSWORD', '87uW3y4oU59f'),
         database=os.getenv('MYSQL_DATABASE', 'gpbible'),
         port=int(os.getenv('MYSQL_PORT', 3306)),
-        charset='utf8mb4'
+        charset='utf8mb4',
+        connect_timeout=int(os.getenv('MYSQL_CONNECT_TIMEOUT', 3)),
+        read_timeout=int(os.getenv('MYSQL_READ_TIMEOUT', 5)),
+        write_timeout=int(os.getenv('MYSQL_WRITE_TIMEOUT', 5))
     )
 
+# Shared across warm invocations; all MySQL helpers borrow from here
+mysql_pool = MySQLPool(
+    get_mysql_connection,
+    max_size=int(os.getenv('MYSQL_POOL_SIZE', 4)),
+    acquire_timeout=float(os.getenv('MYSQL_POOL_TIMEOUT', 2)),
+    health_check_interval=float(os.getenv('MYSQL_HEALTH_CHECK_INTERVAL', 30))
+)
+
+def get_mysql_pool_stats() -> dict:
+    """MySQL pool counters for monitoring."""
+    return mysql_pool.stats()
+
+# bible_versions / denominations lookup maps, loaded at cold start
+LOOKUP_TABLES_TTL = int(os.getenv('LOOKUP_TABLES_TTL', 3600))
+LOOKUP_TABLES_RETRY = 30
+lookup_tables = {"bible_versions": {}, "denominations": {}, "loaded_at": float("-inf")}
+lookup_tables_lock = threading.Lock()
+
 def bible_companion(input_text: str, user_id: str = None, session_id: str = None):
     """
     Bible Companion agent with AgentCore Memory integration.
     """
+    return "".join(bible_companion_stream(input_text, user_id, session_id))
+
+def bible_companion_stream(input_text: str, user_id: str = None, session_id: str = None):
+    """
+    Streaming Bible Companion: yields response chunks as they are generated.
+    The interaction is saved to memory and metrics are emitted when the stream
+    closes, whether it was fully consumed or the caller stopped early.
+    """
     
     # Extract user_id from session attributes if not provided
     if not user_id:
@@ -32,185 +163,311 @@ def bible_companion(input_text: str, user_id: str = None, session_id: str = None
     if not session_id:
         session_id = f"session-{int(time.time())}"
     
-    # Get user preferences from MySQL
-    preferences = get_user_preferences(user_id)
-    
-    # Get conversation context from AgentCore Memory
-    context = get_memory_context(user_id, session_id)
+    metrics = InvocationMetrics("bible-companion", "chat")
+    metrics.set_property("sessionId", session_id)
     
-    # Build enriched prompt with context
-    enriched_prompt = build_contextual_prompt(input_text, preferences, context)
+    # Preferences first (usually from preferences_cache): they are all a response cache lookup needs
+    preferences = load_turn_context(user_id, session_id, metrics, ("preferences",))["preferences"]
     
-    # Generate response
-    response = generate_spiritual_response(enriched_prompt)
-    
-    # Save interaction to AgentCore Memory
-    save_to_memory(user_id, session_id, input_text, response)
-    
-    return response
+    # Near-identical questions are answered from the response cache, re-rendered with this user's name;
+    # a hit skips the memory fan-out, prompt building and generation entirely
+    chunks = []
+    generation_started = time.perf_counter()
+    try:
+        cached_response = response_cache.lookup(input_text, preferences)
+        if cached_response is not None:
+            metrics.count("response_cache_hits")
+            chunks.append(cached_response)
+            yield cached_response
+        else:
+            # Session events and long-term records, fetched concurrently
+            with metrics.stage("context_load"):
+                context = load_turn_context(user_id, session_id, metrics, ("recent_events", "long_term_memories"))
+        
+            # Build enriched prompt with context
+            with metrics.stage("prompt_build"):
+                enriched_prompt = build_contextual_prompt(input_text, preferences, context)
+            packing = context["packing"]
+            metrics.count("context_tokens", packing["used_tokens"])
+            metrics.count("context_items_dropped", len(packing["dropped"]))
+            metrics.count("context_items_truncated", len(packing["truncated"]))
+            if packing["dropped"] or packing["truncated"]:
+                metrics.set_property("contextPacking", packing)
+
+            # Stream response; the stable prefix is marked for the provider's prompt cache
+            generation_started = time.perf_counter()
+            usage = {}
+            for chunk in stream_spiritual_response(enriched_prompt, session_id,
+                                                   cache_prefix=stable_prefix(context["prompt_segments"]), usage=usage):
+                if not chunks:
+                    metrics.record("first_token", (time.perf_counter() - generation_started) * 1000)
+                chunks.append(chunk)
+                yield chunk
+            metrics.record_llm_usage(usage)
+            # Not stored when the prompt used history relevant to this question (context["personal_items"])
+            response_cache.store(input_text, preferences, "".join(chunks), context=context)
+    finally:
+        metrics.record("generation", (time.perf_counter() - generation_started) * 1000)
+        
+        # Save interaction to AgentCore Memory once the stream closes, also when the caller stops reading early
+        if chunks:
+            with metrics.stage("persistence"):
+                response = "".join(chunks)
+                # Folded in before the save, so a session new to this container is seeded from its earlier turns only
+                session_summaries.observe(session_id, input_text, interaction_metadata(input_text, response),
+                                          seed=lambda: memory.get_session_interactions(session_id, user_id))
+                save_to_memory(user_id, session_id, input_text, response)
+        
+                # Queue the session summary at each checkpoint; it is written in the background
+                if should_summarize_session(session_id):
+                    summarize_and_save_session(user_id, session_id)
+        
+        metrics.emit()
+
+def load_turn_context(user_id: str, session_id: str, metrics: InvocationMetrics = None,
+                      names: tuple = ("preferences", "recent_events", "long_term_memories")) -> dict:
+    """
+    Fetch the named branches (preferences, session events, long-term records)
+    in parallel. A branch that fails or exceeds its CONTEXT_TIMEOUTS budget is
+    replaced by its default so one slow dependency never blocks the turn.
+    Each branch is timed as its own stage when metrics is given.
+    """
+    branches = {
+        "preferences": (get_user_preferences, (user_id,), lambda: {"firstName": "Friend", "bibleVersion": "NIV"}),
+        "recent_events": (get_recent_events, (user_id, session_id), list),
+        "long_term_memories": (get_long_term_memories, (user_id,), list),
+    }
+    return fan_out({name: branches[name] for name in names}, CONTEXT_TIMEOUTS, metrics)
+
+def get_recent_events(user_id: str, session_id: str) -> list:
+    """
+    Get recent events for this session, from the in-process session buffer
+    when it is warm, otherwise from AgentCore Memory (which refills it).
+    """
+    buffered = session_events.get(user_id, session_id)
+    if buffered is not None:
+        return buffered
+    events = agentcore_client.list_events(
+        memoryId=MEMORY_ID,
+        actorId=user_id,
+        sessionId=session_id,
+        maxResults=session_events.max_events
+    ).get('events', [])
+    # Merged with turns this container wrote that list_events does not show yet
+    return session_events.fill(user_id, session_id, events)
+
+def get_long_term_memories(user_id: str) -> list:
+    """Get long-term memory records for this user from AgentCore Memory."""
+    memories = agentcore_client.retrieve_memory_records(
+        memoryId=MEMORY_ID,
+        namespace=f"customer-support/{user_id}/preferences",
+        searchCriteria={
+            "topK": 5
+        }
+    )
+    return memories.get('memoryRecords', [])
 
 def get_memory_context(user_id: str, session_id: str) -> dict:
     """Get conversation context from AgentCore Memory."""
     try:
-        # Get recent events from this session
-        events = agentcore_client.list_events(
-            memoryId=MEMORY_ID,
-            actorId=user_id,
-            sessionId=session_id,
-            maxResults=10
-        )
-        
-        # Get long-term memories for this user
-        memories = agentcore_client.retrieve_memory_records(
-            memoryId=MEMORY_ID,
-            namespace=f"customer-support/{user_id}/preferences",
-            searchCriteria={
-                "topK": 5
-            }
-        )
-        
         return {
-            "recent_events": events.get('events', []),
-            "long_term_memories": memories.get('memoryRecords', [])
+            "recent_events": get_recent_events(user_id, session_id),
+            "long_term_memories": get_long_term_memories(user_id)
         }
     except Exception as e:
         print(f"Error getting memory context: {e}")
         return {"recent_events": [], "long_term_memories": []}
 
 def save_to_memory(user_id: str, session_id: str, user_input: str, agent_response: str):
-    """Save interaction to AgentCore Memory."""
+    """
+    Queue the interaction for AgentCore Memory.
+    Both turns are spooled as one multi-payload event and written in the
+    background by event_writer, so the response is not held up by create_event.
+    The event is also appended to the session buffer read by get_recent_events.
+    """
     try:
-        # Save user message
-        agentcore_client.create_event(
-            memoryId=MEMORY_ID,
-            actorId=user_id,
-            sessionId=session_id,
-            eventTimestamp=int(time.time() * 1000),
-            payload=[
-                {
-                    "conversational": {
-                        "content": {"text": user_input},
-                        "role": "USER"
-                    }
+        payload = [
+            {
+                "conversational": {
+                    "content": {"text": user_input},
+                    "role": "USER"
                 }
-            ]
-        )
-        
-        # Save agent response
-        agentcore_client.create_event(
-            memoryId=MEMORY_ID,
-            actorId=user_id,
-            sessionId=session_id,
-            eventTimestamp=int(time.time() * 1000),
-            payload=[
-                {
-                    "conversational": {
-                        "content": {"text": agent_response},
-                        "role": "ASSISTANT"
-                    }
+            },
+            {
+                "conversational": {
+                    "content": {"text": agent_response},
+                    "role": "ASSISTANT"
                 }
-            ]
-        )
+            }
+        ]
+        event_timestamp = int(time.time() * 1000)
+        event_writer.enqueue(user_id, session_id, payload, event_timestamp)
+        session_events.append(user_id, session_id, payload, event_timestamp)
     except Exception as e:
         print(f"Error saving to memory: {e}")
 
+# Prompt headings for packed context, in prompt order
+CONTEXT_HEADINGS = {
+    "suggested_verses": "Suggested Verses (by theme in the user's message; quote them in the user's bibleVersion):",
+    "recent_turn": "Recent Conversation:",
+    "long_term": "What You Remember About This User:",
+}
+
+def build_contextual_prompt(input_text: str, preferences: dict, context: dict, is_first_time: bool = False) -> str:
+    """
+    Build enriched prompt with database context instead of app-provided data.
+    Segments run from static to per-turn (see prompt_segments) so the prefix
+    stays cacheable; context["prompt_segments"] keeps them for accounting.
+    """
+    
+    # Determine conversation type
+    conversation_type = "**first time today asking**" if is_first_time else "**continue conversation**"
+    
+    # Scripture for the themes in this message, so the model doesn't have to search for it
+    suggestions = theme_verse_index.suggest(theme_extractor.extract(input_text, top_n=3))
+    items = [ContextItem("suggested_verses", format_suggestions([suggestion]), rank)
+             for rank, suggestion in enumerate(suggestions)]
+    
+    # Optional context competes for CONTEXT_TOKEN_BUDGET; context["packing"] reports what was left out
+    items += turn_items(context.get("recent_events", []))
+    records = context.get("long_term_memories", [])
+    items += record_items(records)
+    packed = context_packer.pack(items, query=input_text)
+    context["packing"] = packed.report()
+    # process_spiritual_guidance packs past conversations into what is left, skipping these records
+    context["query"] = input_text
+    context["packed_records"] = packed_record_keys(packed, records)
+    # History the answer may draw on; such answers are not shared through the response cache
+    context["personal_items"] = len(packed.relevant("recent_turn", "long_term"))
+    
+    # Everything that changes per turn goes in the last segment
+    turn = "\n\n".join(part for part in (
+        packed.render(CONTEXT_HEADINGS),
+        f"Conversation Type: {conversation_type}",
+        f"User Message: {input_text}"
+    ) if part)
+    segments = build_segments(preferences, turn)
+    context["prompt_segments"] = segments
+    
+    return render(segments)
+
 @Tool(name="get_user_preferences")
 def get_user_preferences(user_id: str) -> dict:
-    """Get user preferences from MySQL with avatar info."""
+    """Get user preferences, served from the in-process cache while fresh."""
+    cached = preferences_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+    
     try:
-        conn = get_mysql_connection()
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
-        
-        # Get user basic data + avatar
+        preferences = load_user_preferences(user_id)
+    except Exception as e:
+        # Errors are not cached so the next turn retries MySQL
+        print(f"Error getting preferences: {e}")
+        return {"firstName": "Friend", "bibleVersion": "NIV"}
+    
+    if preferences is None:
+        preferences = {"firstName": "Friend", "bibleVersion": "NIV"}
+        preferences_cache.put(user_id, preferences, negative=True)
+    else:
+        preferences_cache.put(user_id, preferences)
+    return dict(preferences)
+
+def load_user_preferences(user_id: str) -> dict:
+    """Load user preferences from MySQL with avatar info. Returns None for unknown users."""
+    with mysql_pool.connection() as conn, conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        # User basic data + avatar + bible version/denomination in one round-trip
         cursor.execute(
-            """SELECT u.firstName, u.birthDate, u.avatarIa, a.name as avatarName
+            """SELECT u.firstName, u.birthDate, u.avatarIa, a.name as avatarName,
+                      p.bibleVersionId, p.denominationId
                FROM users u 
                LEFT JOIN ai_avatars a ON u.avatarIa = a.id
-               WHERE u.id = %s""",
+               LEFT JOIN user_preferences p ON p.userId = u.id
+               WHERE u.id = %s
+               LIMIT 1""",
             (user_id,)
         )
         user_result = cursor.fetchone()
-        
-        # Get bible version and denomination from user_preferences
-        cursor.execute(
-            """SELECT bibleVersionId, denominationId 
-               FROM user_preferences WHERE userId = %s""",
-            (user_id,)
-        )
-        prefs_result = cursor.fetchone()
-        
-        conn.close()
-        
-        if user_result:
-            return {
-                "firstName": user_result.get("firstName", "Friend"),
-                "bibleVersion": get_bible_version_name(prefs_result.get("bibleVersionId")) if prefs_result else "NIV",
-                "denomination": get_denomination_name(prefs_result.get("denominationId")) if prefs_result else None,
-                "birthday": user_result.get("birthDate"),
-                "avatarName": user_result.get("avatarName")
-            }
-        else:
-            return {"firstName": "Friend", "bibleVersion": "NIV"}
-    except Exception as e:
-        print(f"Error getting preferences: {e}")
-        return {"firstName": "Friend", "bibleVersion": "NIV"}
+    
+    if not user_result:
+        return None
+    
+    return {
+        "firstName": user_result.get("firstName", "Friend"),
+        "bibleVersion": get_bible_version_name(user_result.get("bibleVersionId")),
+        "denomination": get_denomination_name(user_result.get("denominationId")),
+        "birthday": user_result.get("birthDate"),
+        "avatarName": user_result.get("avatarName")
+    }
+
+def load_lookup_tables(force: bool = False) -> dict:
+    """
+    Load bible_versions and denominations into memory.
+    Both tables rarely change, so they are only re-read after LOOKUP_TABLES_TTL.
+    """
+    if not force and time.monotonic() - lookup_tables["loaded_at"] < LOOKUP_TABLES_TTL:
+        return lookup_tables
+    
+    with lookup_tables_lock:
+        # Another thread may have refreshed while we waited for the lock
+        if not force and time.monotonic() - lookup_tables["loaded_at"] < LOOKUP_TABLES_TTL:
+            return lookup_tables
+        try:
+            with mysql_pool.connection() as conn, conn.cursor() as cursor:
+                cursor.execute("SELECT id, abbreviation FROM bible_versions")
+                bible_versions = dict(cursor.fetchall())
+                cursor.execute("SELECT id, name FROM denominations")
+                denominations = dict(cursor.fetchall())
+            
+            lookup_tables["bible_versions"] = bible_versions
+            lookup_tables["denominations"] = denominations
+            lookup_tables["loaded_at"] = time.monotonic()
+        except Exception as e:
+            # Keep serving the previous maps and retry after LOOKUP_TABLES_RETRY
+            print(f"Error loading lookup tables: {e}")
+            lookup_tables["loaded_at"] = time.monotonic() - LOOKUP_TABLES_TTL + LOOKUP_TABLES_RETRY
+    
+    return lookup_tables
 
 def get_bible_version_name(version_id: int) -> str:
     """Get bible version name from ID."""
     if not version_id:
         return "NIV"
-    try:
-        conn = get_mysql_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT abbreviation FROM bible_versions WHERE id = %s", (version_id,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else "NIV"
-    except:
-        return "NIV"
+    return load_lookup_tables()["bible_versions"].get(version_id, "NIV")
 
 def get_denomination_name(denom_id: str) -> str:
     """Get denomination name from ID."""
     if not denom_id:
         return None
-    try:
-        conn = get_mysql_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM denominations WHERE id = %s", (denom_id,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else None
-    except:
-        return None
+    return load_lookup_tables()["denominations"].get(denom_id)
 
 @Tool(name="save_user_preferences")
 def save_user_preferences(user_id: str, preferences: dict):
     """Save user preferences to MySQL."""
     try:
-        conn = get_mysql_connection()
-        cursor = conn.cursor()
-        
-        # Update user basic info
-        if 'firstName' in preferences or 'birthday' in preferences:
-            cursor.execute(
-                "UPDATE users SET firstName = %s, birthDate = %s WHERE id = %s",
-                (preferences.get('firstName'), preferences.get('birthday'), user_id)
-            )
-        
-        # Update bible version preference
-        if 'bibleVersion' in preferences:
-            cursor.execute(
-                """INSERT INTO `bible-versions-user` (user_id, bible_version) 
-                   VALUES (%s, %s) ON DUPLICATE KEY UPDATE bible_version = VALUES(bible_version)""",
-                (user_id, preferences.get('bibleVersion'))
-            )
-        
-        conn.commit()
-        conn.close()
+        with mysql_pool.connection() as conn, conn.cursor() as cursor:
+            # Update user basic info
+            if 'firstName' in preferences or 'birthday' in preferences:
+                cursor.execute(
+                    "UPDATE users SET firstName = %s, birthDate = %s WHERE id = %s",
+                    (preferences.get('firstName'), preferences.get('birthday'), user_id)
+                )
+            
+            # Update bible version preference
+            if 'bibleVersion' in preferences:
+                cursor.execute(
+                    """INSERT INTO `bible-versions-user` (user_id, bible_version) 
+                       VALUES (%s, %s) ON DUPLICATE KEY UPDATE bible_version = VALUES(bible_version)""",
+                    (user_id, preferences.get('bibleVersion'))
+                )
+            
+            conn.commit()
         return {"success": True}
     except Exception as e:
         print(f"Error saving preferences: {e}")
         return {"success": False}
+    finally:
+        # Next read goes back to MySQL and re-caches the fresh row
+        preferences_cache.invalidate(user_id)
 
 def generate_greeting(preferences: dict, is_first_time: bool, context: dict) -> str:
     """Generate personalized greeting."""
@@ -225,71 +482,74 @@ def generate_greeting(preferences: dict, is_first_time: bool, context: dict) ->
             return f"Hello again, {name}! I remember we were discussing {recent_themes[0]}. How are you feeling about that today?"
         return f"Welcome back, {name}! What's on your heart today?"
 
-def process_spiritual_guidance(enriched_prompt: str, preferences: dict, user_id: str) -> str:
-    """Process spiritual guidance with enriched context from database."""
+def process_spiritual_guidance(enriched_prompt: str, preferences: dict, user_id: str, context: dict = None,
+                               metrics: InvocationMetrics = None) -> str:
+    """
+    Process spiritual guidance with enriched context from database.
+    context is the one build_contextual_prompt filled: past conversations get
+    what is left of its token budget, records it already packed are skipped,
+    and its personal_items count also covers them. The provider's token usage
+    is recorded on metrics.
+    """
     
-    # Use AgentCore Memory to get relevant past conversations
+    # Use AgentCore Memory to get past conversations relevant to the user's message
+    context = context if context is not None else {}
+    query = context.get("query", enriched_prompt)
     relevant_memories = memory.search_memories(
         user_id=user_id,
-        query=enriched_prompt,
+        query=query,
         limit=5
     )
+    # Records already in the prompt are not repeated
+    already_packed = context.get("packed_records", set())
+    relevant_memories = [record for record in relevant_memories if record_key(record) not in already_packed]
     
-    # The enriched_prompt already contains all user context from DB
-    # Now add memory context and send to LLM
-    full_context = f"""
-    {enriched_prompt}
-    
-    Relevant Past Conversations:
-    {format_memories(relevant_memories)}
-    
-    Instructions: Follow your Bible Companion prompt exactly, using the user context provided above.
-    """
+    # The enriched_prompt already contains all user context from DB; past conversations
+    # get what is left of the context token budget, then the prompt goes to the LLM
+    used_tokens = context.get("packing", {}).get("used_tokens", 0)
+    packed = context_packer.pack(record_items(relevant_memories), query=query,
+                                 budget=max(context_packer.budget - used_tokens, 0))
+    if packed.dropped or packed.truncated:
+        print(f"Context packing (past conversations): {json.dumps(packed.report())}")
+    if "packing" in context:
+        context["packing"]["used_tokens"] += packed.used_tokens
+    context["personal_items"] = context.get("personal_items", 0) + len(packed.relevant("long_term"))
+    # Appended after the turn segment, so the cacheable prefix is unchanged
+    full_context = f"""{enriched_prompt}
+
+Relevant Past Conversations:
+{format_memories([{"summary": text} for text in packed.section("long_term")])}"""
     
     # Here you'd call your LLM with the full_context
-    return generate_spiritual_response(full_context)
+    cache_prefix = stable_prefix(context["prompt_segments"]) if "prompt_segments" in context else None
+    usage = {}
+    response = generate_spiritual_response(full_context, cache_prefix=cache_prefix, usage=usage)
+    if metrics is not None:
+        metrics.record_llm_usage(usage)
+    return response
+
+def interaction_metadata(input_text: str, response: str) -> dict:
+    """Themes, verses and sentiment of one interaction, from one analyzer pass."""
+    analysis = conversation_analyzer.analyze(input_text, response)
+    return {
+        "spiritual_themes": analysis["themes"],
+        "verses_shared": analysis["verses"],
+        "sentiment": analysis["sentiment"],
+        "sentiment_score": analysis["sentiment_score"],
+        "counts": analysis["counts"]
+    }
 
 def extract_themes(input_text: str, response: str) -> list:
-    """Extract spiritual themes from conversation."""
-    # Simple keyword extraction - you could use LLM for better results
-    themes = []
-    spiritual_keywords = [
-        "prayer", "faith", "forgiveness", "love", "hope", "trust", 
-        "family", "relationships", "work", "anxiety", "depression",
-        "gratitude", "worship", "service", "community"
-    ]
-    
-    text = (input_text + " " + response).lower()
-    for keyword in spiritual_keywords:
-        if keyword in text:
-            themes.append(keyword)
-    
-    return themes[:3]  # Top 3 themes
+    """Extract spiritual themes from conversation, ranked by weighted frequency."""
+    return theme_extractor.extract_conversation(input_text, response, top_n=3)  # Top 3 themes
 
 def extract_verses(response: str) -> list:
-    """Extract Bible verses mentioned in response."""
-    import re
-    # Simple regex to find Bible references
-    verse_pattern = r'\b\d*\s*[A-Za-z]+\s+\d+:\d+(?:-\d+)?\b'
-    verses = re.findall(verse_pattern, response)
-    return verses
+    """Extract Bible verses mentioned in response as canonical, deduplicated references."""
+    return [format_reference(reference) for reference in find_references(response)]
 
 def analyze_sentiment(text: str) -> str:
-    """Analyze user's spiritual/emotional sentiment."""
-    # Simple sentiment analysis - you could use AWS Comprehend
-    positive_words = ["blessed", "grateful", "joy", "peace", "hope", "love"]
-    negative_words = ["struggling", "worried", "anxious", "sad", "lost", "angry"]
-    
-    text_lower = text.lower()
-    positive_count = sum(1 for word in positive_words if word in text_lower)
-    negative_count = sum(1 for word in negative_words if word in text_lower)
-    
-    if positive_count > negative_count:
-        return "positive"
-    elif negative_count > positive_count:
-        return "struggling"
-    else:
-        return "neutral"
+    """Analyze user's spiritual/emotional sentiment: positive, struggling or neutral."""
+    return sentiment_scorer.label(text)
 
 def format_memories(memories: list) -> str:
     """Format memories for context."""
@@ -303,58 +563,63 @@ def format_memories(memories: list) -> str:
     return "\n".join(formatted)
 
 def should_summarize_session(session_id: str) -> bool:
-    """Check if session should be summarized."""
-    interaction_count = memory.get_session_interaction_count(session_id)
-    return interaction_count % 10 == 0  # Every 10 interactions
-
-def summarize_and_save_session(user_id: str, session_id: str):
-    """Summarize session and save to long-term memory."""
-    # Get session interactions
-    interactions = memory.get_session_interactions(session_id)
-    
-    # Create summary
-    summary = create_session_summary(interactions)
+    """Check if session should be summarized, from its rolling summary (no memory read)."""
+    rolling = session_summaries.get(session_id)
+    return rolling is not None and rolling.count > 0 and rolling.count % SUMMARY_INTERVAL == 0
+
+def summarize_and_save_session(user_id: str, session_id: str) -> bool:
+    """
+    Queue the session summary for long-term memory; summary_worker writes it
+    in the background. The checkpoint is the session's interaction count, so
+    ending a session again only writes a new summary once it has new turns.
+    A session this container has not seen is seeded from its stored interactions.
+    Returns False if this checkpoint was already queued or written.
+    """
+    rolling = session_summaries.seed(session_id, lambda: memory.get_session_interactions(session_id, user_id))
+    if rolling is None or not rolling.count:
+        return False
+    return summary_worker.enqueue(user_id, session_id, rolling.count, rolling.summary())
+
+def save_session_summary(job: SummaryJob):
+    """Write one queued summary to long-term memory (runs on summary_worker)."""
+    summary = job.summary
+    if summary is None:
+        # Only jobs spooled before every checkpoint carried its summary
+        summary = create_session_summary(memory.get_session_interactions(job.session_id, job.user_id))
     
-    # Save to long-term memory
     memory.save_long_term_memory(
-        user_id=user_id,
+        user_id=job.user_id,
         content=summary,
-        metadata={"session_id": session_id, "timestamp": datetime.now().isoformat()}
+        metadata={"session_id": job.session_id, "checkpoint": job.checkpoint, "timestamp": datetime.now().isoformat()}
     )
 
+# Summaries and long-term writes run off the request path (spooled to /tmp, replayed after a freeze)
+summary_worker = SummaryWorker(
+    write=save_session_summary,
+    spool_path=os.environ.get('SUMMARY_SPOOL_PATH', '/tmp/summary_spool.db'),
+    max_queue=int(os.environ.get('SUMMARY_QUEUE_SIZE', 1000)),
+    max_attempts=int(os.environ.get('SUMMARY_MAX_ATTEMPTS', 3))
+)
+
 def create_session_summary(interactions: list) -> str:
-    """Create concise session summary."""
-    if not interactions:
-        return "No interactions in session"
-    
-    themes = set()
-    verses = set()
-    key_points = []
-    
-    for interaction in interactions:
-        metadata = interaction.get('metadata', {})
-        themes.update(metadata.get('spiritual_themes', []))
-        verses.update(metadata.get('verses_shared', []))
-        
-        # Extract key points from user input
-        user_input = interaction.get('user_input', '')
-        if len(user_input) > 50:  # Significant input
-            key_points.append(user_input[:100] + "..." if len(user_input) > 100 else user_input)
-    
-    summary_parts = []
-    if themes:
-        summary_parts.append(f"Themes: {', '.join(list(themes)[:3])}")
-    if verses:
-        summary_parts.append(f"Verses: {', '.join(list(verses)[:3])}")
-    if key_points:
-        summary_parts.append(f"Key discussion: {key_points[0]}")
-    
-    return " | ".join(summary_parts)
+    """Create concise session summary, themes ranked by frequency."""
+    return summarize_interactions(interactions).summary()
+
+def generate_spiritual_response(prompt: str, session_id: str = None, route: str = "companion",
+                                cache_prefix: str = None, usage: dict = None) -> str:
+    """
+    Generate spiritual response using the LLM backend configured for the route.
+    cache_prefix is the prompt's stable prefix; usage receives the provider's token counts.
+    """
+    return get_backend_for_route(route).generate(prompt, session_id, cache_prefix, usage)
+
+def stream_spiritual_response(prompt: str, session_id: str = None, route: str = "companion",
+                              cache_prefix: str = None, usage: dict = None):
+    """Yield the spiritual response in chunks as the LLM produces them."""
+    yield from get_backend_for_route(route).stream(prompt, session_id, cache_prefix, usage)
 
-def generate_spiritual_response(prompt: str) -> str:
-    """Generate spiritual response using LLM."""
-    # Placeholder - integrate with your preferred LLM
-    return "I'm here to walk with you in faith. Let me share some thoughts and a relevant Bible verse..."
+# Warm the lookup maps at cold start
+load_lookup_tables()
 
 if __name__ == "__main__":
     # Test the agent
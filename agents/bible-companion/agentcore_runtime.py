@@ -3,11 +3,36 @@ from bedrock_agentcore.tools import Tool
 import json
 import pymysql
 import os
+import threading
+import time
+from mysql_pool import MySQLPool
+from preference_cache import preferences_cache
+from themes import theme_extractor
+from bible_references import find_references, format_reference
+from sentiment import sentiment_scorer
+from theme_verses import format_suggestions, theme_verse_index
+from context_loader import fan_out
+from context_packer import ContextItem, context_packer, packed_record_keys, record_items, record_key, turn_items
+from prompt_segments import build_segments, render, stable_prefix
+from response_cache import response_cache
+from session_summary import SUMMARY_INTERVAL, session_summaries, summarize_interactions
+from summary_worker import SummaryJob, SummaryWorker
+from conversation_analysis import conversation_analyzer
+from llm_backends import get_backend_for_route
+from metrics import InvocationMetrics
 from datetime import datetime
 
 # Initialize AgentCore Memory
 memory = Memory()
 
+# Context fan-out: each branch gets its own budget (seconds) and falls back
+# to a default instead of holding up generation.
+CONTEXT_TIMEOUTS = {
+    "preferences": float(os.environ.get('PREFERENCES_TIMEOUT', 1.5)),
+    "is_first_time": float(os.environ.get('FIRST_TIME_TIMEOUT', 1.0)),
+    "context": float(os.environ.get('MEMORY_CONTEXT_TIMEOUT', 1.5)),
+}
+
 # MySQL connection
 def get_mysql_connection():
     return pymysql.connect(
@@ -16,9 +41,30 @@ def get_mysql_connection():
         password=os.getenv('MYSQL_PASSWORD', '87uW3y4oU59f'),
         database=os.getenv('MYSQL_DATABASE', 'gpbible'),
         port=int(os.getenv('MYSQL_PORT', 3306)),
-        charset='utf8mb4'
+        charset='utf8mb4',
+        connect_timeout=int(os.getenv('MYSQL_CONNECT_TIMEOUT', 3)),
+        read_timeout=int(os.getenv('MYSQL_READ_TIMEOUT', 5)),
+        write_timeout=int(os.getenv('MYSQL_WRITE_TIMEOUT', 5))
     )
 
+# Shared across warm invocations; all MySQL helpers borrow from here
+mysql_pool = MySQLPool(
+    get_mysql_connection,
+    max_size=int(os.getenv('MYSQL_POOL_SIZE', 4)),
+    acquire_timeout=float(os.getenv('MYSQL_POOL_TIMEOUT', 2)),
+    health_check_interval=float(os.getenv('MYSQL_HEALTH_CHECK_INTERVAL', 30))
+)
+
+def get_mysql_pool_stats() -> dict:
+    """MySQL pool counters for monitoring."""
+    return mysql_pool.stats()
+
+# bible_versions / denominations lookup maps, loaded at cold start
+LOOKUP_TABLES_TTL = int(os.getenv('LOOKUP_TABLES_TTL', 3600))
+LOOKUP_TABLES_RETRY = 30
+lookup_tables = {"bible_versions": {}, "denominations": {}, "loaded_at": float("-inf")}
+lookup_tables_lock = threading.Lock()
+
 @Agent(
     name="bible-companion",
     description="Personalized Bible companion with memory",
@@ -27,166 +73,257 @@ def get_mysql_connection():
 def bible_companion(input_text: str, user_id: str, session_id: str):
     """
     Bible Companion agent with AgentCore Memory integration.
+    Stage timings are emitted as one EMF line per invocation, even when it fails.
     """
+    metrics = InvocationMetrics("bible-companion", "chat")
+    metrics.set_property("sessionId", session_id)
+    try:
+        return answer_turn(input_text, user_id, session_id, metrics)
+    finally:
+        metrics.emit()
+
+def answer_turn(input_text: str, user_id: str, session_id: str, metrics: InvocationMetrics) -> str:
+    """One companion turn: cache lookup or generation, then persistence."""
     
-    # Auto-load user context from database
-    preferences = get_user_preferences(user_id)
-    context = memory.get_context(user_id, session_id)
-    
-    # Check if first time today
-    is_first_time = memory.is_first_interaction_today(user_id)
+    # Preferences (usually from preferences_cache) and the conversation type are all a cache lookup
+    # needs; both are fetched concurrently
+    loaded = load_turn_context(user_id, session_id, metrics, ("preferences", "is_first_time"))
+    preferences = loaded["preferences"]
+    is_first_time = loaded["is_first_time"]
     
-    # Build enriched prompt with DB context
-    enriched_prompt = build_contextual_prompt(
-        input_text, 
-        preferences, 
-        context, 
-        is_first_time
-    )
-    
-    # Process with full context
-    response = process_spiritual_guidance(enriched_prompt, preferences, user_id)
+    # Near-identical questions are served from the response cache before memory is read or a prompt built
+    conversation_type = "first" if is_first_time else "continue"
+    response = response_cache.lookup(input_text, preferences, conversation_type)
+    if response is not None:
+        metrics.count("response_cache_hits")
+    else:
+        with metrics.stage("context_load"):
+            context = load_turn_context(user_id, session_id, metrics, ("context",))["context"]
+        
+        # Build enriched prompt with DB context
+        with metrics.stage("prompt_build"):
+            enriched_prompt = build_contextual_prompt(
+                input_text, 
+                preferences, 
+                context, 
+                is_first_time
+            )
+        packing = context["packing"]
+        metrics.count("context_tokens", packing["used_tokens"])
+        metrics.count("context_items_dropped", len(packing["dropped"]))
+        metrics.count("context_items_truncated", len(packing["truncated"]))
+        if packing["dropped"] or packing["truncated"]:
+            metrics.set_property("contextPacking", packing)
+
+        # Process with full context; not stored when the prompt used history relevant to this question
+        with metrics.stage("generation"):
+            response = process_spiritual_guidance(enriched_prompt, preferences, user_id, context, metrics)
+        response_cache.store(input_text, preferences, response, conversation_type, context=context)
     
-    # Save interaction to memory
-    memory.save_interaction(
-        user_id=user_id,
-        session_id=session_id,
-        user_input=input_text,
-        agent_response=response,
-        metadata={
-            "spiritual_themes": extract_themes(input_text, response),
-            "verses_shared": extract_verses(response),
-            "sentiment": analyze_sentiment(input_text)
+    # Save interaction to memory (themes, verses and sentiment from one analyzer pass)
+    with metrics.stage("persistence"):
+        analysis = conversation_analyzer.analyze(input_text, response)
+        metadata = {
+            "spiritual_themes": analysis["themes"],
+            "verses_shared": analysis["verses"],
+            "sentiment": analysis["sentiment"],
+            "sentiment_score": analysis["sentiment_score"],
+            "counts": analysis["counts"]
         }
-    )
-    
-    # Check if session should be summarized
-    if should_summarize_session(session_id):
-        summarize_and_save_session(user_id, session_id)
+        # Folded in before the save, so a session new to this container is seeded from its earlier turns only
+        session_summaries.observe(session_id, input_text, metadata,
+                                  seed=lambda: memory.get_session_interactions(session_id))
+        memory.save_interaction(
+            user_id=user_id,
+            session_id=session_id,
+            user_input=input_text,
+            agent_response=response,
+            metadata=metadata
+        )
+        
+        # Queue the session summary at each checkpoint; it is written in the background
+        if should_summarize_session(session_id):
+            summarize_and_save_session(user_id, session_id)
     
     return response
 
+def load_turn_context(user_id: str, session_id: str, metrics: InvocationMetrics = None,
+                      names: tuple = ("preferences", "is_first_time", "context")) -> dict:
+    """
+    Fetch the named branches (preferences, first-interaction check, memory
+    context) in parallel. A branch that fails or exceeds its CONTEXT_TIMEOUTS
+    budget is replaced by its default so one slow dependency never blocks the turn.
+    """
+    branches = {
+        "preferences": (get_user_preferences, (user_id,), lambda: {"firstName": "Friend", "bibleVersion": "NIV"}),
+        "is_first_time": (memory.is_first_interaction_today, (user_id,), lambda: False),
+        "context": (memory.get_context, (user_id, session_id),
+                    lambda: {"recent_events": [], "long_term_memories": []}),
+    }
+    return fan_out({name: branches[name] for name in names}, CONTEXT_TIMEOUTS, metrics)
+
+# Prompt headings for packed context, in prompt order
+CONTEXT_HEADINGS = {
+    "suggested_verses": "Suggested Verses (by theme in the user's message; quote them in the user's bibleVersion):",
+    "recent_turn": "Recent Conversation:",
+    "long_term": "What You Remember About This User:",
+}
+
 def build_contextual_prompt(input_text: str, preferences: dict, context: dict, is_first_time: bool) -> str:
     """
     Build enriched prompt with database context instead of app-provided data.
+    Segments run from static to per-turn (see prompt_segments) so the prefix
+    stays cacheable; context["prompt_segments"] keeps them for accounting.
     """
     
     # Determine conversation type
     conversation_type = "**first time today asking**" if is_first_time else "**continue conversation**"
     
-    # Build context string with DB data
-    user_context = f"""
-    User Context (from database):
-    - firstName: {preferences.get('firstName', 'Friend')}
-    - bibleVersion: {preferences.get('bibleVersion', 'NIV')}
-    - denomination: {preferences.get('denomination', 'Christian')}
-    - birthday: {preferences.get('birthday', 'Not specified')}
-    - avatarName: {preferences.get('avatarName', 'Not specified')}
+    # Scripture for the themes in this message, so the model doesn't have to search for it
+    suggestions = theme_verse_index.suggest(theme_extractor.extract(input_text, top_n=3))
+    items = [ContextItem("suggested_verses", format_suggestions([suggestion]), rank)
+             for rank, suggestion in enumerate(suggestions)]
     
-    Conversation Type: {conversation_type}
+    # Optional context competes for CONTEXT_TOKEN_BUDGET; context["packing"] reports what was left out
+    items += turn_items(context.get("recent_events", []))
+    records = context.get("long_term_memories", [])
+    items += record_items(records)
+    packed = context_packer.pack(items, query=input_text)
+    context["packing"] = packed.report()
+    # process_spiritual_guidance packs past conversations into what is left, skipping these records
+    context["query"] = input_text
+    context["packed_records"] = packed_record_keys(packed, records)
+    # History the answer may draw on; such answers are not shared through the response cache
+    context["personal_items"] = len(packed.relevant("recent_turn", "long_term"))
     
-    User Message: {input_text}
-    """
+    # Everything that changes per turn goes in the last segment
+    turn = "\n\n".join(part for part in (
+        packed.render(CONTEXT_HEADINGS),
+        f"Conversation Type: {conversation_type}",
+        f"User Message: {input_text}"
+    ) if part)
+    segments = build_segments(preferences, turn)
+    context["prompt_segments"] = segments
     
-    return user_context
+    return render(segments)
 
 @Tool(name="get_user_preferences")
 def get_user_preferences(user_id: str) -> dict:
-    """Get user preferences from MySQL with avatar info."""
+    """Get user preferences, served from the in-process cache while fresh."""
+    cached = preferences_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+    
     try:
-        conn = get_mysql_connection()
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
-        
-        # Get user basic data + avatar
+        preferences = load_user_preferences(user_id)
+    except Exception as e:
+        # Errors are not cached so the next turn retries MySQL
+        print(f"Error getting preferences: {e}")
+        return {"firstName": "Friend", "bibleVersion": "NIV"}
+    
+    if preferences is None:
+        preferences = {"firstName": "Friend", "bibleVersion": "NIV"}
+        preferences_cache.put(user_id, preferences, negative=True)
+    else:
+        preferences_cache.put(user_id, preferences)
+    return dict(preferences)
+
+def load_user_preferences(user_id: str) -> dict:
+    """Load user preferences from MySQL with avatar info. Returns None for unknown users."""
+    with mysql_pool.connection() as conn, conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        # User basic data + avatar + bible version/denomination in one round-trip
         cursor.execute(
-            """SELECT u.firstName, u.birthDate, u.avatarIa, a.name as avatarName
+            """SELECT u.firstName, u.birthDate, u.avatarIa, a.name as avatarName,
+                      p.bibleVersionId, p.denominationId
                FROM users u 
                LEFT JOIN ai_avatars a ON u.avatarIa = a.id
-               WHERE u.id = %s""",
+               LEFT JOIN user_preferences p ON p.userId = u.id
+               WHERE u.id = %s
+               LIMIT 1""",
             (user_id,)
         )
         user_result = cursor.fetchone()
-        
-        # Get bible version and denomination from user_preferences
-        cursor.execute(
-            """SELECT bibleVersionId, denominationId 
-               FROM user_preferences WHERE userId = %s""",
-            (user_id,)
-        )
-        prefs_result = cursor.fetchone()
-        
-        conn.close()
-        
-        if user_result:
-            return {
-                "firstName": user_result.get("firstName", "Friend"),
-                "bibleVersion": get_bible_version_name(prefs_result.get("bibleVersionId")) if prefs_result else "NIV",
-                "denomination": get_denomination_name(prefs_result.get("denominationId")) if prefs_result else None,
-                "birthday": user_result.get("birthDate"),
-                "avatarName": user_result.get("avatarName")
-            }
-        else:
-            return {"firstName": "Friend", "bibleVersion": "NIV"}
-    except Exception as e:
-        print(f"Error getting preferences: {e}")
-        return {"firstName": "Friend", "bibleVersion": "NIV"}
+    
+    if not user_result:
+        return None
+    
+    return {
+        "firstName": user_result.get("firstName", "Friend"),
+        "bibleVersion": get_bible_version_name(user_result.get("bibleVersionId")),
+        "denomination": get_denomination_name(user_result.get("denominationId")),
+        "birthday": user_result.get("birthDate"),
+        "avatarName": user_result.get("avatarName")
+    }
+
+def load_lookup_tables(force: bool = False) -> dict:
+    """
+    Load bible_versions and denominations into memory.
+    Both tables rarely change, so they are only re-read after LOOKUP_TABLES_TTL.
+    """
+    if not force and time.monotonic() - lookup_tables["loaded_at"] < LOOKUP_TABLES_TTL:
+        return lookup_tables
+    
+    with lookup_tables_lock:
+        # Another thread may have refreshed while we waited for the lock
+        if not force and time.monotonic() - lookup_tables["loaded_at"] < LOOKUP_TABLES_TTL:
+            return lookup_tables
+        try:
+            with mysql_pool.connection() as conn, conn.cursor() as cursor:
+                cursor.execute("SELECT id, abbreviation FROM bible_versions")
+                bible_versions = dict(cursor.fetchall())
+                cursor.execute("SELECT id, name FROM denominations")
+                denominations = dict(cursor.fetchall())
+            
+            lookup_tables["bible_versions"] = bible_versions
+            lookup_tables["denominations"] = denominations
+            lookup_tables["loaded_at"] = time.monotonic()
+        except Exception as e:
+            # Keep serving the previous maps and retry after LOOKUP_TABLES_RETRY
+            print(f"Error loading lookup tables: {e}")
+            lookup_tables["loaded_at"] = time.monotonic() - LOOKUP_TABLES_TTL + LOOKUP_TABLES_RETRY
+    
+    return lookup_tables
 
 def get_bible_version_name(version_id: int) -> str:
     """Get bible version name from ID."""
     if not version_id:
         return "NIV"
-    try:
-        conn = get_mysql_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT abbreviation FROM bible_versions WHERE id = %s", (version_id,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else "NIV"
-    except:
-        return "NIV"
+    return load_lookup_tables()["bible_versions"].get(version_id, "NIV")
 
 def get_denomination_name(denom_id: str) -> str:
     """Get denomination name from ID."""
     if not denom_id:
         return None
-    try:
-        conn = get_mysql_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM denominations WHERE id = %s", (denom_id,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else None
-    except:
-        return None
+    return load_lookup_tables()["denominations"].get(denom_id)
 
 @Tool(name="save_user_preferences")
 def save_user_preferences(user_id: str, preferences: dict):
     """Save user preferences to MySQL."""
     try:
-        conn = get_mysql_connection()
-        cursor = conn.cursor()
-        
-        # Update user basic info
-        if 'firstName' in preferences or 'birthday' in preferences:
-            cursor.execute(
-                "UPDATE users SET firstName = %s, birthDate = %s WHERE id = %s",
-                (preferences.get('firstName'), preferences.get('birthday'), user_id)
-            )
-        
-        # Update bible version preference
-        if 'bibleVersion' in preferences:
-            cursor.execute(
-                """INSERT INTO `bible-versions-user` (user_id, bible_version) 
-                   VALUES (%s, %s) ON DUPLICATE KEY UPDATE bible_version = VALUES(bible_version)""",
-                (user_id, preferences.get('bibleVersion'))
-            )
-        
-        conn.commit()
-        conn.close()
+        with mysql_pool.connection() as conn, conn.cursor() as cursor:
+            # Update user basic info
+            if 'firstName' in preferences or 'birthday' in preferences:
+                cursor.execute(
+                    "UPDATE users SET firstName = %s, birthDate = %s WHERE id = %s",
+                    (preferences.get('firstName'), preferences.get('birthday'), user_id)
+                )
+            
+            # Update bible version preference
+            if 'bibleVersion' in preferences:
+                cursor.execute(
+                    """INSERT INTO `bible-versions-user` (user_id, bible_version) 
+                       VALUES (%s, %s) ON DUPLICATE KEY UPDATE bible_version = VALUES(bible_version)""",
+                    (user_id, preferences.get('bibleVersion'))
+                )
+            
+            conn.commit()
         return {"success": True}
     except Exception as e:
         print(f"Error saving preferences: {e}")
         return {"success": False}
+    finally:
+        # Next read goes back to MySQL and re-caches the fresh row
+        preferences_cache.invalidate(user_id)
 
 def generate_greeting(preferences: dict, is_first_time: bool, context: dict) -> str:
     """Generate personalized greeting."""
@@ -201,71 +338,63 @@ def generate_greeting(preferences: dict, is_first_time: bool, context: dict) ->
             return f"Hello again, {name}! I remember we were discussing {recent_themes[0]}. How are you feeling about that today?"
         return f"Welcome back, {name}! What's on your heart today?"
 
-def process_spiritual_guidance(enriched_prompt: str, preferences: dict, user_id: str) -> str:
-    """Process spiritual guidance with enriched context from database."""
+def process_spiritual_guidance(enriched_prompt: str, preferences: dict, user_id: str, context: dict = None,
+                               metrics: InvocationMetrics = None) -> str:
+    """
+    Process spiritual guidance with enriched context from database.
+    context is the one build_contextual_prompt filled: past conversations get
+    what is left of its token budget, records it already packed are skipped,
+    and its personal_items count also covers them. The provider's token usage
+    is recorded on metrics.
+    """
     
-    # Use AgentCore Memory to get relevant past conversations
+    # Use AgentCore Memory to get past conversations relevant to the user's message
+    context = context if context is not None else {}
+    query = context.get("query", enriched_prompt)
     relevant_memories = memory.search_memories(
         user_id=user_id,
-        query=enriched_prompt,
+        query=query,
         limit=5
     )
+    # Records already in the prompt are not repeated
+    already_packed = context.get("packed_records", set())
+    relevant_memories = [record for record in relevant_memories if record_key(record) not in already_packed]
     
-    # The enriched_prompt already contains all user context from DB
-    # Now add memory context and send to LLM
-    full_context = f"""
-    {enriched_prompt}
-    
-    Relevant Past Conversations:
-    {format_memories(relevant_memories)}
-    
-    Instructions: Follow your Bible Companion prompt exactly, using the user context provided above.
-    """
+    # The enriched_prompt already contains all user context from DB; past conversations
+    # get what is left of the context token budget, then the prompt goes to the LLM
+    used_tokens = context.get("packing", {}).get("used_tokens", 0)
+    packed = context_packer.pack(record_items(relevant_memories), query=query,
+                                 budget=max(context_packer.budget - used_tokens, 0))
+    if packed.dropped or packed.truncated:
+        print(f"Context packing (past conversations): {json.dumps(packed.report())}")
+    if "packing" in context:
+        context["packing"]["used_tokens"] += packed.used_tokens
+    context["personal_items"] = context.get("personal_items", 0) + len(packed.relevant("long_term"))
+    # Appended after the turn segment, so the cacheable prefix is unchanged
+    full_context = f"""{enriched_prompt}
+
+Relevant Past Conversations:
+{format_memories([{"summary": text} for text in packed.section("long_term")])}"""
     
     # Here you'd call your LLM with the full_context
-    return generate_spiritual_response(full_context)
+    cache_prefix = stable_prefix(context["prompt_segments"]) if "prompt_segments" in context else None
+    usage = {}
+    response = generate_spiritual_response(full_context, cache_prefix=cache_prefix, usage=usage)
+    if metrics is not None:
+        metrics.record_llm_usage(usage)
+    return response
 
 def extract_themes(input_text: str, response: str) -> list:
-    """Extract spiritual themes from conversation."""
-    # Simple keyword extraction - you could use LLM for better results
-    themes = []
-    spiritual_keywords = [
-        "prayer", "faith", "forgiveness", "love", "hope", "trust", 
-        "family", "relationships", "work", "anxiety", "depression",
-        "gratitude", "worship", "service", "community"
-    ]
-    
-    text = (input_text + " " + response).lower()
-    for keyword in spiritual_keywords:
-        if keyword in text:
-            themes.append(keyword)
-    
-    return themes[:3]  # Top 3 themes
+    """Extract spiritual themes from conversation, ranked by weighted frequency."""
+    return theme_extractor.extract_conversation(input_text, response, top_n=3)  # Top 3 themes
 
 def extract_verses(response: str) -> list:
-    """Extract Bible verses mentioned in response."""
-    import re
-    # Simple regex to find Bible references
-    verse_pattern = r'\b\d*\s*[A-Za-z]+\s+\d+:\d+(?:-\d+)?\b'
-    verses = re.findall(verse_pattern, response)
-    return verses
+    """Extract Bible verses mentioned in response as canonical, deduplicated references."""
+    return [format_reference(reference) for reference in find_references(response)]
 
 def analyze_sentiment(text: str) -> str:
-    """Analyze user's spiritual/emotional sentiment."""
-    # Simple sentiment analysis - you could use AWS Comprehend
-    positive_words = ["blessed", "grateful", "joy", "peace", "hope", "love"]
-    negative_words = ["struggling", "worried", "anxious", "sad", "lost", "angry"]
-    
-    text_lower = text.lower()
-    positive_count = sum(1 for word in positive_words if word in text_lower)
-    negative_count = sum(1 for word in negative_words if word in text_lower)
-    
-    if positive_count > negative_count:
-        return "positive"
-    elif negative_count > positive_count:
-        return "struggling"
-    else:
-        return "neutral"
+    """Analyze user's spiritual/emotional sentiment: positive, struggling or neutral."""
+    return sentiment_scorer.label(text)
 
 def format_memories(memories: list) -> str:
     """Format memories for context."""
@@ -279,58 +408,63 @@ def format_memories(memories: list) -> str:
     return "\n".join(formatted)
 
 def should_summarize_session(session_id: str) -> bool:
-    """Check if session should be summarized."""
-    interaction_count = memory.get_session_interaction_count(session_id)
-    return interaction_count % 10 == 0  # Every 10 interactions
-
-def summarize_and_save_session(user_id: str, session_id: str):
-    """Summarize session and save to long-term memory."""
-    # Get session interactions
-    interactions = memory.get_session_interactions(session_id)
-    
-    # Create summary
-    summary = create_session_summary(interactions)
+    """Check if session should be summarized, from its rolling summary (no memory read)."""
+    rolling = session_summaries.get(session_id)
+    return rolling is not None and rolling.count > 0 and rolling.count % SUMMARY_INTERVAL == 0
+
+def summarize_and_save_session(user_id: str, session_id: str) -> bool:
+    """
+    Queue the session summary for long-term memory; summary_worker writes it
+    in the background. The checkpoint is the session's interaction count, so
+    ending a session again only writes a new summary once it has new turns.
+    A session this container has not seen is seeded from its stored interactions.
+    Returns False if this checkpoint was already queued or written.
+    """
+    rolling = session_summaries.seed(session_id, lambda: memory.get_session_interactions(session_id))
+    if rolling is None or not rolling.count:
+        return False
+    return summary_worker.enqueue(user_id, session_id, rolling.count, rolling.summary())
+
+def save_session_summary(job: SummaryJob):
+    """Write one queued summary to long-term memory (runs on summary_worker)."""
+    summary = job.summary
+    if summary is None:
+        # Only jobs spooled before every checkpoint carried its summary
+        summary = create_session_summary(memory.get_session_interactions(job.session_id))
     
-    # Save to long-term memory
     memory.save_long_term_memory(
-        user_id=user_id,
+        user_id=job.user_id,
         content=summary,
-        metadata={"session_id": session_id, "timestamp": datetime.now().isoformat()}
+        metadata={"session_id": job.session_id, "checkpoint": job.checkpoint, "timestamp": datetime.now().isoformat()}
     )
 
+# Summaries and long-term writes run off the request path (spooled to /tmp, replayed after a freeze)
+summary_worker = SummaryWorker(
+    write=save_session_summary,
+    spool_path=os.environ.get('SUMMARY_SPOOL_PATH', '/tmp/summary_spool.db'),
+    max_queue=int(os.environ.get('SUMMARY_QUEUE_SIZE', 1000)),
+    max_attempts=int(os.environ.get('SUMMARY_MAX_ATTEMPTS', 3))
+)
+
 def create_session_summary(interactions: list) -> str:
-    """Create concise session summary."""
-    if not interactions:
-        return "No interactions in session"
-    
-    themes = set()
-    verses = set()
-    key_points = []
-    
-    for interaction in interactions:
-        metadata = interaction.get('metadata', {})
-        themes.update(metadata.get('spiritual_themes', []))
-        verses.update(metadata.get('verses_shared', []))
-        
-        # Extract key points from user input
-        user_input = interaction.get('user_input', '')
-        if len(user_input) > 50:  # Significant input
-            key_points.append(user_input[:100] + "..." if len(user_input) > 100 else user_input)
-    
-    summary_parts = []
-    if themes:
-        summary_parts.append(f"Themes: {', '.join(list(themes)[:3])}")
-    if verses:
-        summary_parts.append(f"Verses: {', '.join(list(verses)[:3])}")
-    if key_points:
-        summary_parts.append(f"Key discussion: {key_points[0]}")
-    
-    return " | ".join(summary_parts)
+    """Create concise session summary, themes ranked by frequency."""
+    return summarize_interactions(interactions).summary()
+
+def generate_spiritual_response(prompt: str, session_id: str = None, route: str = "companion",
+                                cache_prefix: str = None, usage: dict = None) -> str:
+    """
+    Generate spiritual response using the LLM backend configured for the route.
+    cache_prefix is the prompt's stable prefix; usage receives the provider's token counts.
+    """
+    return get_backend_for_route(route).generate(prompt, session_id, cache_prefix, usage)
+
+def stream_spiritual_response(prompt: str, session_id: str = None, route: str = "companion",
+                              cache_prefix: str = None, usage: dict = None):
+    """Yield the spiritual response in chunks as the LLM produces them."""
+    yield from get_backend_for_route(route).stream(prompt, session_id, cache_prefix, usage)
 
-def generate_spiritual_response(prompt: str) -> str:
-    """Generate spiritual response using LLM."""
-    # Placeholder - integrate with your preferred LLM
-    return "I'm here to walk with you in faith. Let me share some thoughts and a relevant Bible verse..."
+# Warm the lookup maps at cold start
+load_lookup_tables()
 
 if __name__ == "__main__":
     # Test the agent
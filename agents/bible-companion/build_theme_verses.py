@@ -0,0 +1,118 @@
+"""
+Build theme_verses.json, the theme -> ranked verse index used to suggest
+scripture in build_contextual_prompt.
+
+    python agents/bible-companion/build_theme_verses.py [--version KJV]
+
+Each theme in themes.DEFAULT_LEXICON gets its curated verses first, in the
+order listed below. Themes with fewer than MAX_PER_THEME curated verses are
+topped up with the best BM25 matches for the theme's scripture vocabulary in
+the packaged corpus, keeping only matches on several theme words. The file is written to the
+repository root with the other shared modules; bundles copy it at build time.
+"""
+import argparse
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+sys.path.insert(1, ROOT)
+
+from bible_references import format_reference, ordinal_range, parse_reference  # noqa: E402
+from themes import DEFAULT_LEXICON  # noqa: E402
+from verse_search import get_search_index, tokenize  # noqa: E402
+from verse_vectors import THEME_VOCABULARY  # noqa: E402
+
+MAX_PER_THEME = 8
+# Corpus matches scoring below this fraction of the theme's best match are dropped
+MIN_RELATIVE_SCORE = 0.5
+# ...as are matches on fewer distinct theme words: one common word ("house", "peace") is not a topic
+MIN_MATCHED_TERMS = 2
+
+CURATED = {
+    "prayer": ["Philippians 4:6-7", "Matthew 6:6", "James 5:16", "1 Thessalonians 5:17", "Jeremiah 33:3",
+               "Matthew 7:7", "1 John 5:14", "Romans 8:26"],
+    "faith": ["Hebrews 11:1", "Hebrews 11:6", "Mark 9:24", "Romans 10:17", "Ephesians 2:8-9", "2 Corinthians 5:7",
+              "Matthew 17:20", "James 1:6"],
+    "forgiveness": ["1 John 1:9", "Ephesians 4:32", "Colossians 3:13", "Psalm 103:12", "Matthew 6:14-15",
+                    "Isaiah 1:18", "Micah 7:18-19", "Luke 6:37"],
+    "love": ["1 Corinthians 13:4-7", "John 3:16", "Romans 8:38-39", "1 John 4:8", "John 13:34-35", "1 John 4:19",
+             "Romans 5:8", "1 Peter 4:8"],
+    "hope": ["Jeremiah 29:11", "Romans 15:13", "Isaiah 40:31", "Lamentations 3:22-23", "Romans 5:3-5",
+             "Hebrews 6:19", "Psalm 42:5", "Romans 8:24-25"],
+    "trust": ["Proverbs 3:5-6", "Psalm 56:3", "Isaiah 26:3", "Psalm 46:1", "Psalm 37:5", "Nahum 1:7",
+              "Jeremiah 17:7-8", "Psalm 9:10"],
+    "family": ["Joshua 24:15", "Ephesians 6:1-4", "Psalm 127:3", "Colossians 3:18-21", "Proverbs 22:6",
+               "Exodus 20:12", "Deuteronomy 6:6-7", "1 Timothy 5:8"],
+    "relationships": ["Proverbs 17:17", "Ecclesiastes 4:9-10", "John 15:13", "Romans 12:10", "Proverbs 27:17",
+                      "Proverbs 18:24", "1 Peter 3:8", "Philippians 2:3-4"],
+    "work": ["Colossians 3:23", "Proverbs 16:3", "Matthew 11:28-30", "Galatians 6:9", "Proverbs 14:23",
+             "Ecclesiastes 9:10", "2 Thessalonians 3:10", "Psalm 90:17"],
+    "anxiety": ["Philippians 4:6-7", "1 Peter 5:7", "Matthew 6:34", "Isaiah 41:10", "John 14:27", "Psalm 55:22",
+                "Psalm 94:19", "Matthew 6:25-27"],
+    "depression": ["Psalm 34:18", "Psalm 42:11", "Matthew 5:4", "2 Corinthians 1:3-4", "Psalm 147:3",
+                   "Psalm 40:1-2", "Isaiah 61:3", "Psalm 30:5"],
+    "gratitude": ["1 Thessalonians 5:18", "Psalm 100:4", "Psalm 107:1", "Colossians 3:17", "Psalm 136:1",
+                  "Ephesians 5:20", "Psalm 9:1", "James 1:17"],
+    "worship": ["Psalm 95:6", "John 4:24", "Romans 12:1", "Psalm 150:6", "Psalm 29:2", "Psalm 100:1-2",
+                "Hebrews 13:15", "Revelation 4:11"],
+    "service": ["Mark 10:45", "Galatians 5:13", "1 Peter 4:10", "Matthew 25:40", "John 13:14-15", "Hebrews 6:10",
+                "Galatians 6:2", "Romans 12:11"],
+    "community": ["Hebrews 10:24-25", "Acts 2:42", "1 Corinthians 12:27", "Romans 12:4-5", "Psalm 133:1",
+                  "Matthew 18:20", "Acts 2:44-47", "1 Thessalonians 5:11"],
+}
+
+
+def build(version: str = None) -> dict:
+    index = get_search_index(version)
+    if index is None:
+        print("No search index packaged; using curated verses only")
+
+    themes = {}
+    for theme in DEFAULT_LEXICON:
+        ranked = []
+        covered = set()
+        for reference_text in CURATED.get(theme, ()):
+            reference = parse_reference(reference_text)
+            if reference is None:
+                raise ValueError(f"Invalid curated reference for {theme}: {reference_text!r}")
+            if format_reference(reference) not in ranked:
+                ranked.append(format_reference(reference))
+                covered.update(range(*ordinal_range(reference)))
+        if index is not None and theme in THEME_VOCABULARY:
+            vocabulary = set(tokenize(THEME_VOCABULARY[theme]))
+            hits = index.search(THEME_VOCABULARY[theme], MAX_PER_THEME)
+            for doc, score in hits:
+                # Skip verses already inside a curated passage
+                if score < hits[0][1] * MIN_RELATIVE_SCORE or index.doc_ordinals[doc] in covered:
+                    continue
+                text = index.store.get_ordinal(index.doc_ordinals[doc])
+                if len(vocabulary & set(tokenize(text))) < MIN_MATCHED_TERMS:
+                    continue
+                if len(ranked) < MAX_PER_THEME:
+                    ranked.append(index.reference(doc))
+        themes[theme] = ranked[:MAX_PER_THEME]
+
+    return {"version": index.store.version if index is not None else None, "themes": themes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the theme -> verse suggestion index")
+    parser.add_argument("--version", help="corpus translation to rank (default: packaged default)")
+    parser.add_argument("--output", action="append",
+                        help="output path (repeatable; default: theme_verses.json at the repo root)")
+    args = parser.parse_args()
+
+    data = build(args.version)
+    outputs = args.output or [os.path.join(ROOT, 'theme_verses.json')]
+    for path in outputs:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, ensure_ascii=False)
+            f.write("\n")
+        print(f"Wrote {path}: {len(data['themes'])} themes")
+
+
+if __name__ == "__main__":
+    main()
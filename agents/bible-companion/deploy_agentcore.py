@@ -1,6 +1,10 @@
+# Shared modules are copied in from the repo root first: make -C agents/bible-companion shared
 from bedrock_agentcore.runtime import Runtime
 from bedrock_agentcore.memory import MemoryConfig
 from agentcore_runtime import bible_companion
+from verse_search import get_search_index
+from verse_vectors import get_vector_index
+from verse_store import available_versions
 
 # AgentCore Runtime configuration
 runtime_config = {
@@ -35,10 +39,37 @@ runtime.register_agent(bible_companion)
 
 # Optional: Add MCP tools
 @runtime.mcp_tool("bible_search")
-def bible_search(query: str, version: str = "NIV") -> dict:
-    """Search Bible verses by topic or keyword."""
-    # Integrate with Bible API
-    return {"verses": [], "query": query}
+def bible_search(query: str, version: str = "NIV", book: str = None, testament: str = None,
+                 limit: int = 10) -> dict:
+    """
+    Search Bible verses by topic or keyword. "Quoted words" match as a
+    phrase; book ("Psalms", "Rom") and testament ("OT"/"NT") narrow results.
+    """
+    index = get_search_index(version)
+    if index is None:
+        return {"verses": [], "query": query, "error": "Search index not available"}
+    limit = max(1, min(int(limit or 10), 50))
+    return {
+        "verses": index.search_verses(query, limit, book, testament),
+        "query": query,
+        "version": index.store.version
+    }
+
+@runtime.mcp_tool("topical_verses")
+def topical_verses(query: str, version: str = "NIV", limit: int = 5) -> dict:
+    """
+    Verses related to what the user describes ("I'm anxious about work"),
+    ranked by similarity in the local verse vector index.
+    """
+    index = get_vector_index(version)
+    if index is None:
+        return {"verses": [], "query": query, "error": "Vector index not available"}
+    limit = max(1, min(int(limit or 5), 20))
+    return {
+        "verses": index.search_verses(query, limit),
+        "query": query,
+        "version": index.store.version
+    }
 
 @runtime.mcp_tool("daily_verse")
 def daily_verse(date: str = None) -> dict:
@@ -47,6 +78,10 @@ def daily_verse(date: str = None) -> dict:
     return {"verse": "John 3:16", "text": "For God so loved the world..."}
 
 if __name__ == "__main__":
+    # Verse stores are generated, not committed
+    if not available_versions():
+        raise SystemExit("No verse stores in verses/; run python agents/verse-of-the-day/build_verse_store.py first")
+    
     # Deploy to AgentCore Runtime
     runtime.deploy()
     print("Bible Companion deployed to AgentCore Runtime!")
\ No newline at end of file
@@ -3,6 +3,7 @@ import boto3
 import os
 from datetime import datetime, date
 from decimal import Decimal
+from preference_cache import preferences_cache
 
 dynamodb = boto3.resource('dynamodb')
 USER_PREFS_TABLE = os.environ.get('USER_PREFS_TABLE', 'bible-user-preferences')
@@ -66,10 +67,14 @@ def lambda_handler(event, context):
 
 
 def get_user_preferences(user_id: str) -> dict:
-    """Retrieve user preferences from DynamoDB."""
+    """Retrieve user preferences, served from the in-process cache while fresh."""
     if not user_id:
         return {'error': 'userId is required'}
     
+    cached = preferences_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+    
     table = dynamodb.Table(USER_PREFS_TABLE)
     
     try:
@@ -78,7 +83,7 @@ def get_user_preferences(user_id: str) -> dict:
         
         if not item:
             # Return defaults if user not found
-            return {
+            preferences = {
                 'userId': user_id,
                 'firstName': 'Friend',
                 'bibleVersion': 'NIV',
@@ -86,8 +91,10 @@ def get_user_preferences(user_id: str) -> dict:
                 'birthday': None,
                 'avatarName': None
             }
+            preferences_cache.put(user_id, preferences, negative=True)
+            return dict(preferences)
         
-        return {
+        preferences = {
             'userId': item.get('userId'),
             'firstName': item.get('firstName', 'Friend'),
             'bibleVersion': item.get('bibleVersion', 'NIV'),
@@ -95,6 +102,8 @@ def get_user_preferences(user_id: str) -> dict:
             'birthday': item.get('birthday'),
             'avatarName': item.get('avatarName')
         }
+        preferences_cache.put(user_id, preferences)
+        return dict(preferences)
     except Exception as e:
         print(f"Error getting user preferences: {e}")
         return {'error': str(e)}
@@ -1,8 +1,10 @@
+import hashlib
 import json
 import boto3
 import os
 from datetime import datetime, date
 from decimal import Decimal
+from preference_cache import preferences_cache
 
 # Initialize clients
 dynamodb = boto3.resource('dynamodb')
@@ -12,6 +14,9 @@ bedrock_agent = boto3.client('bedrock-agent-runtime')
 USER_PREFS_TABLE = os.environ.get('USER_PREFS_TABLE', 'bible-user-preferences')
 MEMORY_TABLE = os.environ.get('MEMORY_TABLE', 'bible-conversation-memory')
 MEMORY_ID = os.environ.get('MEMORY_ID')  # AgentCore Memory ID
+SUMMARY_QUEUE_URL = os.environ.get('SUMMARY_QUEUE_URL')  # Summaries are written by summary_queue_handler when set
+
+sqs = boto3.client('sqs') if SUMMARY_QUEUE_URL else None
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -107,6 +112,8 @@ def get_enhanced_memory(user_id: str, limit: int = 5) -> dict:
 def save_enhanced_session(summary: dict) -> dict:
     """
     Save session to both DynamoDB and AgentCore Memory.
+    With SUMMARY_QUEUE_URL set the summary is queued and written by
+    summary_queue_handler instead, so the action returns immediately.
     """
     user_id = summary.get('userId')
     session_id = summary.get('sessionId')
@@ -114,6 +121,12 @@ def save_enhanced_session(summary: dict) -> dict:
     if not user_id or not session_id:
         return {'error': 'userId and sessionId are required'}
     
+    if sqs:
+        try:
+            return enqueue_session_summary(summary)
+        except Exception as e:
+            print(f"Error queueing session summary, saving inline: {e}")
+    
     # Save to DynamoDB (existing functionality)
     dynamo_result = save_session_summary(summary)
     
@@ -142,6 +155,132 @@ def save_enhanced_session(summary: dict) -> dict:
     }
 
 
+def summary_checkpoint(summary: dict) -> str:
+    """The caller's checkpoint, or a digest of the summary so a resent summary is the same job."""
+    if summary.get('checkpoint'):
+        return str(summary['checkpoint'])
+    content = json.dumps(summary, sort_keys=True, cls=DecimalEncoder)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+def enqueue_session_summary(summary: dict) -> dict:
+    """
+    Send a session summary to the summary queue. On a FIFO queue messages are
+    grouped by session and deduplicated per (session, checkpoint).
+    """
+    session_id = summary['sessionId']
+    checkpoint = summary_checkpoint(summary)
+    message = {'summary': summary, 'checkpoint': checkpoint, 'timestamp': datetime.utcnow().isoformat()}
+    params = {
+        'QueueUrl': SUMMARY_QUEUE_URL,
+        'MessageBody': json.dumps(message, cls=DecimalEncoder)
+    }
+    if SUMMARY_QUEUE_URL.endswith('.fifo'):
+        params['MessageGroupId'] = session_id
+        params['MessageDeduplicationId'] = hashlib.sha256(f"{session_id}#{checkpoint}".encode('utf-8')).hexdigest()
+    sqs.send_message(**params)
+    return {'queued': True, 'sessionId': session_id, 'checkpoint': checkpoint}
+
+
+def summary_queue_handler(event, context):
+    """
+    SQS consumer for queued session summaries. Failed messages are reported
+    back (batchItemFailures) so only they are redelivered.
+    """
+    failures = []
+    for record in event.get('Records', []):
+        try:
+            message = json.loads(record['body'])
+            result = write_session_summary(message['summary'], message['checkpoint'], message['timestamp'])
+            if 'error' in result:
+                raise RuntimeError(result['error'])
+        except Exception as e:
+            print(f"Error writing queued session summary {record.get('messageId')}: {e}")
+            failures.append({'itemIdentifier': record['messageId']})
+    
+    return {'batchItemFailures': failures}
+
+
+def summary_job_key(user_id: str, session_id: str, checkpoint: str) -> dict:
+    """
+    Key of the idempotency record for one summary job. It shares MEMORY_TABLE
+    but lives under its own partition, so per-user queries never see it.
+    """
+    return {'userId': f"{user_id}#{session_id}#{checkpoint}", 'timestamp': 'summary-job'}
+
+
+def write_session_summary(summary: dict, checkpoint: str, timestamp: str) -> dict:
+    """
+    Write a queued summary to DynamoDB and AgentCore Memory, idempotently.
+    A job record keyed by (user, session, checkpoint) is created with a
+    conditional put and marked complete only after both writes succeed, so a
+    redelivered or resent message is skipped once done and otherwise redoes
+    the writes against the summary item the first delivery chose. Only a
+    failure of the final update after put_memory succeeded can repeat the
+    long-term write.
+    """
+    user_id = summary.get('userId')
+    session_id = summary.get('sessionId')
+    
+    if not user_id or not session_id:
+        return {'error': 'userId and sessionId are required'}
+    
+    table = dynamodb.Table(MEMORY_TABLE)
+    job_key = summary_job_key(user_id, session_id, checkpoint)
+    try:
+        table.put_item(
+            Item={**job_key, 'summaryTimestamp': timestamp, 'status': 'pending'},
+            ConditionExpression='attribute_not_exists(userId)'
+        )
+    except Exception as e:
+        if _error_code(e) != 'ConditionalCheckFailedException':
+            return {'error': str(e)}
+        job = table.get_item(Key=job_key, ConsistentRead=True).get('Item', {})
+        if job.get('status') == 'complete':
+            return {'success': True, 'duplicate': True, 'id': f"{user_id}#{session_id}"}
+        # An earlier delivery failed part way; rewrite the same summary item
+        timestamp = job.get('summaryTimestamp', timestamp)
+    
+    item = {
+        'userId': user_id,
+        'timestamp': timestamp,
+        'id': f"{user_id}#{session_id}",
+        'sessionId': session_id,
+        'checkpoint': checkpoint,
+        'keyPoints': summary.get('keyPoints', []),
+        'spiritualThemes': summary.get('spiritualThemes', []),
+        'versesShared': summary.get('versesShared', []),
+        'reflectionQuestions': summary.get('reflectionQuestions', []),
+        'nextSteps': summary.get('nextSteps', []),
+        'userSentiment': summary.get('userSentiment', 'neutral')
+    }
+    
+    try:
+        table.put_item(Item=item)
+        if MEMORY_ID:
+            bedrock_agent.put_memory(
+                memoryId=MEMORY_ID,
+                memoryType='LONG_TERM',
+                userId=user_id,
+                content=create_memory_content(summary)
+            )
+        table.update_item(
+            Key=job_key,
+            UpdateExpression='SET #status = :complete',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':complete': 'complete'}
+        )
+    except Exception as e:
+        return {'error': str(e)}
+    
+    return {'success': True, 'id': item['id']}
+
+
+def _error_code(error: Exception) -> str:
+    """botocore ClientError code, if any."""
+    return getattr(error, 'response', {}).get('Error', {}).get('Code', '')
+
+
 def retrieve_agentcore_memory(user_id: str, query: str = '') -> dict:
     """
     Retrieve specific memories from AgentCore based on query.
@@ -200,10 +339,14 @@ def create_memory_content(summary: dict) -> str:
 
 # Existing functions (unchanged)
 def get_user_preferences(user_id: str) -> dict:
-    """Retrieve user preferences from DynamoDB."""
+    """Retrieve user preferences, served from the in-process cache while fresh."""
     if not user_id:
         return {'error': 'userId is required'}
     
+    cached = preferences_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+    
     table = dynamodb.Table(USER_PREFS_TABLE)
     
     try:
@@ -211,7 +354,7 @@ def get_user_preferences(user_id: str) -> dict:
         item = response.get('Item')
         
         if not item:
-            return {
+            preferences = {
                 'userId': user_id,
                 'firstName': 'Friend',
                 'bibleVersion': 'NIV',
@@ -219,8 +362,10 @@ def get_user_preferences(user_id: str) -> dict:
                 'birthday': None,
                 'avatarName': None
             }
+            preferences_cache.put(user_id, preferences, negative=True)
+            return dict(preferences)
         
-        return {
+        preferences = {
             'userId': item.get('userId'),
             'firstName': item.get('firstName', 'Friend'),
             'bibleVersion': item.get('bibleVersion', 'NIV'),
@@ -228,6 +373,8 @@ def get_user_preferences(user_id: str) -> dict:
             'birthday': item.get('birthday'),
             'avatarName': item.get('avatarName')
         }
+        preferences_cache.put(user_id, preferences)
+        return dict(preferences)
     except Exception as e:
         print(f"Error getting user preferences: {e}")
         return {'error': str(e)}
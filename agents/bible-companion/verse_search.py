@@ -0,0 +1,288 @@
+"""
+Keyword search over the verse corpus: a prebuilt inverted index with BM25
+ranking, "quoted phrase" queries and a book/testament filter.
+
+The index is built offline from a verse store (verses/<VERSION>.bvs) and
+written next to it as verses/<VERSION>.bsi:
+
+    magic     4 bytes   b"BSI1"
+    header    uint32 x 5: docs, terms, postings, positions, vocab bytes
+    docs      uint32[docs]      canon ordinal of each indexed verse
+    lengths   uint16[docs]      tokens per verse
+    books     uint8[docs]       book id per verse (for filters)
+    starts    uint32[terms + 1] first posting of each term
+    postings  uint32[postings]  doc index
+    tfs       uint16[postings]  term frequency
+    impacts   float32[postings] BM25 term weight tf*(k1+1)/(tf+k1*norm), idf excluded
+    pstarts   uint32[postings + 1] first position of each posting
+    positions uint16[positions] token positions
+    vocab     UTF-8, sorted terms joined by "\\n"
+
+Loading reads the file once and casts the arrays in place, so cold start
+only pays for building the vocabulary dict. Per-posting BM25 weights are
+precomputed at build time; a query multiplies them by the term's idf and
+sums per verse.
+
+    python verse_search.py build verses/KJV.bvs
+"""
+import array
+import heapq
+import math
+import os
+import re
+import struct
+import sys
+from bible_references import TOTAL_VERSES, format_reference, lookup_book, make_reference, ordinal_to_verse
+from verse_store import VERSE_STORE_DIR, get_store
+
+MAGIC = b"BSI1"
+_HEADER = struct.Struct("<4s5I")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+_PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+# Light suffix stripping; covers the archaic forms ("loveth", "believest")
+_SUFFIXES = ("eth", "est", "ing", "ed", "es", "s")
+OLD_TESTAMENT_BOOKS = 39
+
+
+def stem(word: str) -> str:
+    """A word and its inflections share one stem: love, loved, loveth -> lov; sin, sinned -> sin."""
+    word = word.replace("'", "")
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            word = word[:-len(suffix)]
+            break
+    # As Porter step 5: drop a final "e" and undouble a final consonant (except ll, ss, zz)
+    if len(word) > 3 and word.endswith("e"):
+        return word[:-1]
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "aeiouslz":
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list:
+    return [stem(word) for word in _WORD_PATTERN.findall(text.lower().replace("’", "'"))]
+
+
+def _typed(data: memoryview, offset: int, typecode: str, count: int):
+    size = array.array(typecode).itemsize * count
+    view = data[offset:offset + size]
+    if sys.byteorder != 'little':
+        values = array.array(typecode, view.tobytes())
+        values.byteswap()
+        return values, offset + size
+    return view.cast(typecode), offset + size
+
+
+class VerseSearchIndex:
+    def __init__(self, path: str, store=None):
+        with open(path, 'rb') as f:
+            data = memoryview(f.read())
+        magic, docs, terms, postings, positions, vocab_bytes = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a verse search index")
+        offset = _HEADER.size
+        self.doc_ordinals, offset = _typed(data, offset, 'I', docs)
+        self.doc_lengths, offset = _typed(data, offset, 'H', docs)
+        self.doc_books, offset = _typed(data, offset, 'B', docs)
+        self.term_starts, offset = _typed(data, offset, 'I', terms + 1)
+        self.postings, offset = _typed(data, offset, 'I', postings)
+        self.tfs, offset = _typed(data, offset, 'H', postings)
+        self.impacts, offset = _typed(data, offset, 'f', postings)
+        self.position_starts, offset = _typed(data, offset, 'I', postings + 1)
+        self.positions, offset = _typed(data, offset, 'H', positions)
+        vocab = str(data[offset:offset + vocab_bytes], 'utf-8').split("\n") if vocab_bytes else []
+        self.terms = {term: index for index, term in enumerate(vocab)}
+
+        self.store = store
+        self.doc_count = docs
+
+    def _idf(self, term_index: int) -> float:
+        df = self.term_starts[term_index + 1] - self.term_starts[term_index]
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def _phrase_docs(self, term_indexes: list) -> set:
+        """Doc indexes where the terms occur at consecutive positions."""
+        if not term_indexes:
+            return set()
+        candidates = None
+        per_term = []
+        for term_index in term_indexes:
+            span = range(self.term_starts[term_index], self.term_starts[term_index + 1])
+            by_doc = {self.postings[posting]: posting for posting in span}
+            per_term.append(by_doc)
+            candidates = set(by_doc) if candidates is None else candidates & by_doc.keys()
+            if not candidates:
+                return set()
+
+        matches = set()
+        for doc in candidates:
+            starts = None
+            for offset, by_doc in enumerate(per_term):
+                posting = by_doc[doc]
+                found = {position - offset for position in
+                         self.positions[self.position_starts[posting]:self.position_starts[posting + 1]]}
+                starts = found if starts is None else starts & found
+                if not starts:
+                    break
+            if starts:
+                matches.add(doc)
+        return matches
+
+    def search(self, query: str, limit: int = 10, book: str = None, testament: str = None) -> list:
+        """
+        BM25-ranked (doc index, score) pairs. Quoted parts of the query must
+        appear as exact phrases; book is any name or abbreviation, testament
+        is "OT" or "NT".
+        """
+        phrases = [tokenize(phrase) for phrase in _PHRASE_PATTERN.findall(query)]
+        words = tokenize(_PHRASE_PATTERN.sub(" ", query))
+        query_terms = []
+        for token in words + [token for phrase in phrases for token in phrase]:
+            term_index = self.terms.get(token)
+            if term_index is not None and term_index not in query_terms:
+                query_terms.append(term_index)
+
+        required = None
+        for phrase in phrases:
+            term_indexes = [self.terms.get(token) for token in phrase]
+            if None in term_indexes:
+                return []
+            docs = self._phrase_docs(term_indexes)
+            required = docs if required is None else required & docs
+            if not required:
+                return []
+
+        book_id = None
+        if book:
+            found = lookup_book(book)
+            if found is None:
+                return []
+            book_id = found.id
+        testament = testament.upper() if testament else None
+
+        scores = {}
+        get = scores.get
+        for term_index in query_terms:
+            idf = self._idf(term_index)
+            start, stop = self.term_starts[term_index], self.term_starts[term_index + 1]
+            for doc, impact in zip(self.postings[start:stop], self.impacts[start:stop]):
+                if required is None or doc in required:
+                    scores[doc] = get(doc, 0.0) + idf * impact
+
+        def allowed(doc: int) -> bool:
+            doc_book = self.doc_books[doc]
+            if book_id is not None and doc_book != book_id:
+                return False
+            if testament == "OT" and doc_book > OLD_TESTAMENT_BOOKS:
+                return False
+            if testament == "NT" and doc_book <= OLD_TESTAMENT_BOOKS:
+                return False
+            return True
+
+        candidates = ((doc, score) for doc, score in scores.items() if allowed(doc))
+        return heapq.nlargest(limit, candidates, key=lambda item: item[1])
+
+    def reference(self, doc: int) -> str:
+        return format_reference(make_reference(*ordinal_to_verse(self.doc_ordinals[doc])))
+
+    def search_verses(self, query: str, limit: int = 10, book: str = None, testament: str = None) -> list:
+        """Search results with canonical reference and verse text."""
+        results = []
+        for doc, score in self.search(query, limit, book, testament):
+            ordinal = self.doc_ordinals[doc]
+            results.append({
+                "reference": self.reference(doc),
+                "text": self.store.get_ordinal(ordinal) if self.store else None,
+                "score": round(score, 4)
+            })
+        return results
+
+
+def build_index(store, path: str):
+    """Write the inverted index for every verse present in a VerseStore."""
+    postings_by_term = {}
+    doc_ordinals = array.array('I')
+    doc_lengths = array.array('H')
+    doc_books = array.array('B')
+    for ordinal in range(TOTAL_VERSES):
+        text = store.get_ordinal(ordinal)
+        if not text:
+            continue
+        doc = len(doc_ordinals)
+        tokens = tokenize(text)
+        doc_ordinals.append(ordinal)
+        doc_lengths.append(len(tokens))
+        doc_books.append(ordinal_to_verse(ordinal)[0])
+        positions_by_term = {}
+        for position, token in enumerate(tokens):
+            positions_by_term.setdefault(token, []).append(position)
+        for token, token_positions in positions_by_term.items():
+            postings_by_term.setdefault(token, []).append((doc, token_positions))
+
+    average_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 1.0
+    vocab = sorted(postings_by_term)
+    term_starts = array.array('I', [0])
+    postings = array.array('I')
+    tfs = array.array('H')
+    impacts = array.array('f')
+    position_starts = array.array('I', [0])
+    positions = array.array('H')
+    for term in vocab:
+        for doc, token_positions in postings_by_term[term]:
+            postings.append(doc)
+            tf = len(token_positions)
+            tfs.append(tf)
+            impacts.append(tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc_lengths[doc] / average_length)))
+            positions.extend(token_positions)
+            position_starts.append(len(positions))
+        term_starts.append(len(postings))
+
+    vocab_blob = "\n".join(vocab).encode('utf-8')
+    arrays = (doc_ordinals, doc_lengths, doc_books, term_starts, postings, tfs, impacts, position_starts,
+              positions)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(doc_ordinals), len(vocab), len(postings), len(positions),
+                             len(vocab_blob)))
+        for values in arrays:
+            if sys.byteorder != 'little':
+                values = array.array(values.typecode, values)
+                values.byteswap()
+            f.write(values.tobytes())
+        f.write(vocab_blob)
+    os.replace(temp_path, path)
+    return len(doc_ordinals), len(vocab)
+
+
+_indexes = {}
+
+
+def get_search_index(version: str = None):
+    """Search index for a translation's store (cached), or None if not packaged."""
+    store = get_store(version)
+    if store is None:
+        return None
+    index = _indexes.get(store.version)
+    if index is None:
+        path = os.path.join(VERSE_STORE_DIR, f"{store.version}.bsi")
+        try:
+            index = _indexes[store.version] = VerseSearchIndex(path, store)
+        except Exception as e:
+            print(f"Error loading search index {path}: {e}")
+            return None
+    return index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "build":
+        sys.exit("usage: python verse_search.py build verses/<VERSION>.bvs")
+    from verse_store import VerseStore
+    source = VerseStore(sys.argv[2])
+    output = os.path.splitext(sys.argv[2])[0] + ".bsi"
+    docs, terms = build_index(source, output)
+    print(f"Wrote {output}: {docs} verses, {terms} terms, {os.path.getsize(output)} bytes")
@@ -0,0 +1,244 @@
+"""
+Local vector index for topical verse retrieval.
+
+Verses are embedded as TF-IDF vectors over the corpus vocabulary (one
+dimension per stemmed term, so unrelated words never share a dimension)
+and stored L2-normalized as a sparse, term-major matrix in
+verses/<VERSION>.bvx:
+
+    magic    4 bytes   b"BVX2"
+    header   uint32 x 4: docs, terms, postings, vocab bytes
+    docs     uint32[docs]         canon ordinal of each verse
+    idf      float32[terms]       inverse document frequency per term
+    starts   uint32[terms + 1]    first posting of each term
+    postings uint32[postings]     doc index
+    weights  float32[postings]    the term's weight in the normalized verse vector
+    vocab    UTF-8, sorted terms joined by "\\n"
+
+A query touches only its own terms: top-k is a scatter-add of those terms'
+posting weights (cosine similarity, since both sides are normalized),
+followed by argpartition.
+
+Modern wording rarely shares words with the KJV ("anxiety" vs. "be careful
+for nothing"), so query words that belong to a theme in themes.py are
+expanded with that theme's scripture vocabulary before embedding.
+
+    python verse_vectors.py build verses/KJV.bvs
+"""
+import math
+import os
+import re
+import struct
+import sys
+import numpy as np
+from bible_references import TOTAL_VERSES, format_reference, make_reference, ordinal_to_verse
+from themes import theme_extractor
+from verse_search import tokenize
+from verse_store import VERSE_STORE_DIR, get_store
+
+MAGIC = b"BVX2"
+_HEADER = struct.Struct("<4s4I")
+
+# Weight of the scripture vocabulary added for each theme word in a query
+EXPANSION_WEIGHT = 0.5
+
+# theme (as in themes.DEFAULT_LEXICON) -> how scripture talks about it
+THEME_VOCABULARY = {
+    "prayer": "pray prayer supplication ask seek knock cry call hear answer",
+    "faith": "faith believe believeth trust sure hope unseen",
+    "forgiveness": "forgive forgiven forgiveness mercy merciful pardon iniquity transgression sin cleanse",
+    "love": "love loveth charity beloved kindness",
+    "hope": "hope wait renew promise future expected end",
+    "trust": "trust lean understanding rely refuge fortress rock",
+    "family": "father mother children son daughter house household honour",
+    "relationships": "friend brother neighbour companion one another",
+    "work": "labour work hands diligent heart unto lord reward",
+    "anxiety": "careful care cast burden fear afraid troubled peace rest thought morrow",
+    "depression": "broken heart sorrow weeping mourn comfort cast down soul strength",
+    "gratitude": "thanks thanksgiving give thanks grateful bless blessed",
+    "worship": "praise worship glory sing magnify holy",
+    "service": "serve servant minister gifts good works",
+    "community": "church fellowship together assembling body members one another",
+}
+
+_WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+# Function words carry no topic; dropping them keeps "I", "my", "the" from deciding matches
+STOPWORDS = frozenset(tokenize(
+    "a about all also am an and any are as at be but by can could did do does for from had has have he "
+    "her him his how i if im in into is it its ive let me my no not now of on or our out shall she so "
+    "that the thee their them then there these they thou thy this those thus to unto up upon us was we "
+    "were what when which who whom why will with would ye yet you your"))
+
+
+def _features(tokens, counts: dict, weight: float = 1.0):
+    for token in tokens:
+        if token not in STOPWORDS:
+            counts[token] = counts.get(token, 0.0) + weight
+
+
+class VerseVectorIndex:
+    def __init__(self, path: str, store=None):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, docs, terms, postings, vocab_bytes = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a verse vector index")
+        offset = _HEADER.size
+        self.doc_ordinals = np.frombuffer(data, '<u4', docs, offset)
+        offset += 4 * docs
+        self.idf = np.frombuffer(data, '<f4', terms, offset)
+        offset += 4 * terms
+        self.term_starts = np.frombuffer(data, '<u4', terms + 1, offset)
+        offset += 4 * (terms + 1)
+        self.postings = np.frombuffer(data, '<u4', postings, offset)
+        offset += 4 * postings
+        self.weights = np.frombuffer(data, '<f4', postings, offset)
+        offset += 4 * postings
+        vocab = data[offset:offset + vocab_bytes].decode('utf-8').split("\n") if vocab_bytes else []
+        self.terms = {term: index for index, term in enumerate(vocab)}
+        self.doc_count = docs
+        self.store = store
+        self._theme_vocabulary = {theme: tokenize(words) for theme, words in THEME_VOCABULARY.items()}
+
+    def _query_counts(self, text: str) -> dict:
+        counts = {}
+        _features(tokenize(text), counts)
+        for word in _WORD_PATTERN.findall(text.lower().replace("’", "'")):
+            hit = theme_extractor.lookup(word.partition("'")[0])
+            if hit is not None:
+                _features(self._theme_vocabulary.get(hit[0], ()), counts, EXPANSION_WEIGHT * hit[1])
+        return counts
+
+    def embed(self, text: str) -> dict:
+        """{term index: weight}, L2-normalized; words outside the corpus vocabulary are dropped."""
+        counts = {}
+        for token, count in self._query_counts(text or "").items():
+            index = self.terms.get(token)
+            if index is not None:
+                counts[index] = count
+        return embed_counts(counts, self.idf)
+
+    def scores(self, text: str) -> np.ndarray:
+        """Cosine similarity of the query with every verse."""
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        for index, weight in self.embed(text).items():
+            start, end = self.term_starts[index], self.term_starts[index + 1]
+            # A term has at most one posting per verse, so plain fancy-index += is exact
+            scores[self.postings[start:end]] += weight * self.weights[start:end]
+        return scores
+
+    def search(self, query: str, limit: int = 5) -> list:
+        """Top-k (doc index, cosine score)."""
+        scores = self.scores(query)
+        limit = min(limit, scores.shape[0])
+        if limit <= 0:
+            return []
+        candidates = np.argpartition(-scores, limit - 1)[:limit]
+        ranked = candidates[np.argsort(-scores[candidates])]
+        return [(int(doc), float(scores[doc])) for doc in ranked if scores[doc] > 0]
+
+    def search_batch(self, queries: list, limit: int = 5) -> list:
+        return [self.search(query, limit) for query in queries]
+
+    def _verses(self, hits: list) -> list:
+        results = []
+        for doc, score in hits:
+            ordinal = int(self.doc_ordinals[doc])
+            results.append({
+                "reference": format_reference(make_reference(*ordinal_to_verse(ordinal))),
+                "text": self.store.get_ordinal(ordinal) if self.store else None,
+                "score": round(score, 4)
+            })
+        return results
+
+    def search_verses(self, query: str, limit: int = 5) -> list:
+        return self._verses(self.search(query, limit))
+
+    def search_verses_batch(self, queries: list, limit: int = 5) -> list:
+        return [self._verses(hits) for hits in self.search_batch(queries, limit)]
+
+
+def embed_counts(counts: dict, idf) -> dict:
+    """{term index: count} -> {term index: weight} with sublinear tf, idf and L2 normalization."""
+    vector = {index: (1.0 + math.log(count) if count >= 1 else count) * float(idf[index])
+              for index, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    if norm:
+        vector = {index: weight / norm for index, weight in vector.items()}
+    return vector
+
+
+def build_index(store, path: str):
+    """Write the vector index for every verse present in a VerseStore."""
+    ordinals = []
+    verse_counts = []
+    for ordinal in range(TOTAL_VERSES):
+        text = store.get_ordinal(ordinal)
+        if text:
+            counts = {}
+            _features(tokenize(text), counts)
+            ordinals.append(ordinal)
+            verse_counts.append(counts)
+
+    docs = len(ordinals)
+    vocab = sorted({token for counts in verse_counts for token in counts})
+    term_index = {term: index for index, term in enumerate(vocab)}
+    document_frequency = np.zeros(len(vocab), dtype=np.float64)
+    for counts in verse_counts:
+        for token in counts:
+            document_frequency[term_index[token]] += 1
+    idf = (np.log((1 + docs) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    postings_by_term = [[] for _ in vocab]
+    for doc, counts in enumerate(verse_counts):
+        vector = embed_counts({term_index[token]: count for token, count in counts.items()}, idf)
+        for index, weight in vector.items():
+            postings_by_term[index].append((doc, weight))
+
+    term_starts = np.zeros(len(vocab) + 1, dtype='<u4')
+    term_starts[1:] = np.cumsum([len(postings) for postings in postings_by_term])
+    postings = np.array([doc for entries in postings_by_term for doc, _ in entries], dtype='<u4')
+    weights = np.array([weight for entries in postings_by_term for _, weight in entries], dtype='<f4')
+    vocab_blob = "\n".join(vocab).encode('utf-8')
+
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, docs, len(vocab), len(postings), len(vocab_blob)))
+        f.write(np.asarray(ordinals, dtype='<u4').tobytes())
+        f.write(idf.astype('<f4').tobytes())
+        f.write(term_starts.tobytes())
+        f.write(postings.tobytes())
+        f.write(weights.tobytes())
+        f.write(vocab_blob)
+    os.replace(temp_path, path)
+    return docs, len(vocab)
+
+
+_indexes = {}
+
+
+def get_vector_index(version: str = None):
+    """Vector index for a translation's store (cached), or None if not packaged."""
+    store = get_store(version)
+    if store is None:
+        return None
+    index = _indexes.get(store.version)
+    if index is None:
+        path = os.path.join(VERSE_STORE_DIR, f"{store.version}.bvx")
+        try:
+            index = _indexes[store.version] = VerseVectorIndex(path, store)
+        except Exception as e:
+            print(f"Error loading vector index {path}: {e}")
+            return None
+    return index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "build":
+        sys.exit("usage: python verse_vectors.py build verses/<VERSION>.bvs")
+    from verse_store import VerseStore
+    source = VerseStore(sys.argv[2])
+    output = os.path.splitext(sys.argv[2])[0] + ".bvx"
+    docs, terms = build_index(source, output)
+    print(f"Wrote {output}: {docs} verses x {terms} terms, {os.path.getsize(output)} bytes")
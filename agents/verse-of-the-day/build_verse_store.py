@@ -0,0 +1,120 @@
+"""
+Build the memory-mapped verse stores from the corpora in corpus/.
+
+    python agents/verse-of-the-day/build_verse_store.py [source ...] [--output-dir DIR ...]
+
+The stores are generated, not committed: run this before deploying. With no
+arguments every corpus in agents/verse-of-the-day/corpus/ is built into
+agents/verse-of-the-day/lambda/verses/ (the Verse of the Day Lambda CodeUri;
+sam build runs it through lambda/Makefile) and agents/bible-companion/verses/,
+where the bible_search and topical_verses indexes (.bsi, .bvx) are rebuilt
+next to each store.
+
+Sources (translation code taken from the file name unless --version is given):
+- .json: {"John 3:16": "For God so loved...", ...}, one verse per key
+- .tsv / .tsv.gz: book<TAB>chapter<TAB>verse<TAB>text per line; book is a
+  name, abbreviation or canonical id (1-66); lines starting with # are skipped
+
+corpus/KJV.tsv.gz is the complete public-domain King James Version. Only
+package translations you are licensed to redistribute; requests for any
+other version fall back to DEFAULT_BIBLE_VERSION (KJV).
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+LAMBDA_DIR = os.path.join(HERE, 'lambda')
+CORPUS_DIR = os.path.join(HERE, 'corpus')
+COMPANION_DIR = os.path.join(os.path.dirname(HERE), 'bible-companion')
+OUTPUT_DIRS = (os.path.join(LAMBDA_DIR, 'verses'), os.path.join(COMPANION_DIR, 'verses'))
+SOURCE_SUFFIXES = (".json", ".tsv", ".tsv.gz")
+# bible_references and verse_store are shared modules at the repo root
+sys.path.insert(0, ROOT)
+
+from bible_references import lookup_book, make_reference, parse_reference, verse_ordinal  # noqa: E402
+from verse_store import VerseStore, write_store  # noqa: E402
+
+
+def load_json(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        source = json.load(f)
+    verses = {}
+    for reference_text, text in source.items():
+        reference = parse_reference(reference_text)
+        if reference is None or reference[1:3] != reference[3:5]:
+            raise ValueError(f"{path}: {reference_text!r} is not a single valid verse")
+        verses[verse_ordinal(*reference[:3])] = text
+    return verses
+
+
+def load_tsv(path: str) -> dict:
+    verses = {}
+    with (gzip.open if path.endswith(".gz") else open)(path, 'rt', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("#"):
+                continue
+            book_text, chapter, verse, text = line.split("\t", 3)
+            book = int(book_text) if book_text.isdigit() else getattr(lookup_book(book_text), 'id', None)
+            reference = make_reference(book or 0, int(chapter), int(verse))
+            if reference is None:
+                raise ValueError(f"{path}:{line_number}: invalid verse {book_text} {chapter}:{verse}")
+            verses[verse_ordinal(*reference[:3])] = text
+    return verses
+
+
+def source_version(path: str) -> str:
+    name = os.path.basename(path)
+    for suffix in SOURCE_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)].upper()
+    return os.path.splitext(name)[0].upper()
+
+
+def build_indexes(path: str):
+    """Rebuild the companion's search and vector indexes next to a store."""
+    if COMPANION_DIR not in sys.path:
+        sys.path.append(COMPANION_DIR)
+    import verse_search
+    import verse_vectors
+    store = VerseStore(path)
+    base = os.path.splitext(path)[0]
+    docs, terms = verse_search.build_index(store, base + ".bsi")
+    print(f"Wrote {base}.bsi: {docs} verses, {terms} terms")
+    docs, terms = verse_vectors.build_index(store, base + ".bvx")
+    print(f"Wrote {base}.bvx: {docs} verses x {terms} terms")
+    store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build memory-mapped verse stores")
+    parser.add_argument("sources", nargs="*", help="JSON or TSV corpus files (default: every corpus in corpus/)")
+    parser.add_argument("--version", help="translation code (default: source file name)")
+    parser.add_argument("--output-dir", action="append", help="repeatable (default: both packaged verses/ dirs)")
+    parser.add_argument("--no-indexes", action="store_true", help="skip the bible-companion search indexes")
+    args = parser.parse_args()
+
+    sources = args.sources or sorted(
+        os.path.join(CORPUS_DIR, name) for name in os.listdir(CORPUS_DIR) if name.endswith(SOURCE_SUFFIXES))
+    if args.version and len(sources) != 1:
+        parser.error("--version needs exactly one source")
+    output_dirs = args.output_dir or OUTPUT_DIRS
+
+    for source in sources:
+        version = (args.version or source_version(source)).upper()
+        verses = load_json(source) if source.endswith(".json") else load_tsv(source)
+        for output_dir in output_dirs:
+            os.makedirs(output_dir, exist_ok=True)
+            path = os.path.join(output_dir, f"{version}.bvs")
+            write_store(path, version, verses)
+            print(f"Wrote {path}: {version}, {len(verses)} verses, {os.path.getsize(path)} bytes")
+            if not args.no_indexes and os.path.abspath(output_dir) == os.path.join(COMPANION_DIR, 'verses'):
+                build_indexes(path)
+
+
+if __name__ == "__main__":
+    main()
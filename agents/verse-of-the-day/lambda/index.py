@@ -3,21 +3,25 @@ import boto3
 import os
 from datetime import datetime, date
 from decimal import Decimal
+from bible_references import parse_reference
+from verse_schedule import VerseScheduleCache, rotation_reference
+from verse_store import get_store, passage_text
 
 dynamodb = boto3.resource('dynamodb')
 VERSES_TABLE = os.environ.get('VERSES_TABLE', 'bible-daily-verses')
+schedule_cache = VerseScheduleCache(dynamodb, VERSES_TABLE)
 
-# KJV Bible verses cache (you can expand this or use an API)
-KJV_VERSES = {
-    "John 3:16": "For God so loved the world, that he gave his only begotten Son, that whosoever believeth in him should not perish, but have everlasting life.",
-    "Psalm 23:1": "The Lord is my shepherd; I shall not want.",
-    "Philippians 4:13": "I can do all things through Christ which strengtheneth me.",
-    "Jeremiah 29:11": "For I know the thoughts that I think toward you, saith the Lord, thoughts of peace, and not of evil, to give you an expected end.",
-    "Romans 8:28": "And we know that all things work together for good to them that love God, to them who are the called according to his purpose.",
-    "Proverbs 3:5-6": "Trust in the Lord with all thine heart; and lean not unto thine own understanding. In all thy ways acknowledge him, and he shall direct thy paths.",
-    "Isaiah 41:10": "Fear thou not; for I am with thee: be not dismayed; for I am thy God: I will strengthen thee; yea, I will help thee; yea, I will uphold thee with the right hand of my righteousness.",
-    "Zephaniah 3:17": "The Lord thy God in the midst of thee is mighty; he will save, he will rejoice over thee with joy; he will rest in his love, he will joy over thee with singing.",
-}
+# Rotation used when no verse is scheduled for a date; texts come from the verse store
+DEFAULT_REFERENCES = [
+    "John 3:16",
+    "Psalm 23:1",
+    "Philippians 4:13",
+    "Jeremiah 29:11",
+    "Romans 8:28",
+    "Proverbs 3:5-6",
+    "Isaiah 41:10",
+    "Zephaniah 3:17",
+]
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -46,7 +50,9 @@ def lambda_handler(event, context):
     if function == 'getVerseOfTheDay':
         result = get_verse_of_the_day(params.get('date'))
     elif function == 'getVerseByReference':
-        result = get_verse_by_reference(params.get('reference'))
+        result = get_verse_by_reference(params.get('reference'), params.get('bibleVersion'))
+    elif function == 'getPassages':
+        result = get_passages(params.get('references'), params.get('bibleVersion'))
     else:
         result = {'error': f'Unknown function: {function}'}
     
@@ -68,17 +74,14 @@ def lambda_handler(event, context):
 
 def get_verse_of_the_day(date_str: str = None) -> dict:
     """
-    Get the scheduled verse(s) for a specific date.
+    Get the scheduled verse(s) for a specific date from the schedule cache.
     Falls back to a default verse if none scheduled.
     """
     if not date_str:
         date_str = date.today().isoformat()
     
-    table = dynamodb.Table(VERSES_TABLE)
-    
     try:
-        response = table.get_item(Key={'date': date_str})
-        item = response.get('Item')
+        item = schedule_cache.get(date_str)
         
         if item:
             return {
@@ -88,49 +91,86 @@ def get_verse_of_the_day(date_str: str = None) -> dict:
             }
         
         # Fallback: return a default verse based on day of year
-        day_of_year = datetime.strptime(date_str, '%Y-%m-%d').timetuple().tm_yday
-        default_verses = list(KJV_VERSES.keys())
-        default_ref = default_verses[day_of_year % len(default_verses)]
-        
         return {
             'date': date_str,
-            'references': [default_ref],
+            'references': [rotation_reference(date_str, DEFAULT_REFERENCES)],
             'theme': None
         }
     except Exception as e:
         print(f"Error getting verse of the day: {e}")
+        try:
+            references = [rotation_reference(date_str, DEFAULT_REFERENCES)]
+        except ValueError:
+            references = ['John 3:16']
         return {
             'date': date_str,
-            'references': ['John 3:16'],
+            'references': references,
             'theme': None
         }
 
 
-def get_verse_by_reference(reference: str) -> dict:
+def get_verse_by_reference(reference: str, bible_version: str = None) -> dict:
     """
-    Get verse text by reference.
-    Uses local cache or external API.
+    Get verse or passage text by reference from the packaged verse store.
+    Supports single verses, ranges ("Proverbs 3:5-6"), cross-chapter ranges
+    ("Romans 8:28-9:2") and whole chapters ("Psalm 23").
+    Uses the user's bibleVersion when that translation is packaged, else KJV.
     """
     if not reference:
         return {'error': 'reference is required'}
     
-    # Normalize reference
-    reference = reference.strip()
+    store = get_store(bible_version)
+    if store is None:
+        return {'error': 'Verse store not available'}
+    
+    return resolve_passage(store, reference)
+
+
+def get_passages(references, bible_version: str = None) -> dict:
+    """
+    Resolve several references in one call (e.g. all passages a devotional cites).
+    references is a list or a JSON array / semicolon-separated string.
+    """
+    if isinstance(references, str):
+        text = references.strip()
+        if text.startswith('['):
+            try:
+                references = json.loads(text)
+            except ValueError:
+                return {'error': 'references must be a JSON array or a semicolon-separated list'}
+        else:
+            references = [part for part in text.split(';') if part.strip()]
+    if not references:
+        return {'error': 'references is required'}
+    
+    store = get_store(bible_version)
+    if store is None:
+        return {'error': 'Verse store not available'}
     
-    # Check local cache first
-    if reference in KJV_VERSES:
+    return {
+        'version': store.version,
+        'passages': [resolve_passage(store, reference) for reference in references]
+    }
+
+
+def resolve_passage(store, reference: str) -> dict:
+    """One passage as a contiguous corpus slice, decoded once."""
+    parsed = parse_reference(reference)
+    if parsed is None:
+        return {'reference': reference, 'error': f'Invalid reference: {reference}'}
+    
+    passage = store.resolve(parsed)
+    if passage.missing == passage.verses:
         return {
-            'reference': reference,
-            'text': KJV_VERSES[reference],
-            'version': 'KJV'
+            'reference': passage.reference,
+            'error': f'{passage.reference} is not in the {store.version} corpus',
+            'version': store.version
         }
     
-    # For production, you would call a Bible API here
-    # Example: api.bible, bible-api.com, etc.
-    
-    # For now, return a placeholder
     return {
-        'reference': reference,
-        'text': f'[Verse text for {reference} - integrate with Bible API]',
-        'version': 'KJV'
+        'reference': passage.reference,
+        'text': passage_text(passage),
+        'version': store.version,
+        'verseCount': passage.verses,
+        'complete': passage.missing == 0
     }
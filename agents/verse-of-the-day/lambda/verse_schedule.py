@@ -0,0 +1,111 @@
+"""
+Process-level cache of the verse-of-the-day schedule.
+
+The scheduled verse for a date is the same for every user, so a warm
+container answers from memory:
+
+- on first use the next PRELOAD_DAYS dates are fetched with BatchGetItem
+  (100 keys per request), including dates with nothing scheduled, which are
+  cached as negative entries;
+- a date outside the window is fetched with get_item once and cached;
+- the whole cache expires when the day changes (Lambda runs in UTC), so
+  schedule edits show up by the next day and the window moves forward.
+
+Dates with no schedule fall back to a local day-of-year rotation without
+touching DynamoDB again.
+"""
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+PRELOAD_DAYS = int(os.environ.get('VERSE_PRELOAD_DAYS', '31'))
+MAX_CACHED_DATES = int(os.environ.get('VERSE_CACHE_MAX_DATES', '1000'))
+BATCH_GET_LIMIT = 100
+BATCH_GET_RETRIES = 3
+# Full-jitter exponential backoff (seconds) before re-requesting UnprocessedKeys
+BATCH_GET_BASE_BACKOFF = 0.05
+BATCH_GET_MAX_BACKOFF = 1.0
+
+
+def rotation_reference(date_str: str, references: list) -> str:
+    """Default reference for a date by day of year."""
+    day_of_year = datetime.strptime(date_str, '%Y-%m-%d').timetuple().tm_yday
+    return references[day_of_year % len(references)]
+
+
+class VerseScheduleCache:
+    def __init__(self, dynamodb, table_name: str, preload_days: int = PRELOAD_DAYS,
+                 max_dates: int = MAX_CACHED_DATES, today=None):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.preload_days = preload_days
+        self.max_dates = max_dates
+        self._today = today or date.today
+
+        # date string -> schedule item, or None when nothing is scheduled
+        self._items = {}
+        self._day = None
+        self._stats = {"hits": 0, "misses": 0, "preloads": 0, "preloaded": 0, "errors": 0}
+
+    def _roll_day(self):
+        """Expire everything at the day boundary and preload the new window."""
+        today = self._today()
+        if today == self._day:
+            return
+        self._items.clear()
+        self._day = today
+        if self.preload_days > 0:
+            dates = [(today + timedelta(days=offset)).isoformat() for offset in range(self.preload_days)]
+            self.preload(dates)
+
+    def preload(self, dates: list):
+        """Fetch dates with BatchGetItem; dates not returned are cached as unscheduled."""
+        self._stats["preloads"] += 1
+        for start in range(0, len(dates), BATCH_GET_LIMIT):
+            chunk = dates[start:start + BATCH_GET_LIMIT]
+            found = {}
+            request = {self.table_name: {'Keys': [{'date': date_str} for date_str in chunk]}}
+            try:
+                for attempt in range(BATCH_GET_RETRIES):
+                    if attempt:
+                        # Unprocessed keys mean throttling: back off before asking again
+                        time.sleep(random.uniform(0, min(BATCH_GET_MAX_BACKOFF, BATCH_GET_BASE_BACKOFF * 2 ** attempt)))
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response.get('Responses', {}).get(self.table_name, []):
+                        found[item['date']] = item
+                    request = response.get('UnprocessedKeys') or {}
+                    if not request:
+                        break
+            except Exception as e:
+                print(f"Error preloading verse schedule: {e}")
+                self._stats["errors"] += 1
+                continue
+            unprocessed = {key['date'] for key in request.get(self.table_name, {}).get('Keys', [])}
+            for date_str in chunk:
+                if date_str not in unprocessed:
+                    self._items[date_str] = found.get(date_str)
+                    self._stats["preloaded"] += 1
+
+    def get(self, date_str: str):
+        """
+        Scheduled item for a date, or None if nothing is scheduled. Raises
+        when DynamoDB fails on a miss; errors are not cached.
+        """
+        self._roll_day()
+        if date_str in self._items:
+            self._stats["hits"] += 1
+            return self._items[date_str]
+
+        self._stats["misses"] += 1
+        try:
+            item = self.dynamodb.Table(self.table_name).get_item(Key={'date': date_str}).get('Item')
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        if len(self._items) < self.max_dates:
+            self._items[date_str] = item
+        return item
+
+    def stats(self) -> dict:
+        return dict(self._stats, size=len(self._items), day=self._day.isoformat() if self._day else None)
@@ -0,0 +1,339 @@
+"""
+Offline latency benchmark for the Bible Companion pipeline.
+
+Drives bible_companion (agentcore_runtime.py) and the Lambda action-group
+handlers against the local stand-ins in stand_ins.py, so no AWS or RDS
+access is needed. Reports p50/p95/p99 latency, throughput at each
+concurrency level and a per-stage breakdown, and writes everything to a
+JSON file so runs can be diffed.
+
+    python benchmarks/bench_companion.py --users 1,8,32 --turns 20 --output bench_results.json
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from stand_ins import (  # noqa: E402
+    FakeAgentCoreClient,
+    FakeDynamoResource,
+    Latency,
+    fake_mysql_connect,
+)
+
+LAMBDA_MODULES = {
+    "bible_companion_lambda": "agents/bible-companion/lambda/index.py",
+    "verse_of_the_day_lambda": "agents/verse-of-the-day/lambda/index.py",
+    "agentcore_memory_lambda": "lambda_agentcore_memory/lambda_function.py",
+}
+
+SAMPLE_MESSAGES = [
+    "I'm struggling with anxiety about work",
+    "Can you share a verse about forgiveness?",
+    "What does John 3:16 mean?",
+    "I feel grateful today, thank you Lord",
+    "How can I pray for my family?",
+]
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(values)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def summarize(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50": round(percentile(ordered, 50), 3),
+        "p95": round(percentile(ordered, 95), 3),
+        "p99": round(percentile(ordered, 99), 3),
+        "max": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+@contextlib.contextmanager
+def stand_ins_installed(latency: Latency, mysql_stats: dict, agentcore: FakeAgentCoreClient,
+                        dynamodb: FakeDynamoResource):
+    """Route boto3 and pymysql to the local stand-ins while modules are imported and run."""
+    import boto3
+    import pymysql
+
+    real_client, real_resource, real_connect = boto3.client, boto3.resource, pymysql.connect
+
+    def client(service_name, *args, **kwargs):
+        if service_name == 'bedrock-agentcore':
+            return agentcore
+        return real_client(service_name, *args, **kwargs)
+
+    def resource(service_name, *args, **kwargs):
+        if service_name == 'dynamodb':
+            return dynamodb
+        return real_resource(service_name, *args, **kwargs)
+
+    boto3.client, boto3.resource = client, resource
+    pymysql.connect = fake_mysql_connect(latency, mysql_stats)
+    try:
+        yield
+    finally:
+        boto3.client, boto3.resource, pymysql.connect = real_client, real_resource, real_connect
+
+
+def load_module(name: str, relative_path: str):
+    """Import a handler module by path; its own directory goes first on sys.path for sibling imports."""
+    path = os.path.join(REPO_ROOT, relative_path)
+    sys.path.insert(0, os.path.dirname(path))
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.path.pop(0)
+
+
+class StageTimer:
+    """Per-thread stage timings for the request currently being measured."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def start_request(self):
+        self._local.stages = {}
+
+    def record(self, stage: str, elapsed_ms: float):
+        stages = getattr(self._local, "stages", None)
+        if stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + elapsed_ms
+
+    def finish_request(self) -> dict:
+        stages, self._local.stages = getattr(self._local, "stages", {}), None
+        return stages
+
+    def wrap(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, (time.perf_counter() - started) * 1000)
+        return timed
+
+    def wrap_stream(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            first = True
+            for chunk in fn(*args, **kwargs):
+                if first:
+                    self.record("first_token", (time.perf_counter() - started) * 1000)
+                    first = False
+                yield chunk
+            self.record(stage, (time.perf_counter() - started) * 1000)
+        return timed
+
+
+def instrument_runtime(runtime, timer: StageTimer):
+    """Wrap each pipeline stage of agentcore_runtime with a timer."""
+    runtime.load_turn_context = timer.wrap("context_load", runtime.load_turn_context)
+    runtime.build_contextual_prompt = timer.wrap("prompt_build", runtime.build_contextual_prompt)
+    runtime.stream_spiritual_response = timer.wrap_stream("generation", runtime.stream_spiritual_response)
+    runtime.save_to_memory = timer.wrap("persistence", runtime.save_to_memory)
+
+
+def run_scenario(name: str, users: int, turns: int, request_fn, timer: StageTimer = None) -> dict:
+    """Run `turns` sequential requests for each of `users` concurrent users."""
+    latencies = []
+    stages = {}
+    errors = 0
+    lock = threading.Lock()
+
+    def user_loop(user_index: int):
+        nonlocal errors
+        for turn in range(turns):
+            if timer:
+                timer.start_request()
+            started = time.perf_counter()
+            try:
+                request_fn(user_index, turn)
+                failed = False
+            except Exception as e:
+                print(f"[{name}] request failed: {e}", file=sys.stderr)
+                failed = True
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            request_stages = timer.finish_request() if timer else {}
+            with lock:
+                if failed:
+                    errors += 1
+                    continue
+                latencies.append(elapsed_ms)
+                for stage, value in request_stages.items():
+                    stages.setdefault(stage, []).append(value)
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(user_loop, range(users)))
+    wall_seconds = time.perf_counter() - wall_started
+
+    return {
+        "scenario": name,
+        "users": users,
+        "turns_per_user": turns,
+        "requests": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+        "latency_ms": summarize(latencies),
+        "stages_ms": {stage: summarize(values) for stage, values in sorted(stages.items())},
+    }
+
+
+def companion_request(runtime, run_id: str):
+    def request(user_index: int, turn: int):
+        runtime.bible_companion(
+            SAMPLE_MESSAGES[turn % len(SAMPLE_MESSAGES)],
+            user_id=f"bench-user-{user_index:04d}",
+            session_id=f"bench-{run_id}-{user_index:04d}",
+        )
+    return request
+
+
+def action_event(function: str, **params) -> dict:
+    return {
+        "actionGroup": "bench",
+        "function": function,
+        "parameters": [{"name": k, "value": v} for k, v in params.items()],
+    }
+
+
+def lambda_requests(modules: dict) -> dict:
+    companion = modules["bible_companion_lambda"]
+    verses = modules["verse_of_the_day_lambda"]
+    memory = modules["agentcore_memory_lambda"]
+
+    def companion_prefs(user_index, turn):
+        companion.lambda_handler(action_event("getUserPreferences", userId=f"bench-user-{user_index:04d}"), None)
+
+    def verse_of_the_day(user_index, turn):
+        verses.lambda_handler(action_event("getVerseOfTheDay", date=f"2026-01-{turn % 28 + 1:02d}"), None)
+
+    def verse_by_reference(user_index, turn):
+        verses.lambda_handler(action_event("getVerseByReference", reference="John 3:16"), None)
+
+    def memory_save_event(user_index, turn):
+        memory.lambda_handler({
+            "actionGroup": "bench",
+            "apiPath": "/saveConversationEvent",
+            "parameters": [],
+            "requestBody": {"content": {"application/json": {"properties": [
+                {"name": "userId", "value": f"bench-user-{user_index:04d}"},
+                {"name": "sessionId", "value": f"bench-session-{user_index:04d}"},
+                {"name": "message", "value": SAMPLE_MESSAGES[turn % len(SAMPLE_MESSAGES)]},
+            ]}}},
+        }, None)
+
+    def memory_get(user_index, turn):
+        memory.lambda_handler({
+            "actionGroup": "bench",
+            "apiPath": "/getConversationMemory",
+            "parameters": [{"name": "userId", "value": f"bench-user-{user_index:04d}"}],
+        }, None)
+
+    return {
+        "lambda.getUserPreferences": companion_prefs,
+        "lambda.getVerseOfTheDay": verse_of_the_day,
+        "lambda.getVerseByReference": verse_by_reference,
+        "lambda.saveConversationEvent": memory_save_event,
+        "lambda.getConversationMemory": memory_get,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--turns", type=int, default=10, help="requests per user")
+    parser.add_argument("--scenarios", default="companion,lambda", help="companion and/or lambda")
+    parser.add_argument("--mysql-ms", type=float, default=4.0)
+    parser.add_argument("--agentcore-ms", type=float, default=30.0)
+    parser.add_argument("--dynamodb-ms", type=float, default=8.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    user_levels = [int(u) for u in args.users.split(",") if u]
+    scenarios = set(args.scenarios.split(","))
+    latency = Latency(args.mysql_ms / 1000, args.agentcore_ms / 1000, args.dynamodb_ms / 1000)
+    mysql_stats = {"connections": 0, "queries": 0}
+    agentcore = FakeAgentCoreClient(latency)
+    dynamodb = FakeDynamoResource(latency)
+    run_id = str(int(time.time()))
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    # Spools go to a fresh directory so a run never replays or dedups against an earlier one
+    spool_dir = tempfile.mkdtemp(prefix="bench-")
+    os.environ["EVENT_SPOOL_PATH"] = os.path.join(spool_dir, "spool.db")
+    os.environ["SUMMARY_SPOOL_PATH"] = os.path.join(spool_dir, "summary_spool.db")
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["STUB_LLM_FIRST_TOKEN_MS"] = str(args.llm_first_token_ms)
+    os.environ["STUB_LLM_TOKENS_PER_SECOND"] = str(args.llm_tokens_per_second)
+
+    results = []
+    with stand_ins_installed(latency, mysql_stats, agentcore, dynamodb), \
+            open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if "companion" in scenarios:
+            import agentcore_runtime as runtime
+            timer = StageTimer()
+            instrument_runtime(runtime, timer)
+            for users in user_levels:
+                results.append(run_scenario("bible_companion", users, args.turns,
+                                            companion_request(runtime, run_id), timer))
+            runtime.event_writer.flush(timeout=30)
+
+        if "lambda" in scenarios:
+            modules = {name: load_module(name, path) for name, path in LAMBDA_MODULES.items()}
+            for name, request_fn in lambda_requests(modules).items():
+                for users in user_levels:
+                    results.append(run_scenario(name, users, args.turns, request_fn))
+
+    report = {
+        "run_id": run_id,
+        "python": platform.python_version(),
+        "config": {
+            "users": user_levels,
+            "turns_per_user": args.turns,
+            "latency_ms": {"mysql": args.mysql_ms, "agentcore": args.agentcore_ms, "dynamodb": args.dynamodb_ms},
+            "llm": {"first_token_ms": args.llm_first_token_ms, "tokens_per_second": args.llm_tokens_per_second},
+        },
+        "backend_calls": {"mysql": mysql_stats, "agentcore": dict(agentcore.calls)},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    print(f"{'scenario':32} {'users':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for r in results:
+        lat = r["latency_ms"]
+        print(f"{r['scenario']:32} {r['users']:>5} {r['throughput_rps']:>8} "
+              f"{lat['p50']:>9} {lat['p95']:>9} {lat['p99']:>9}")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
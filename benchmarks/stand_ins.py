@@ -0,0 +1,197 @@
+"""
+Local stand-ins for MySQL, DynamoDB and the bedrock-agentcore client.
+
+Each stand-in sleeps for a configurable round-trip latency so the pipeline
+sees realistic timing without touching AWS or RDS.
+"""
+import threading
+import time
+import uuid
+
+
+class Latency:
+    """Round-trip latencies in seconds for each stand-in service."""
+
+    def __init__(self, mysql: float = 0.004, agentcore: float = 0.030, dynamodb: float = 0.008):
+        self.mysql = mysql
+        self.agentcore = agentcore
+        self.dynamodb = dynamodb
+
+
+# -- MySQL (pymysql.connect replacement) -------------------------------------
+
+class FakeMySQLCursor:
+    def __init__(self, latency: Latency, connection_stats: dict):
+        self.latency = latency
+        self.stats = connection_stats
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query: str, args=None):
+        time.sleep(self.latency.mysql)
+        self.stats["queries"] += 1
+        if "FROM bible_versions" in query:
+            self._rows = [(1, "NIV"), (2, "KJV"), (3, "ESV"), (4, "RVR1960")]
+        elif "FROM denominations" in query:
+            self._rows = [("d-1", "Baptist"), ("d-2", "Catholic"), ("d-3", "Methodist")]
+        elif "FROM users" in query:
+            user_id = args[0] if args else ""
+            self._rows = [{
+                "firstName": f"User {user_id[-4:]}",
+                "birthDate": None,
+                "avatarIa": 1,
+                "avatarName": "Ruth",
+                "bibleVersionId": 2,
+                "denominationId": "d-1",
+            }]
+        else:
+            self._rows = []
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+
+class FakeMySQLConnection:
+    def __init__(self, latency: Latency, stats: dict):
+        self.latency = latency
+        self.stats = stats
+
+    def cursor(self, cursor_class=None):
+        return FakeMySQLCursor(self.latency, self.stats)
+
+    def ping(self, reconnect=False):
+        time.sleep(self.latency.mysql)
+
+    def commit(self):
+        time.sleep(self.latency.mysql)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def fake_mysql_connect(latency: Latency, stats: dict):
+    """Build a pymysql.connect replacement; connecting costs a TCP+TLS+auth handshake (3 RTTs)."""
+    def connect(**kwargs):
+        time.sleep(latency.mysql * 3)
+        stats["connections"] += 1
+        return FakeMySQLConnection(latency, stats)
+    return connect
+
+
+# -- bedrock-agentcore client -------------------------------------------------
+
+class FakeAgentCoreClient:
+    class exceptions:
+        class ResourceNotFoundException(Exception):
+            pass
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self._events = {}
+        self._lock = threading.Lock()
+        self.calls = {}
+
+    def _call(self, name: str):
+        time.sleep(self.latency.agentcore)
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def create_event(self, memoryId, actorId, sessionId, eventTimestamp, payload, **kwargs):
+        self._call("create_event")
+        event = {
+            "eventId": str(uuid.uuid4()),
+            "actorId": actorId,
+            "sessionId": sessionId,
+            "eventTimestamp": eventTimestamp,
+            "payload": payload,
+        }
+        with self._lock:
+            self._events.setdefault((actorId, sessionId), []).append(event)
+        return {"event": event, "eventId": event["eventId"]}
+
+    def list_events(self, memoryId, actorId, sessionId, maxResults=10, **kwargs):
+        self._call("list_events")
+        with self._lock:
+            events = list(self._events.get((actorId, sessionId), []))[-maxResults:]
+        return {"events": events, "eventSummaries": events}
+
+    def list_sessions(self, memoryId, actorId, maxResults=10, **kwargs):
+        self._call("list_sessions")
+        with self._lock:
+            sessions = [s for (a, s) in self._events if a == actorId][:maxResults]
+        return {"sessionSummaries": [{"sessionId": s, "sessionStartTime": ""} for s in sessions]}
+
+    def retrieve_memory_records(self, memoryId, namespace, searchCriteria=None, **kwargs):
+        self._call("retrieve_memory_records")
+        records = [{"content": {"text": "User has been praying about work stress."}, "score": 0.8}]
+        return {"memoryRecords": records, "memoryRecordSummaries": records}
+
+    def batch_create_memory_records(self, memoryId, records, **kwargs):
+        self._call("batch_create_memory_records")
+        return {"successfulRecords": [{"requestIdentifier": r["requestIdentifier"]} for r in records],
+                "failedRecords": []}
+
+    def list_memory_records(self, memoryId, namespace, **kwargs):
+        self._call("list_memory_records")
+        return {"memoryRecordSummaries": []}
+
+    def delete_event(self, **kwargs):
+        self._call("delete_event")
+        return {}
+
+
+# -- DynamoDB (boto3.resource('dynamodb') replacement) -----------------------
+
+class FakeDynamoTable:
+    def __init__(self, name: str, latency: Latency, items: dict):
+        self.name = name
+        self.latency = latency
+        self.items = items
+
+    def get_item(self, Key):
+        time.sleep(self.latency.dynamodb)
+        item = self.items.get(tuple(Key.values()))
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item):
+        time.sleep(self.latency.dynamodb)
+        key = Item.get("userId") or Item.get("date")
+        self.items[(key,)] = dict(Item)
+        return {}
+
+    def query(self, **kwargs):
+        time.sleep(self.latency.dynamodb)
+        return {"Items": []}
+
+
+class FakeDynamoResource:
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.tables = {}
+
+    def Table(self, name: str):
+        if name not in self.tables:
+            self.tables[name] = FakeDynamoTable(name, self.latency, {})
+        return self.tables[name]
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        time.sleep(self.latency.dynamodb)
+        responses = {}
+        for name, request in RequestItems.items():
+            table = self.Table(name)
+            responses[name] = [
+                dict(table.items[tuple(key.values())])
+                for key in request["Keys"] if tuple(key.values()) in table.items
+            ]
+        return {"Responses": responses, "UnprocessedKeys": {}}
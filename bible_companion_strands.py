@@ -1,17 +1,45 @@
+import os
+import time
+import boto3
 from bedrock_agentcore import BedrockAgentCoreApp
+from event_writer import EventWriter
+from llm_backends import StrandsBackend, get_backend
 
 app = BedrockAgentCoreApp()
 
-# Lazy loading - Agent se carga solo cuando se necesita
-_agent = None
+# Strands by default; LLM_BACKEND=stub runs the entrypoint offline
+backend = get_backend(os.environ.get('LLM_BACKEND', StrandsBackend.name))
 
-def get_agent():
-    """Lazy load Strands Agent to avoid cold start timeout."""
-    global _agent
-    if _agent is None:
-        from strands import Agent
-        _agent = Agent()
-    return _agent
+# Conversation turns are spooled to /tmp and written to AgentCore Memory in the background
+MEMORY_ID = os.environ.get('MEMORY_ID', 'memory_bqdqb-jtj3lc48bl')
+event_writer = EventWriter(
+    boto3.client('bedrock-agentcore', region_name=os.environ.get('AWS_REGION', 'us-east-1')),
+    MEMORY_ID,
+    spool_path=os.environ.get('EVENT_SPOOL_PATH', '/tmp/agentcore_event_spool.db')
+)
+
+def save_interaction(user_id: str, session_id: str, user_message: str, response: str):
+    """Queue both turns as one AgentCore Memory event."""
+    try:
+        payload = [
+            {"conversational": {"content": {"text": user_message}, "role": "USER"}},
+            {"conversational": {"content": {"text": response}, "role": "ASSISTANT"}}
+        ]
+        event_writer.enqueue(user_id, session_id, payload, int(time.time() * 1000))
+    except Exception as e:
+        print(f"Error saving to memory: {e}")
+
+async def stream_and_save(prompt: str, user_id: str, session_id: str, user_message: str):
+    """Yield the streamed response; the interaction is saved when the stream closes."""
+    chunks = []
+    try:
+        async for chunk in backend.stream_async(prompt):
+            chunks.append(chunk)
+            yield chunk
+    finally:
+        # Also runs when the client disconnects mid-answer: what was sent is saved
+        if chunks:
+            save_interaction(user_id, session_id, user_message, "".join(chunks))
 
 @app.entrypoint
 def invoke(payload):
@@ -20,15 +48,22 @@ def invoke(payload):
     # Extract user message
     user_message = payload.get("prompt", "Hello! How can I help you today?")
     
-    # Extract user_id if provided
+    # Extract user_id and session_id if provided
     session_attributes = payload.get("sessionAttributes", {})
     user_id = session_attributes.get("userId", "default-user")
+    session_id = session_attributes.get("sessionId") or f"session-{int(time.time())}"
+    
+    # Backend loads the Strands Agent lazily to avoid cold start timeout
+    prompt = f"As a Bible Companion, respond to: {user_message}"
+    
+    # Streaming mode: the runtime sends each yielded chunk to the client as it arrives
+    if payload.get("stream"):
+        return stream_and_save(prompt, user_id, session_id, user_message)
     
-    # Lazy load agent and process
-    agent = get_agent()
-    result = agent(f"As a Bible Companion, respond to: {user_message}")
+    text = backend.generate(prompt)
+    save_interaction(user_id, session_id, user_message, text)
     
-    return {"result": result.message}
+    return {"result": {"role": "assistant", "content": [{"text": text}]}}
 
 if __name__ == "__main__":
     app.run()
\ No newline at end of file
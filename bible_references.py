@@ -0,0 +1,473 @@
+"""
+Canonical Bible reference parsing.
+
+A 66-book table (Protestant canon, KJV versification) with English and
+Spanish names and abbreviations is compiled once at import into a single
+regex and a verse-count table. References are parsed into BibleReference
+tuples, validated against chapter and verse counts, and formatted back to
+one canonical string, so "Jn 3:16", "John 3.16" and "Juan 3:16" all become
+"John 3:16".
+
+    >>> find_references("Read 1 Cor 13:4-7 and Romans 8:28-9:2")
+    [BibleReference(book=46, start_chapter=13, start_verse=4, end_chapter=13, end_verse=7),
+     BibleReference(book=45, start_chapter=8, start_verse=28, end_chapter=9, end_verse=2)]
+"""
+import bisect
+import re
+import unicodedata
+from collections import namedtuple
+
+# (name, testament, verses per chapter, aliases). Aliases ending in "*" are
+# also ordinary English or Spanish words ("Is", "Job", "Mark", "La", "Mi")
+# and only match capitalized.
+_BOOK_DATA = (
+    ("Genesis", "OT",
+     "31 25 24 26 32 22 24 22 29 32 32 20 18 24 21 16 27 33 38 18 34 24 20 67 34 35 46 22 35 "
+     "43 55 32 20 31 29 43 36 30 23 23 57 38 34 34 28 34 31 22 33 26",
+     ("Genesis", "Gen", "Ge", "Gn", "Génesis")),
+    ("Exodus", "OT",
+     "22 25 22 31 23 30 25 32 35 29 10 51 22 31 27 36 16 27 25 26 36 31 33 18 40 37 21 43 46 "
+     "38 18 35 23 35 35 38 29 31 43 38",
+     ("Exodus", "Exod", "Exo", "Ex*", "Éxodo", "Éx")),
+    ("Leviticus", "OT",
+     "17 16 17 35 19 30 38 36 24 20 47 8 59 57 33 34 16 30 37 27 24 33 44 23 55 46 34",
+     ("Leviticus", "Lev", "Le", "Lv", "Levítico")),
+    ("Numbers", "OT",
+     "54 34 51 49 31 27 89 26 23 36 35 16 33 45 41 50 13 32 22 29 35 41 30 25 18 65 23 31 40 "
+     "16 54 42 56 29 34 13",
+     ("Numbers", "Num", "Nu", "Nm", "Nb", "Números")),
+    ("Deuteronomy", "OT",
+     "46 37 29 49 33 25 26 20 29 22 32 32 18 29 23 22 20 22 21 20 23 30 25 22 19 19 26 68 29 "
+     "20 30 52 29 12",
+     ("Deuteronomy", "Deut", "Deu", "Dt", "De*", "Deuteronomio")),
+    ("Joshua", "OT",
+     "18 24 17 24 15 27 26 35 27 43 23 24 33 15 63 10 18 28 51 9 45 34 16 33",
+     ("Joshua", "Josh", "Jos", "Jsh", "Josué")),
+    ("Judges", "OT",
+     "36 23 31 24 31 40 25 35 57 18 40 15 25 20 20 31 13 31 30 48 25",
+     ("Judges", "Judg", "Jdg", "Jdgs", "Jueces", "Jue")),
+    ("Ruth", "OT",
+     "22 23 18 22",
+     ("Ruth", "Rth", "Ru", "Rut", "Rt")),
+    ("1 Samuel", "OT",
+     "28 36 21 22 12 21 17 22 27 27 15 25 23 52 35 23 58 30 24 42 15 23 29 22 44 25 12 25 11 "
+     "31 13",
+     ("1 Samuel", "1 Sam", "1 Sa", "1 Sm")),
+    ("2 Samuel", "OT",
+     "27 32 39 12 25 23 29 18 13 19 27 31 39 33 37 23 29 33 43 26 22 51 39 25",
+     ("2 Samuel", "2 Sam", "2 Sa", "2 Sm")),
+    ("1 Kings", "OT",
+     "53 46 28 34 18 38 51 66 28 29 43 33 34 31 34 34 24 46 21 43 29 53",
+     ("1 Kings", "1 Kgs", "1 Ki", "1 Kin", "1 Reyes", "1 R")),
+    ("2 Kings", "OT",
+     "18 25 27 44 27 33 20 29 37 36 21 21 25 29 38 20 41 37 37 21 26 20 37 20 30",
+     ("2 Kings", "2 Kgs", "2 Ki", "2 Kin", "2 Reyes", "2 R")),
+    ("1 Chronicles", "OT",
+     "54 55 24 43 26 81 40 40 44 14 47 40 14 17 29 43 27 17 19 8 30 19 32 31 31 32 34 21 30",
+     ("1 Chronicles", "1 Chron", "1 Chr", "1 Ch", "1 Crónicas", "1 Cr")),
+    ("2 Chronicles", "OT",
+     "17 18 17 22 14 42 22 18 31 19 23 16 22 15 19 14 19 34 11 37 20 12 21 27 28 23 9 27 36 27 "
+     "21 33 25 33 27 23",
+     ("2 Chronicles", "2 Chron", "2 Chr", "2 Ch", "2 Crónicas", "2 Cr")),
+    ("Ezra", "OT",
+     "11 70 13 24 17 22 28 36 15 44",
+     ("Ezra", "Ezr", "Esdras", "Esd")),
+    ("Nehemiah", "OT",
+     "11 20 32 23 19 19 73 18 38 39 36 47 31",
+     ("Nehemiah", "Neh", "Ne", "Nehemías")),
+    ("Esther", "OT",
+     "22 23 15 17 14 14 10 17 32 3",
+     ("Esther", "Est*", "Esth", "Ester")),
+    ("Job", "OT",
+     "22 13 26 21 27 30 21 22 35 22 20 25 28 22 35 22 16 21 29 29 34 30 17 25 6 14 23 28 25 31 "
+     "40 22 33 37 16 33 24 41 30 24 34 17",
+     ("Job*", "Jb")),
+    ("Psalms", "OT",
+     "6 12 8 8 12 10 17 9 20 18 7 8 6 7 5 11 15 50 14 9 13 31 6 10 22 12 14 9 11 12 24 11 22 "
+     "22 28 12 40 22 13 17 13 11 5 26 17 11 9 14 20 23 19 9 6 7 23 13 11 11 17 12 8 12 11 10 "
+     "13 20 7 35 36 5 24 20 28 23 10 12 20 72 13 19 16 8 18 12 13 17 7 18 52 17 16 15 5 23 11 "
+     "13 12 9 9 5 8 28 22 35 45 48 43 13 31 7 10 10 9 8 18 19 2 29 176 7 8 9 4 8 5 6 5 6 8 8 3 "
+     "18 3 3 21 26 9 8 24 13 10 7 12 15 21 10 20 14 9 6",
+     ("Psalms", "Psalm", "Ps", "Psa", "Pss", "Psm", "Salmos", "Salmo", "Sal*")),
+    ("Proverbs", "OT",
+     "33 22 35 27 23 35 27 36 18 32 31 28 25 35 33 33 28 24 29 30 31 29 35 34 28 28 27 28 27 "
+     "33 31",
+     ("Proverbs", "Prov", "Pro", "Prv", "Pr", "Proverbios")),
+    ("Ecclesiastes", "OT",
+     "18 26 22 16 20 12 29 17 18 20 10 14",
+     ("Ecclesiastes", "Eccl", "Eccles", "Ecc", "Ec", "Qoh", "Eclesiastés", "Ecl")),
+    ("Song of Solomon", "OT",
+     "17 17 11 16 16 13 13 14",
+     ("Song of Solomon", "Song of Songs", "Song*", "Sng", "SOS", "Canticles", "Cantares",
+      "Cantar de los Cantares", "Cnt", "Cant")),
+    ("Isaiah", "OT",
+     "31 22 26 6 30 13 25 22 21 34 16 6 22 32 9 14 14 7 25 6 17 25 18 23 12 21 13 29 24 33 9 "
+     "20 24 17 10 22 38 22 8 31 29 25 28 28 25 13 15 22 26 11 23 15 12 17 13 12 21 14 21 22 11 "
+     "12 19 12 25 24",
+     ("Isaiah", "Isa", "Is*", "Isaías")),
+    ("Jeremiah", "OT",
+     "19 37 25 31 31 30 34 22 26 25 23 17 27 22 21 21 27 23 15 18 14 30 40 10 38 24 22 17 32 "
+     "24 40 44 26 22 19 32 21 28 18 16 18 22 13 30 5 28 7 47 39 46 64 34",
+     ("Jeremiah", "Jer", "Je", "Jr", "Jeremías")),
+    ("Lamentations", "OT",
+     "22 22 66 22 22",
+     ("Lamentations", "Lam", "La*", "Lamentaciones", "Lm")),
+    ("Ezekiel", "OT",
+     "28 10 27 17 17 14 27 18 11 22 25 28 23 23 8 63 24 32 14 49 32 31 49 27 17 21 36 26 21 26 "
+     "18 32 33 31 15 38 28 23 29 49 26 20 27 31 25 24 23 35",
+     ("Ezekiel", "Ezek", "Eze", "Ezk", "Ezequiel", "Ez")),
+    ("Daniel", "OT",
+     "21 49 30 37 31 28 28 27 27 21 45 13",
+     ("Daniel", "Dan*", "Dn", "Da*")),
+    ("Hosea", "OT",
+     "11 23 5 19 15 11 16 14 17 15 12 14 16 9",
+     ("Hosea", "Hos", "Ho", "Oseas", "Os*")),
+    ("Joel", "OT",
+     "20 32 21",
+     ("Joel", "Jl")),
+    ("Amos", "OT",
+     "15 16 15 13 27 14 17 14 15",
+     ("Amos", "Am*", "Amós")),
+    ("Obadiah", "OT",
+     "21",
+     ("Obadiah", "Obad", "Ob", "Abdías", "Abd")),
+    ("Jonah", "OT",
+     "17 10 10 11",
+     ("Jonah", "Jon", "Jnh", "Jonás")),
+    ("Micah", "OT",
+     "16 13 12 13 15 16 20",
+     ("Micah", "Mic", "Mc", "Miqueas", "Miq", "Mi*")),
+    ("Nahum", "OT",
+     "15 13 19",
+     ("Nahum", "Nah", "Na", "Nahúm")),
+    ("Habakkuk", "OT",
+     "17 20 19",
+     ("Habakkuk", "Hab", "Hb", "Habacuc")),
+    ("Zephaniah", "OT",
+     "18 15 20",
+     ("Zephaniah", "Zeph", "Zep", "Zp", "Sofonías", "Sof")),
+    ("Haggai", "OT",
+     "15 23",
+     ("Haggai", "Hag", "Hg", "Hageo")),
+    ("Zechariah", "OT",
+     "21 13 10 14 11 15 14 23 17 12 17 14 9 21",
+     ("Zechariah", "Zech", "Zec", "Zc", "Zacarías", "Zac")),
+    ("Malachi", "OT",
+     "14 17 18 6",
+     ("Malachi", "Mal*", "Ml", "Malaquías")),
+    ("Matthew", "NT",
+     "25 23 17 25 48 34 29 34 38 42 30 50 58 36 39 28 27 35 30 34 46 46 39 51 46 75 66 20",
+     ("Matthew", "Matt", "Mat", "Mt", "Mateo")),
+    ("Mark", "NT",
+     "45 28 35 41 43 56 37 38 50 52 33 44 37 72 47 20",
+     ("Mark*", "Mrk", "Mk", "Marcos", "Mr")),
+    ("Luke", "NT",
+     "80 52 38 44 39 49 50 56 62 42 54 59 35 35 32 31 37 43 48 47 38 71 56 53",
+     ("Luke", "Luk", "Lk", "Lucas", "Lc")),
+    ("John", "NT",
+     "51 25 36 54 47 71 53 59 41 42 57 50 38 31 27 33 26 40 42 31 25",
+     ("John", "Jn", "Jhn", "Joh", "Juan")),
+    ("Acts", "NT",
+     "26 47 26 37 42 15 60 40 43 48 30 25 52 28 41 40 34 28 41 38 40 30 35 27 27 32 44 31",
+     ("Acts", "Act*", "Ac*", "Hechos", "Hch", "Hech")),
+    ("Romans", "NT",
+     "32 29 31 25 21 23 25 39 33 21 36 21 14 23 33 27",
+     ("Romans", "Rom", "Ro", "Rm", "Romanos")),
+    ("1 Corinthians", "NT",
+     "31 16 23 21 13 20 40 13 27 33 34 31 13 40 58 24",
+     ("1 Corinthians", "1 Cor", "1 Co", "1 Corintios")),
+    ("2 Corinthians", "NT",
+     "24 17 18 18 21 18 16 24 15 18 33 21 14",
+     ("2 Corinthians", "2 Cor", "2 Co", "2 Corintios")),
+    ("Galatians", "NT",
+     "24 21 29 31 26 18",
+     ("Galatians", "Gal", "Ga", "Gálatas", "Gá")),
+    ("Ephesians", "NT",
+     "23 22 21 32 33 24",
+     ("Ephesians", "Eph", "Ephes", "Efesios", "Ef")),
+    ("Philippians", "NT",
+     "30 30 21 23",
+     ("Philippians", "Phil", "Php", "Pp", "Filipenses", "Fil", "Flp")),
+    ("Colossians", "NT",
+     "29 23 25 18",
+     ("Colossians", "Col", "Colosenses")),
+    ("1 Thessalonians", "NT",
+     "10 20 13 18 28",
+     ("1 Thessalonians", "1 Thess", "1 Thes", "1 Th", "1 Tesalonicenses", "1 Tes", "1 Ts")),
+    ("2 Thessalonians", "NT",
+     "12 17 18",
+     ("2 Thessalonians", "2 Thess", "2 Thes", "2 Th", "2 Tesalonicenses", "2 Tes", "2 Ts")),
+    ("1 Timothy", "NT",
+     "20 15 16 16 25 21",
+     ("1 Timothy", "1 Tim", "1 Ti", "1 Timoteo")),
+    ("2 Timothy", "NT",
+     "18 26 17 22",
+     ("2 Timothy", "2 Tim", "2 Ti", "2 Timoteo")),
+    ("Titus", "NT",
+     "16 15 15",
+     ("Titus", "Tit", "Tito")),
+    ("Philemon", "NT",
+     "25",
+     ("Philemon", "Philem", "Phlm", "Phm", "Filemón", "Flm")),
+    ("Hebrews", "NT",
+     "14 18 19 16 14 20 28 13 28 39 40 29 25",
+     ("Hebrews", "Heb", "Hebreos", "He*")),
+    ("James", "NT",
+     "27 26 18 17 20",
+     ("James", "Jas", "Jam", "Jm", "Santiago", "Stg", "Sant")),
+    ("1 Peter", "NT",
+     "25 25 22 19 14",
+     ("1 Peter", "1 Pet", "1 Pe", "1 Pt", "1 Pedro", "1 P")),
+    ("2 Peter", "NT",
+     "21 22 18",
+     ("2 Peter", "2 Pet", "2 Pe", "2 Pt", "2 Pedro", "2 P")),
+    ("1 John", "NT",
+     "10 29 24 21 21",
+     ("1 John", "1 Jn", "1 Jo", "1 Jhn", "1 Juan")),
+    ("2 John", "NT",
+     "13",
+     ("2 John", "2 Jn", "2 Jo", "2 Jhn", "2 Juan")),
+    ("3 John", "NT",
+     "14",
+     ("3 John", "3 Jn", "3 Jo", "3 Jhn", "3 Juan")),
+    ("Jude", "NT",
+     "25",
+     ("Jude", "Jud", "Jd", "Judas")),
+    ("Revelation", "NT",
+     "20 29 22 11 14 17 17 13 21 11 19 17 18 20 8 21 18 24 21 15 27 21",
+     ("Revelation", "Rev", "Re*", "Rv", "Revelations", "Apocalypse", "Apocalipsis", "Apoc",
+      "Ap*")),
+)
+
+
+# Numbered books ("1 Corinthians") also accept these spellings of the number
+_NUMBER_PREFIXES = {
+    "1": ("1", "I", "1st", "First"),
+    "2": ("2", "II", "2nd", "Second"),
+    "3": ("3", "III", "3rd", "Third"),
+}
+
+Book = namedtuple("Book", "id name testament verses")
+
+
+class BibleReference(namedtuple("BibleReference", "book start_chapter start_verse end_chapter end_verse")):
+    """A validated verse range; book is the 1-based canonical book id."""
+    __slots__ = ()
+
+    @property
+    def book_name(self) -> str:
+        return BOOKS[self.book - 1].name
+
+    def __str__(self):
+        return format_reference(self)
+
+
+def _alias_key(alias: str) -> str:
+    """Lookup key for an alias: accents, case, spaces and periods removed."""
+    decomposed = unicodedata.normalize("NFKD", alias)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return re.sub(r"[\s.]+", "", stripped.lower())
+
+
+def _alias_spellings(alias: str) -> set:
+    """The alias, its unaccented form and, for numbered books, each spelling of the number."""
+    decomposed = unicodedata.normalize("NFKD", alias)
+    spellings = {alias, "".join(char for char in decomposed if not unicodedata.combining(char))}
+    number, _, rest = alias.partition(" ")
+    if number in _NUMBER_PREFIXES and rest:
+        # Short abbreviations keep the digit only: "I Sa" would read as "Isa"
+        prefixes = _NUMBER_PREFIXES[number] if len(rest) >= 3 else (number,)
+        spellings = {prefix + " " + spelling.partition(" ")[2]
+                     for spelling in spellings for prefix in prefixes}
+    return spellings
+
+
+def _trie_pattern(spellings) -> str:
+    """Regex alternation built from a prefix trie, so each position is tried once per character."""
+    trie = {}
+    for spelling in spellings:
+        node = trie
+        for char in " ".join(spelling.split()):
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node) -> str:
+        branches = []
+        for char in sorted(k for k in node if k):
+            piece = r"\s*" if char == " " else re.escape(char)
+            branches.append(piece + build(node[char]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional: longer names ("1 John", "Psalms") are preferred over their prefixes
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+def _compile():
+    books = []
+    book_ids = {}
+    spellings = []
+    for book_id, (name, testament, counts, aliases) in enumerate(_BOOK_DATA, 1):
+        books.append(Book(book_id, name, testament, tuple(int(count) for count in counts.split())))
+        for alias in aliases:
+            case_sensitive = alias.endswith("*")
+            for spelling in _alias_spellings(alias.rstrip("*")):
+                if book_ids.setdefault(_alias_key(spelling), book_id) != book_id:
+                    raise ValueError(f"Bible alias {spelling!r} is ambiguous")
+                spellings.append((spelling, case_sensitive))
+
+    exact = {spelling for spelling, case_sensitive in spellings if case_sensitive}
+    folded = {spelling.lower() for spelling, case_sensitive in spellings if not case_sensitive}
+    alternatives = f"(?-i:{_trie_pattern(exact)})|{_trie_pattern(folded)}"
+
+    pattern = re.compile(
+        r"(?<!\w)(?P<book>" + alternatives + r")\.?\s*"
+        r"(?P<chapter>\d{1,3})"
+        r"(?:[:.](?P<verse>\d{1,3}))?"
+        r"(?:\s*[-–—]\s*(?P<to>\d{1,3})(?:[:.](?P<to_verse>\d{1,3}))?)?"
+        r"(?!\d)",
+        re.IGNORECASE)
+
+    # Ordinal of the first verse of every chapter, in canonical order
+    chapter_starts = []
+    chapter_keys = []
+    first_chapter = [0]
+    ordinal = 0
+    for book in books:
+        for chapter, count in enumerate(book.verses, 1):
+            chapter_starts.append(ordinal)
+            chapter_keys.append((book.id, chapter))
+            ordinal += count
+        first_chapter.append(len(chapter_starts))
+    return tuple(books), book_ids, pattern, chapter_starts, chapter_keys, first_chapter, ordinal
+
+
+BOOKS, _BOOK_IDS, REFERENCE_PATTERN, _CHAPTER_STARTS, _CHAPTER_KEYS, _FIRST_CHAPTER, TOTAL_VERSES = _compile()
+
+PSALMS = 19
+
+# Every reference has a number; text without digits skips the book-name scan
+_DIGIT = re.compile(r"\d")
+
+
+def lookup_book(name: str):
+    """Book for any known name or abbreviation ("1 Cor", "Salmos"), or None."""
+    book_id = _BOOK_IDS.get(_alias_key(name))
+    return BOOKS[book_id - 1] if book_id else None
+
+
+def make_reference(book: int, start_chapter: int, start_verse: int,
+                   end_chapter: int = None, end_verse: int = None):
+    """Validated BibleReference, or None if any part is outside the book's chapters/verses."""
+    if end_chapter is None:
+        end_chapter = start_chapter
+    if end_verse is None:
+        end_verse = start_verse
+    if not 1 <= book <= len(BOOKS):
+        return None
+    verses = BOOKS[book - 1].verses
+    if not (1 <= start_chapter <= end_chapter <= len(verses)):
+        return None
+    if not (1 <= start_verse <= verses[start_chapter - 1] and 1 <= end_verse <= verses[end_chapter - 1]):
+        return None
+    if start_chapter == end_chapter and end_verse < start_verse:
+        return None
+    return BibleReference(book, start_chapter, start_verse, end_chapter, end_verse)
+
+
+def reference_from_match(match, whole_chapters: bool = False):
+    """BibleReference for a REFERENCE_PATTERN match (or a pattern embedding it), or None."""
+    return reference_from_groups(*match.group("book", "chapter", "verse", "to", "to_verse"),
+                                 whole_chapters=whole_chapters)
+
+
+def reference_from_groups(book_text: str, chapter: str, verse: str, to: str, to_verse: str,
+                          whole_chapters: bool = False):
+    """Same as reference_from_match, from the raw group strings (e.g. a findall tuple)."""
+    book = BOOKS[_BOOK_IDS[_alias_key(book_text)] - 1]
+    chapter, verse, to, to_verse = (int(value) if value else None for value in (chapter, verse, to, to_verse))
+
+    if verse is None and len(book.verses) == 1:
+        # Single-chapter books are cited by verse ("Jude 3", "3 John 4")
+        chapter, verse = 1, chapter
+
+    if verse is None:
+        if not whole_chapters:
+            return None
+        end_chapter = to or chapter
+        if end_chapter > len(book.verses):
+            return None
+        if to_verse is None:
+            to_verse = book.verses[end_chapter - 1]
+        return make_reference(book.id, chapter, 1, end_chapter, to_verse)
+
+    if to is None:
+        return make_reference(book.id, chapter, verse)
+    if to_verse is None:
+        return make_reference(book.id, chapter, verse, chapter, to)
+    return make_reference(book.id, chapter, verse, to, to_verse)
+
+
+def parse_reference(text: str):
+    """Parse one reference ("Ps 23", "1 Cor 13:4-7", "Juan 3:16"), or None if invalid."""
+    match = REFERENCE_PATTERN.fullmatch(text.strip())
+    return reference_from_match(match, whole_chapters=True) if match else None
+
+
+def find_references(text: str, whole_chapters: bool = False) -> list:
+    """
+    Valid references in free text, deduplicated, in order of first mention.
+    Bare chapters ("Psalm 23") are only included when whole_chapters is set.
+    """
+    references = []
+    if not _DIGIT.search(text):
+        return references
+    seen = set()
+    for match in REFERENCE_PATTERN.finditer(text):
+        reference = reference_from_match(match, whole_chapters)
+        if reference is not None and reference not in seen:
+            seen.add(reference)
+            references.append(reference)
+    return references
+
+
+def format_reference(reference: BibleReference) -> str:
+    """Canonical citation: "Psalm 23:1", "Proverbs 3:5-6", "Romans 8:28-9:2", "Matthew 5-7"."""
+    book = BOOKS[reference.book - 1]
+    start_chapter, start_verse, end_chapter, end_verse = reference[1:]
+    name = book.name
+    if book.id == PSALMS and start_chapter == end_chapter:
+        name = "Psalm"
+
+    whole = len(book.verses) > 1 and start_verse == 1 and end_verse == book.verses[end_chapter - 1]
+    if whole:
+        if start_chapter == end_chapter:
+            return f"{name} {start_chapter}"
+        return f"{name} {start_chapter}-{end_chapter}"
+    if start_chapter == end_chapter:
+        if start_verse == end_verse:
+            return f"{name} {start_chapter}:{start_verse}"
+        return f"{name} {start_chapter}:{start_verse}-{end_verse}"
+    return f"{name} {start_chapter}:{start_verse}-{end_chapter}:{end_verse}"
+
+
+def verse_ordinal(book: int, chapter: int, verse: int) -> int:
+    """0-based position of a verse in the whole canon (Genesis 1:1 is 0)."""
+    return _CHAPTER_STARTS[_FIRST_CHAPTER[book - 1] + chapter - 1] + verse - 1
+
+
+def ordinal_range(reference: BibleReference) -> tuple:
+    """Half-open (start, stop) ordinals covered by a reference."""
+    return (verse_ordinal(reference.book, reference.start_chapter, reference.start_verse),
+            verse_ordinal(reference.book, reference.end_chapter, reference.end_verse) + 1)
+
+
+def ordinal_to_verse(ordinal: int) -> tuple:
+    """(book, chapter, verse) for a canon ordinal."""
+    if not 0 <= ordinal < TOTAL_VERSES:
+        raise IndexError(f"Verse ordinal {ordinal} out of range")
+    index = bisect.bisect_right(_CHAPTER_STARTS, ordinal) - 1
+    book, chapter = _CHAPTER_KEYS[index]
+    return book, chapter, ordinal - _CHAPTER_STARTS[index] + 1
@@ -0,0 +1,54 @@
+"""
+Concurrent fan-out for the context a companion turn needs.
+
+Each branch (preferences, session events, memory records, ...) runs on a
+shared thread pool with its own time budget. A branch that fails or runs
+over budget is replaced by its default, so one slow dependency never holds
+up the turn:
+
+    results = fan_out({
+        "preferences": (get_user_preferences, (user_id,), dict),
+        "recent_events": (get_recent_events, (user_id, session_id), list),
+    }, timeouts={"preferences": 1.5, "recent_events": 1.0}, metrics=metrics)
+
+Budgets are measured from the start of the fan-out. Each branch is timed
+as its own stage when metrics is given.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+DEFAULT_TIMEOUT = 1.5
+
+context_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('CONTEXT_WORKERS', 8)),
+    thread_name_prefix='context'
+)
+
+
+def fan_out(branches: dict, timeouts: dict, metrics=None) -> dict:
+    """Run {name: (fn, args, default)} concurrently; returns {name: result or default()}."""
+    started = time.monotonic()
+    futures = {
+        name: context_executor.submit(metrics.timed(name, fn) if metrics else fn, *args)
+        for name, (fn, args, _) in branches.items()
+    }
+    
+    results = {}
+    for name, future in futures.items():
+        default = branches[name][2]
+        timeout = timeouts.get(name, DEFAULT_TIMEOUT)
+        remaining = timeout - (time.monotonic() - started)
+        try:
+            results[name] = future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            future.cancel()
+            print(f"Context branch '{name}' timed out after {timeout}s, using default")
+            if metrics:
+                metrics.count("context_timeouts")
+            results[name] = default()
+        except Exception as e:
+            print(f"Context branch '{name}' failed: {e}")
+            results[name] = default()
+    
+    return results
@@ -0,0 +1,176 @@
+"""
+Token-budgeted context for the companion prompt.
+
+Recent turns, long-term memory records and suggested verses compete for a
+fixed token budget instead of all being concatenated. Each candidate is
+scored by kind, recency and word overlap with the user's message; the
+packer takes them best first, truncates the first one that doesn't fit
+(when enough budget is left to be useful) and drops the rest. The result
+reports what was dropped or truncated so it can be logged.
+
+Tokens are estimated as characters / 4, which is close enough for
+English and Spanish text and costs nothing.
+
+    packed = context_packer.pack(items, query=input_text)
+    prompt += packed.render({"recent_turn": "Recent Conversation:"})
+    packed.report()  # {"used_tokens": ..., "dropped": [{"kind": ..., "tokens": ...}], ...}
+    packed.relevant("recent_turn", "long_term")  # included items that bear on the message
+"""
+import os
+import re
+from collections import namedtuple
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get('CONTEXT_TOKEN_BUDGET', 1200))
+CHARS_PER_TOKEN = 4
+# A truncated item shorter than this is dropped instead
+MIN_TRUNCATED_TOKENS = 24
+# Score multiplier per step back in time (0 = newest)
+RECENCY_DECAY = 0.8
+
+# Too common to make two texts about the same thing
+STOPWORDS = frozenset(
+    "about also been before could does from have just know like more much really should some than that "
+    "them then there these they this want what when where which will with would your".split())
+
+# kind -> base priority; suggested verses are short and always on topic
+KIND_WEIGHTS = {"suggested_verses": 3.0, "recent_turn": 1.5, "long_term": 1.0}
+
+# recency: 0 for the newest item of its kind; relevance: extra score in [0, 1], e.g. a search score
+ContextItem = namedtuple("ContextItem", "kind text recency relevance")
+ContextItem.__new__.__defaults__ = (0, 0.0)
+
+_WORD_PATTERN = re.compile(r"[^\W\d_]{4,}")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _words(text: str) -> set:
+    return set(_WORD_PATTERN.findall(text.lower()))
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut text to about tokens, at a word boundary, marking the cut."""
+    limit = tokens * CHARS_PER_TOKEN - 1
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > limit // 2 else limit].rstrip() + "…"
+
+
+class PackedContext:
+    def __init__(self, budget: int, query_words: set = frozenset()):
+        self.budget = budget
+        self.query_words = query_words - STOPWORDS
+        self.used_tokens = 0
+        self.included = []
+        self.truncated = []
+        self.dropped = []
+
+    def section(self, kind: str) -> list:
+        """Included texts of one kind: turns oldest first, others in rank order."""
+        items = [item for item in self.included if item.kind == kind]
+        items.sort(key=lambda item: item.recency, reverse=kind == "recent_turn")
+        return [item.text for item in items]
+
+    def relevant(self, *kinds) -> list:
+        """Included items of these kinds that bear on the query: sharing a content word with it."""
+        return [item for item in self.included if item.kind in kinds and self.query_words & _words(item.text)]
+
+    def render(self, headings: dict, indent: str = "") -> str:
+        """Sections in headings order ({kind: heading}); empty sections are left out."""
+        blocks = []
+        for kind, heading in headings.items():
+            texts = self.section(kind)
+            if texts:
+                lines = [text if text.startswith("- ") else f"- {text}" for text in texts]
+                blocks.append(indent + heading + "\n" + "\n".join(indent + line for line in lines))
+        return "\n\n".join(blocks)
+
+    def report(self) -> dict:
+        return {
+            "budget": self.budget,
+            "used_tokens": self.used_tokens,
+            "included": len(self.included),
+            "truncated": [{"kind": item.kind, "tokens": estimate_tokens(item.text)} for item in self.truncated],
+            "dropped": [{"kind": item.kind, "tokens": estimate_tokens(item.text)} for item in self.dropped],
+        }
+
+
+class ContextPacker:
+    def __init__(self, budget: int = CONTEXT_TOKEN_BUDGET, weights: dict = None):
+        self.budget = budget
+        self.weights = weights or KIND_WEIGHTS
+
+    def score(self, item: ContextItem, query_words: set) -> float:
+        overlap = len(query_words & _words(item.text)) / len(query_words) if query_words else 0.0
+        return self.weights.get(item.kind, 1.0) * RECENCY_DECAY ** item.recency * (1.0 + overlap + item.relevance)
+
+    def pack(self, items, query: str = "", budget: int = None) -> PackedContext:
+        budget = self.budget if budget is None else budget
+        query_words = _words(query)
+        packed = PackedContext(budget, query_words)
+        candidates = [item for item in items if item.text and item.text.strip()]
+        candidates.sort(key=lambda item: self.score(item, query_words), reverse=True)
+
+        for item in candidates:
+            tokens = estimate_tokens(item.text)
+            remaining = budget - packed.used_tokens
+            if tokens <= remaining:
+                packed.included.append(item)
+                packed.used_tokens += tokens
+            elif remaining >= MIN_TRUNCATED_TOKENS:
+                shortened = item._replace(text=truncate_to_tokens(item.text, remaining))
+                packed.included.append(shortened)
+                packed.truncated.append(item)
+                packed.used_tokens += estimate_tokens(shortened.text)
+            else:
+                packed.dropped.append(item)
+        return packed
+
+
+def turn_items(events: list) -> list:
+    """ContextItems for AgentCore session events, newest first by eventTimestamp."""
+    events = sorted(events, key=lambda event: str(event.get('eventTimestamp', '')), reverse=True)
+    items = []
+    for recency, event in enumerate(events):
+        lines = []
+        for payload in event.get('payload', []):
+            conversational = payload.get('conversational')
+            if conversational:
+                role = "User" if conversational.get('role') == "USER" else "Companion"
+                lines.append(f"{role}: {conversational.get('content', {}).get('text', '')}")
+        if lines:
+            items.append(ContextItem("recent_turn", " / ".join(lines), recency))
+    return items
+
+
+def _record_text(record: dict) -> str:
+    content = record.get('content', {})
+    text = content.get('text', '') if isinstance(content, dict) else str(content)
+    return text or record.get('summary', '')
+
+
+def record_key(record: dict) -> str:
+    """Identity of a memory record: its memoryRecordId, or its text when it has none."""
+    return record.get('memoryRecordId') or _record_text(record)
+
+
+def packed_record_keys(packed: PackedContext, records: list) -> set:
+    """record_key of each of records (as passed to record_items) that packed included."""
+    return {record_key(records[item.recency]) for item in packed.included if item.kind == "long_term"}
+
+
+def record_items(records: list) -> list:
+    """ContextItems for long-term memory records, in retrieval order (recency is the record's index)."""
+    items = []
+    for rank, record in enumerate(records):
+        text = _record_text(record)
+        relevance = record.get('score', 0.0)
+        relevance = min(float(relevance), 1.0) if isinstance(relevance, (int, float)) else 0.0
+        items.append(ContextItem("long_term", text, rank, relevance))
+    return items
+
+
+context_packer = ContextPacker()
@@ -0,0 +1,155 @@
+"""
+Single-pass analysis of a conversation turn.
+
+Themes, verses and sentiment come from one analyzer instead of three
+helpers that each lowercase and rescan the texts:
+
+- the user's input (short) is tokenized once into words, clause punctuation
+  and Bible references; the lowercased tokens are shared by the theme
+  extractor and the sentiment scorer's negation windows;
+- the response (long) is lowercased once and scanned once for theme terms,
+  and the original text once for references. Under Python's re a single
+  combined alternation over long text measured about twice as slow as
+  these two specialized scans, so they stay separate.
+
+Theme words inside a reference ("Job 5:7") are not counted.
+
+    analysis = conversation_analyzer.analyze(input_text, response)
+    analysis["themes"], analysis["verses"], analysis["sentiment"], analysis["counts"]
+"""
+import bisect
+import re
+from collections import Counter
+from bible_references import REFERENCE_PATTERN, format_reference, reference_from_groups, reference_from_match
+from sentiment import sentiment_scorer
+from themes import INPUT_WEIGHT, theme_extractor
+
+_TOKEN_PATTERN = re.compile(
+    r"(?P<reference>" + REFERENCE_PATTERN.pattern + r")"
+    r"|(?P<word>[^\W\d_]+(?:['’][^\W\d_]+)*)"
+    r"|(?P<clause>[.!?;:,])",
+    re.IGNORECASE)
+
+# Positions of the groups in each findall() tuple
+_REFERENCE_GROUPS = slice(_TOKEN_PATTERN.groupindex["book"] - 1, _TOKEN_PATTERN.groupindex["to_verse"])
+_WORD = _TOKEN_PATTERN.groupindex["word"] - 1
+_CLAUSE = _TOKEN_PATTERN.groupindex["clause"] - 1
+
+# Text without digits cannot hold a reference and is tokenized without the book-name scan
+_DIGIT = re.compile(r"\d")
+_PLAIN_TOKEN_PATTERN = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*|[.!?;:,]")
+_CLAUSE_BREAKS = frozenset(".!?;:,")
+
+
+class ConversationAnalyzer:
+    def __init__(self, themes=None, sentiment=None, top_themes: int = 3):
+        self.themes = themes or theme_extractor
+        self.sentiment = sentiment or sentiment_scorer
+        self.top_themes = top_themes
+
+    @staticmethod
+    def _tokenize(text: str):
+        """
+        Returns (lowercased tokens, word count, references). Tokens are words
+        plus clause punctuation, which close negation windows; a reference
+        counts as a clause break.
+        """
+        references = []
+        if not _DIGIT.search(text):
+            tokens = _PLAIN_TOKEN_PATTERN.findall(text.lower().replace("’", "'"))
+            words = sum(1 for token in tokens if token not in _CLAUSE_BREAKS)
+            return tokens, words, references
+
+        tokens = []
+        words = 0
+        for groups in _TOKEN_PATTERN.findall(text):
+            token = groups[_WORD]
+            if token:
+                words += 1
+            else:
+                token = groups[_CLAUSE]
+                if not token:
+                    reference = reference_from_groups(*groups[_REFERENCE_GROUPS])
+                    if reference is not None:
+                        references.append(reference)
+                    token = ","
+            tokens.append(token)
+        # Tokens never contain spaces, so lowercase them all in one call
+        tokens = " ".join(tokens).lower().replace("’", "'").split(" ") if tokens else []
+        return tokens, words, references
+
+    def _scan_response(self, text: str, scores: Counter) -> list:
+        """Add the response's theme scores into scores; returns the references found."""
+        references = []
+        reference_starts = []
+        reference_ends = []
+        for match in REFERENCE_PATTERN.finditer(text) if _DIGIT.search(text) else ():
+            reference = reference_from_match(match)
+            if reference is not None:
+                references.append(reference)
+            reference_starts.append(match.start())
+            reference_ends.append(match.end())
+
+        lowered = text.lower()
+        # Offsets only line up if lowercasing kept the length (true except for a few letters like "İ")
+        mask = reference_starts and len(lowered) == len(text)
+        for match in self.themes.pattern.finditer(lowered):
+            if mask:
+                index = bisect.bisect_right(reference_starts, match.start()) - 1
+                if index >= 0 and match.start() < reference_ends[index]:
+                    continue
+            hit = self.themes.lookup(match.group())
+            if hit is not None:
+                scores[hit[0]] += hit[1]
+        return references
+
+    def analyze(self, input_text: str, response: str = "") -> dict:
+        input_text = input_text or ""
+        response = response or ""
+        theme_scores = Counter()
+        response_references = self._scan_response(response, theme_scores)
+
+        input_tokens, input_words, input_references = self._tokenize(input_text)
+        # Possessives and contractions are dropped for theme lookup ("mom's" -> "mom")
+        theme_words = [token.partition("'")[0] if "'" in token else token for token in input_tokens]
+        self.themes.score_tokens(theme_words, theme_scores, INPUT_WEIGHT)
+        sentiment = self.sentiment.score_tokens(input_tokens)
+
+        verses = []
+        seen = set()
+        for reference in response_references:
+            if reference not in seen:
+                seen.add(reference)
+                verses.append(format_reference(reference))
+
+        return {
+            "themes": self.themes.rank(theme_scores, self.top_themes),
+            "verses": verses,
+            "sentiment": sentiment.label,
+            "sentiment_score": sentiment.score,
+            "counts": {
+                "input_words": input_words,
+                "response_words": len(response.split()),
+                "verse_mentions": len(response_references),
+                "input_verse_mentions": len(input_references),
+                "theme_scores": {theme: round(score, 3) for theme, score in theme_scores.items()},
+                "sentiment_positive": sentiment.positive,
+                "sentiment_negative": sentiment.negative,
+            },
+        }
+
+    def analyze_batch(self, exchanges) -> list:
+        """
+        Analyze stored history offline. exchanges is an iterable of
+        (input_text, response) pairs or interaction dicts with user_input /
+        agent_response keys.
+        """
+        results = []
+        for exchange in exchanges:
+            if isinstance(exchange, dict):
+                exchange = (exchange.get('user_input', ''), exchange.get('agent_response', ''))
+            results.append(self.analyze(*exchange))
+        return results
+
+
+conversation_analyzer = ConversationAnalyzer()
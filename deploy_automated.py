@@ -22,7 +22,25 @@ def deploy_agentcore_runtime():
     
     files_to_zip = [
         'agentcore_runtime.py',
-        'session_tools.py', 
+        'session_tools.py',
+        'mysql_pool.py',
+        'preference_cache.py',
+        'event_writer.py',
+        'session_events.py',
+        'session_summary.py',
+        'summary_worker.py',
+        'llm_backends.py',
+        'metrics.py',
+        'themes.py',
+        'bible_references.py',
+        'sentiment.py',
+        'theme_verses.py',
+        'theme_verses.json',
+        'context_loader.py',
+        'context_packer.py',
+        'prompt_segments.py',
+        'response_cache.py',
+        'agent_prompt_v2.txt',
         'requirements_agentcore.txt',
         'user_memory_isolation.py'
     ]
@@ -0,0 +1,173 @@
+"""
+Write-behind writer for AgentCore Memory conversation events.
+
+Events are appended to a SQLite spool in /tmp and flushed to create_event by
+a background thread, so the caller returns as soon as the row is on disk.
+Rows are only deleted after AgentCore accepts them, which means events
+buffered before a container freeze (or a crash) are replayed on the next
+invocation. Each row carries a client token so retries are idempotent.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class EventWriter:
+    def __init__(self, client, memory_id: str, spool_path: str = '/tmp/agentcore_event_spool.db',
+                 max_attempts: int = 5, base_backoff: float = 0.5, max_backoff: float = 30.0,
+                 idle_interval: float = 5.0):
+        self.client = client
+        self.memory_id = memory_id
+        self.spool_path = spool_path
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.idle_interval = idle_interval
+
+        self._db = sqlite3.connect(spool_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS events (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   client_token TEXT NOT NULL,
+                   actor_id TEXT NOT NULL,
+                   session_id TEXT NOT NULL,
+                   event_timestamp INTEGER NOT NULL,
+                   payload TEXT NOT NULL,
+                   attempts INTEGER NOT NULL DEFAULT 0,
+                   next_attempt_at REAL NOT NULL DEFAULT 0,
+                   last_error TEXT
+               )"""
+        )
+        # Rows left by a previous process are due immediately, not after their old backoff
+        self._db.execute("UPDATE events SET next_attempt_at = 0")
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stats = {"enqueued": 0, "sent": 0, "retried": 0, "split": 0, "dropped": 0}
+
+        self.ensure_started()
+
+    def enqueue(self, actor_id: str, session_id: str, payload: list, event_timestamp: int = None):
+        """Spool one event (one or more payload items) for background delivery."""
+        if event_timestamp is None:
+            event_timestamp = int(time.time() * 1000)
+        with self._db_lock:
+            self._db.execute(
+                """INSERT INTO events (client_token, actor_id, session_id, event_timestamp, payload)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (str(uuid.uuid4()), actor_id, session_id, event_timestamp, json.dumps(payload))
+            )
+        self._stats["enqueued"] += 1
+        self.ensure_started()
+        self._wakeup.set()
+
+    def ensure_started(self):
+        """Start (or restart) the background flusher thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='event-writer', daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until the spool is drained or timeout expires. Returns True if drained."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.pending() == 0:
+                return True
+            self._wakeup.set()
+            time.sleep(0.01)
+        return self.pending() == 0
+
+    def pending(self) -> int:
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def stats(self) -> dict:
+        return dict(self._stats, pending=self.pending())
+
+    def _run(self):
+        while True:
+            try:
+                delay = self._flush_due()
+            except Exception as e:
+                print(f"Event writer error: {e}")
+                delay = self.idle_interval
+            self._wakeup.wait(timeout=delay)
+            self._wakeup.clear()
+
+    def _flush_due(self) -> float:
+        """Send every due row; return how long to sleep before the next pass."""
+        while True:
+            now = time.time()
+            with self._db_lock:
+                row = self._db.execute(
+                    """SELECT id, client_token, actor_id, session_id, event_timestamp, payload, attempts
+                       FROM events WHERE next_attempt_at <= ? ORDER BY id LIMIT 1""",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    next_due = self._db.execute("SELECT MIN(next_attempt_at) FROM events").fetchone()[0]
+                    if next_due is None:
+                        return self.idle_interval
+                    return min(max(next_due - now, 0.01), self.idle_interval)
+            self._send(*row)
+
+    def _send(self, row_id, client_token, actor_id, session_id, event_timestamp, payload, attempts):
+        items = json.loads(payload)
+        try:
+            self.client.create_event(
+                memoryId=self.memory_id,
+                actorId=actor_id,
+                sessionId=session_id,
+                eventTimestamp=event_timestamp,
+                payload=items,
+                clientToken=client_token
+            )
+        except Exception as e:
+            if len(items) > 1 and _error_code(e) == 'ValidationException':
+                # Multi-payload event rejected: fall back to one event per turn
+                self._split(row_id, actor_id, session_id, event_timestamp, items)
+                return
+            self._retry_later(row_id, attempts + 1, e)
+            return
+
+        with self._db_lock:
+            self._db.execute("DELETE FROM events WHERE id = ?", (row_id,))
+        self._stats["sent"] += 1
+
+    def _split(self, row_id, actor_id, session_id, event_timestamp, items):
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM events WHERE id = ?", (row_id,))
+            for offset, item in enumerate(items):
+                self._db.execute(
+                    """INSERT INTO events (client_token, actor_id, session_id, event_timestamp, payload)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (str(uuid.uuid4()), actor_id, session_id, event_timestamp + offset, json.dumps([item]))
+                )
+            self._db.execute("COMMIT")
+        self._stats["split"] += 1
+
+    def _retry_later(self, row_id, attempts, error):
+        if attempts >= self.max_attempts:
+            print(f"Dropping memory event {row_id} after {attempts} attempts: {error}")
+            with self._db_lock:
+                self._db.execute("DELETE FROM events WHERE id = ?", (row_id,))
+            self._stats["dropped"] += 1
+            return
+
+        backoff = min(self.base_backoff * (2 ** (attempts - 1)), self.max_backoff)
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE events SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + backoff, str(error), row_id)
+            )
+        self._stats["retried"] += 1
+
+
+def _error_code(error: Exception) -> str:
+    """botocore ClientError code, if any."""
+    return getattr(error, 'response', {}).get('Error', {}).get('Code', '')
@@ -71,7 +71,8 @@ Start-Sleep -Seconds 15
 # 3. Crear ZIP del Lambda
 Write-Host "3. Creando paquete ZIP..." -ForegroundColor Yellow
 
-Compress-Archive -Path lambda_function.py -DestinationPath lambda.zip -Force
+# metrics.py es compartido desde la raiz del repo
+Compress-Archive -Path lambda_function.py, ..\metrics.py -DestinationPath lambda.zip -Force
 
 # 4. Crear o actualizar Lambda
 Write-Host "4. Desplegando Lambda..." -ForegroundColor Yellow
@@ -6,6 +6,7 @@ import json
 import time
 import os
 from datetime import datetime
+from metrics import InvocationMetrics
 
 # Configuración
 MEMORY_ID = os.environ.get('MEMORY_ID', 'memory_bqdqb-jtj3lc48bl')
@@ -14,6 +15,12 @@ REGION = os.environ.get('AWS_REGION', 'us-east-1')
 # Cliente AgentCore
 agentcore = boto3.client('bedrock-agentcore', region_name=REGION)
 
+# Rutas conocidas; cualquier otro apiPath se mide como "unknown" para no crear dimensiones nuevas
+OPERATIONS = frozenset({
+    '/getConversationMemory', '/saveConversationEvent', '/getUserMemorySummary', '/searchMemories',
+    '/deleteUserMemory'
+})
+
 
 def lambda_handler(event, context):
     """
@@ -39,35 +46,45 @@ def lambda_handler(event, context):
         if 'properties' in body_content:
             body = {p['name']: p['value'] for p in body_content['properties']}
     
+    # Una línea EMF por invocación con la latencia de la acción
+    operation = api_path.strip('/') if api_path in OPERATIONS else 'unknown'
+    metrics = InvocationMetrics("agentcore-memory-lambda", operation)
+    
     # Router de acciones
     try:
-        if api_path == '/getConversationMemory':
-            result = get_conversation_memory(params.get('userId'), params.get('limit', 5))
-        elif api_path == '/saveConversationEvent':
-            result = save_conversation_event(
-                body.get('userId'),
-                body.get('sessionId'),
-                body.get('message'),
-                body.get('role', 'USER')
-            )
-        elif api_path == '/getUserMemorySummary':
-            result = get_user_memory_summary(params.get('userId'))
-        elif api_path == '/searchMemories':
-            result = search_memories(
-                params.get('userId'),
-                params.get('query'),
-                params.get('limit', 5)
-            )
-        elif api_path == '/deleteUserMemory':
-            result = delete_user_memory(params.get('userId'))
-        else:
-            result = {"error": f"Unknown action: {api_path}"}
+        with metrics.stage("action"):
+            if api_path == '/getConversationMemory':
+                result = get_conversation_memory(params.get('userId'), params.get('limit', 5))
+            elif api_path == '/saveConversationEvent':
+                result = save_conversation_event(
+                    body.get('userId'),
+                    body.get('sessionId'),
+                    body.get('message'),
+                    body.get('role', 'USER')
+                )
+            elif api_path == '/getUserMemorySummary':
+                result = get_user_memory_summary(params.get('userId'))
+            elif api_path == '/searchMemories':
+                result = search_memories(
+                    params.get('userId'),
+                    params.get('query'),
+                    params.get('limit', 5)
+                )
+            elif api_path == '/deleteUserMemory':
+                result = delete_user_memory(params.get('userId'))
+            else:
+                result = {"error": f"Unknown action: {api_path}"}
         
+        if isinstance(result, dict) and result.get("error"):
+            metrics.count("errors")
         return format_response(result)
         
     except Exception as e:
         print(f"Error: {e}")
+        metrics.count("errors")
         return format_response({"error": str(e)}, status_code=500)
+    finally:
+        metrics.emit()
 
 
 def get_conversation_memory(user_id: str, limit: int = 5) -> dict:
@@ -0,0 +1,247 @@
+"""
+Pluggable LLM backends for the Bible Companion.
+
+Every backend exposes stream(prompt, session_id) yielding text chunks and
+generate(prompt, session_id) returning the whole response. Routes map to
+backends through LLM_ROUTES, so a model can be swapped per route without
+touching bible_companion:
+
+    LLM_BACKEND=bedrock-converse
+    LLM_ROUTES={"devotional": "strands", "benchmark": "stub"}
+
+Both also take cache_prefix, the stable start of the prompt
+(prompt_segments.stable_prefix), and usage, a dict the backend fills with
+the provider's token counts when it reports them. Only bedrock-converse
+places prompt-cache checkpoints in the prefix; the others ignore it.
+"""
+import json
+import os
+import threading
+import time
+
+# Bedrock caches a prompt prefix only from this many tokens (Claude models: 1024-2048)
+PROMPT_CACHE_MIN_TOKENS = int(os.environ.get('PROMPT_CACHE_MIN_TOKENS', 1024))
+CHARS_PER_TOKEN = 4
+
+
+class LLMBackend:
+    name = "base"
+
+    def stream(self, prompt: str, session_id: str = None, cache_prefix: str = None, usage: dict = None):
+        """Yield response text chunks."""
+        raise NotImplementedError
+
+    def generate(self, prompt: str, session_id: str = None, cache_prefix: str = None, usage: dict = None) -> str:
+        return "".join(self.stream(prompt, session_id, cache_prefix, usage))
+
+    async def stream_async(self, prompt: str, session_id: str = None, cache_prefix: str = None,
+                           usage: dict = None):
+        """Async variant for BedrockAgentCoreApp entrypoints."""
+        for chunk in self.stream(prompt, session_id, cache_prefix, usage):
+            yield chunk
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic local backend for offline benchmarks and load tests.
+    Waits first_token_latency seconds, then emits one word per token at
+    tokens_per_second (0 means no delay between tokens).
+    """
+    name = "stub"
+
+    DEFAULT_RESPONSE = "I'm here to walk with you in faith. Let me share some thoughts and a relevant Bible verse..."
+
+    def __init__(self, first_token_latency: float = 0.0, tokens_per_second: float = 0.0, response: str = None):
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.response = response or self.DEFAULT_RESPONSE
+
+    def stream(self, prompt: str, session_id: str = None, cache_prefix: str = None, usage: dict = None):
+        if self.first_token_latency:
+            time.sleep(self.first_token_latency)
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        words = self.response.split(" ")
+        for i, word in enumerate(words):
+            if i and delay:
+                time.sleep(delay)
+            yield word if i == len(words) - 1 else word + " "
+
+
+class BedrockAgentBackend(LLMBackend):
+    """Bedrock Agent invoked through bedrock-agent-runtime with a streamed final response."""
+    name = "bedrock-agent"
+
+    def __init__(self, agent_id: str = None, agent_alias_id: str = None, region: str = None):
+        import boto3
+        self.agent_id = agent_id or os.environ.get('BEDROCK_AGENT_ID')
+        self.agent_alias_id = agent_alias_id or os.environ.get('BEDROCK_AGENT_ALIAS_ID', 'TSTALIASID')
+        self.client = boto3.client(
+            'bedrock-agent-runtime',
+            region_name=region or os.environ.get('AWS_REGION', 'us-east-1')
+        )
+
+    def stream(self, prompt: str, session_id: str = None, cache_prefix: str = None, usage: dict = None):
+        # The agent owns its prompt template, so no cache checkpoint can be placed here
+        response = self.client.invoke_agent(
+            agentId=self.agent_id,
+            agentAliasId=self.agent_alias_id,
+            sessionId=session_id or f"session-{int(time.time())}",
+            inputText=prompt,
+            streamingConfigurations={'streamFinalResponse': True}
+        )
+        for event in response['completion']:
+            if 'chunk' in event and 'bytes' in event['chunk']:
+                yield event['chunk']['bytes'].decode('utf-8')
+
+
+class BedrockConverseBackend(LLMBackend):
+    """
+    Bedrock model called directly with ConverseStream. The companion
+    instructions and the prompt's cache_prefix go in the system prompt,
+    with cachePoints after the shared part and after the user's profile
+    once they reach PROMPT_CACHE_MIN_TOKENS; the rest of the prompt is the
+    user message. usage receives the provider's
+    inputTokens, outputTokens, cacheReadInputTokens and cacheWriteInputTokens.
+    """
+    name = "bedrock-converse"
+
+    def __init__(self, model_id: str = None, region: str = None, instructions_path: str = None,
+                 max_tokens: int = None):
+        import boto3
+        self.model_id = model_id or os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-5-sonnet-20241022-v2:0')
+        self.max_tokens = max_tokens or int(os.environ.get('LLM_MAX_TOKENS', 1024))
+        self.client = boto3.client(
+            'bedrock-runtime',
+            region_name=region or os.environ.get('AWS_REGION', 'us-east-1')
+        )
+        here = os.path.dirname(os.path.abspath(__file__))
+        # The packaged companion prompt: agent_prompt_v2.txt at the repo root, prompt.txt in agents/bible-companion
+        configured = instructions_path or os.environ.get('LLM_INSTRUCTIONS_PATH')
+        candidates = [configured] if configured else [
+            os.path.join(here, 'agent_prompt_v2.txt'), os.path.join(here, 'prompt.txt')]
+        self.instructions = ""
+        for path in candidates:
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    self.instructions = f.read().strip()
+                break
+        else:
+            print(f"Companion instructions not found ({', '.join(candidates)})")
+
+    def request(self, prompt: str, cache_prefix: str = None) -> dict:
+        """
+        ConverseStream arguments: stable text in the system prompt, the turn as the user message.
+        The system prompt gets two cache checkpoints: one after the instructions and persona,
+        which every user of an avatar shares, and one after the user's profile (the last
+        block of cache_prefix), so a profile change still reuses the shared part.
+        """
+        shared = [self.instructions] if self.instructions else []
+        own = []
+        if cache_prefix and prompt.startswith(cache_prefix):
+            blocks = cache_prefix.strip().split("\n\n")
+            shared.extend(blocks[:-1])
+            own.append(blocks[-1])
+            prompt = prompt[len(cache_prefix):]
+        system = []
+        cached_chars = 0
+        for texts in (shared, own):
+            if not texts:
+                continue
+            system.extend({"text": text} for text in texts)
+            cached_chars += sum(len(text) for text in texts)
+            if cached_chars // CHARS_PER_TOKEN >= PROMPT_CACHE_MIN_TOKENS:
+                system.append({"cachePoint": {"type": "default"}})
+        return {
+            "modelId": self.model_id,
+            "system": system,
+            "messages": [{"role": "user", "content": [{"text": prompt}]}],
+            "inferenceConfig": {"maxTokens": self.max_tokens},
+        }
+
+    def stream(self, prompt: str, session_id: str = None, cache_prefix: str = None, usage: dict = None):
+        response = self.client.converse_stream(**self.request(prompt, cache_prefix))
+        for event in response['stream']:
+            if 'contentBlockDelta' in event:
+                text = event['contentBlockDelta'].get('delta', {}).get('text')
+                if text:
+                    yield text
+            elif 'metadata' in event and usage is not None:
+                usage.update(event['metadata'].get('usage', {}))
+
+
+class StrandsBackend(LLMBackend):
+    """Strands Agent, loaded lazily to keep cold starts short."""
+    name = "strands"
+
+    def __init__(self, **agent_options):
+        self.agent_options = agent_options
+        self._agent = None
+        self._lock = threading.Lock()
+
+    @property
+    def agent(self):
+        if self._agent is None:
+            with self._lock:
+                if self._agent is None:
+                    from strands import Agent
+                    self._agent = Agent(**self.agent_options)
+        return self._agent
+
+    def stream(self, prompt: str, session_id: str = None, cache_prefix: str = None, usage: dict = None):
+        # Strands only streams asynchronously; the sync path returns one chunk
+        yield str(self.agent(prompt))
+
+    async def stream_async(self, prompt: str, session_id: str = None, cache_prefix: str = None,
+                           usage: dict = None):
+        async for event in self.agent.stream_async(prompt):
+            if "data" in event:
+                yield event["data"]
+
+
+BACKENDS = {
+    StubBackend.name: StubBackend,
+    BedrockAgentBackend.name: BedrockAgentBackend,
+    BedrockConverseBackend.name: BedrockConverseBackend,
+    StrandsBackend.name: StrandsBackend,
+}
+
+# route -> backend name, e.g. {"devotional": "strands"}
+ROUTES = json.loads(os.environ.get('LLM_ROUTES', '{}'))
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def _default_options(name: str) -> dict:
+    if name == StubBackend.name:
+        return {
+            "first_token_latency": float(os.environ.get('STUB_LLM_FIRST_TOKEN_MS', 0)) / 1000,
+            "tokens_per_second": float(os.environ.get('STUB_LLM_TOKENS_PER_SECOND', 0)),
+        }
+    return {}
+
+
+def get_backend(name: str = None) -> LLMBackend:
+    """Return the shared backend instance for name (default: LLM_BACKEND)."""
+    name = name or os.environ.get('LLM_BACKEND', StubBackend.name)
+    backend = _instances.get(name)
+    if backend is None:
+        with _instances_lock:
+            backend = _instances.get(name)
+            if backend is None:
+                if name not in BACKENDS:
+                    raise ValueError(f"Unknown LLM backend: {name}")
+                backend = BACKENDS[name](**_default_options(name))
+                _instances[name] = backend
+    return backend
+
+
+def set_backend(name: str, backend: LLMBackend):
+    """Install a preconfigured backend instance (e.g. a tuned stub in benchmarks)."""
+    with _instances_lock:
+        _instances[name] = backend
+
+
+def get_backend_for_route(route: str = None) -> LLMBackend:
+    """Resolve a route to its backend via LLM_ROUTES, falling back to LLM_BACKEND."""
+    return get_backend(ROUTES.get(route))
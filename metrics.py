@@ -0,0 +1,114 @@
+"""
+Per-invocation timing metrics emitted as CloudWatch Embedded Metric Format.
+
+One InvocationMetrics object collects stage timings for a single request and
+prints one EMF JSON line when the request finishes. CloudWatch Logs turns
+that line into metrics, so no PutMetricData calls are made.
+
+    metrics = InvocationMetrics("bible-companion", "chat")
+    with metrics.stage("prompt_build"):
+        ...
+    metrics.emit()
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'BibleCompanion')
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() != 'false'
+
+
+class InvocationMetrics:
+    def __init__(self, service: str, operation: str, namespace: str = None):
+        self.service = service
+        self.operation = operation
+        self.namespace = namespace or METRICS_NAMESPACE
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.counts = {}
+        self.properties = {}
+        self._lock = threading.Lock()
+        self._emitted = False
+
+    def record(self, stage: str, elapsed_ms: float):
+        """Add elapsed milliseconds to a stage (stages may run on other threads)."""
+        with self._lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + elapsed_ms
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as stage `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def timed(self, name: str, fn=None):
+        """Wrap fn (or decorate a function) so each call is timed as stage `name`."""
+        def decorate(func):
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate(fn) if fn is not None else decorate
+
+    def count(self, name: str, value: float = 1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def record_llm_usage(self, usage: dict):
+        """
+        Count the token usage an LLM backend reported (Bedrock Converse
+        fields); prompt_cache_hits/misses only when the provider reports
+        cache reads and writes. Backends that report nothing add nothing.
+        """
+        if not usage:
+            return
+        self.count("prompt_input_tokens", usage.get('inputTokens', 0))
+        self.count("prompt_output_tokens", usage.get('outputTokens', 0))
+        if 'cacheReadInputTokens' in usage or 'cacheWriteInputTokens' in usage:
+            cache_read = usage.get('cacheReadInputTokens', 0)
+            self.count("prompt_cache_read_tokens", cache_read)
+            self.count("prompt_cache_write_tokens", usage.get('cacheWriteInputTokens', 0))
+            self.count("prompt_cache_hits" if cache_read else "prompt_cache_misses")
+
+    def set_property(self, name: str, value):
+        """Attach a searchable, non-metric field (e.g. session id) to the log line."""
+        self.properties[name] = value
+
+    def to_emf(self) -> dict:
+        with self._lock:
+            timings = dict(self.timings)
+            counts = dict(self.counts)
+        timings["total"] = (time.perf_counter() - self.started) * 1000
+
+        metric_defs = [{"Name": f"{stage}_ms", "Unit": "Milliseconds"} for stage in timings]
+        metric_defs += [{"Name": name, "Unit": "Count"} for name in counts]
+
+        document = dict(self.properties)
+        document.update({
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [["Service", "Operation"]],
+                    "Metrics": metric_defs
+                }]
+            },
+            "Service": self.service,
+            "Operation": self.operation
+        })
+        document.update({f"{stage}_ms": round(ms, 3) for stage, ms in timings.items()})
+        document.update(counts)
+        return document
+
+    def emit(self):
+        """Print the EMF line once; later calls are ignored."""
+        if self._emitted or not METRICS_ENABLED:
+            return
+        self._emitted = True
+        print(json.dumps(self.to_emf(), default=str))
+
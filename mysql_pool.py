@@ -0,0 +1,147 @@
+"""
+Process-wide MySQL connection pool.
+
+Connections are created lazily up to max_size and reused across warm
+invocations. Idle connections are pinged before reuse once they have been
+idle longer than health_check_interval, and recycled after max_lifetime.
+"""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no connection becomes available within acquire_timeout."""
+
+
+class MySQLPool:
+    def __init__(self, connect, max_size: int = 4, acquire_timeout: float = 2.0,
+                 health_check_interval: float = 30.0, max_lifetime: float = 3600.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.max_lifetime = max_lifetime
+
+        # Idle entries are (connection, created_at, last_used_at)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "discarded": 0,
+            "health_check_failures": 0,
+            "wait_timeouts": 0
+        }
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection. It goes back to the pool when the block exits
+        cleanly and is discarded if the block raises.
+        """
+        conn, created_at = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            self._discard(conn)
+            raise
+        else:
+            self._release(conn, created_at)
+
+    def stats(self) -> dict:
+        """Snapshot of pool counters for monitoring."""
+        with self._lock:
+            return dict(
+                self._stats,
+                size=self._size,
+                idle=self._idle.qsize(),
+                in_use=self._size - self._idle.qsize(),
+                max_size=self.max_size
+            )
+
+    def close_all(self):
+        """Close every idle connection (e.g. before the process exits)."""
+        while True:
+            try:
+                conn, _, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                entry = None
+
+            if entry is None:
+                with self._lock:
+                    can_create = self._size < self.max_size
+                    if can_create:
+                        self._size += 1
+                if can_create:
+                    return self._create(), time.monotonic()
+
+                # Pool is at max_size: wait for a connection to be released
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = self._idle.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    with self._lock:
+                        self._stats["wait_timeouts"] += 1
+                    raise PoolExhaustedError(f"No MySQL connection available within {self.acquire_timeout}s")
+
+            conn, created_at, last_used = entry
+            if self._is_usable(conn, created_at, last_used):
+                with self._lock:
+                    self._stats["reused"] += 1
+                return conn, created_at
+            self._discard(conn)
+
+    def _create(self):
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+            raise
+        with self._lock:
+            self._stats["created"] += 1
+        return conn
+
+    def _is_usable(self, conn, created_at: float, last_used: float) -> bool:
+        now = time.monotonic()
+        if now - created_at > self.max_lifetime:
+            return False
+        if now - last_used > self.health_check_interval:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                with self._lock:
+                    self._stats["health_check_failures"] += 1
+                return False
+        return True
+
+    def _release(self, conn, created_at: float):
+        try:
+            # End any open read transaction so the next borrower
+            # does not see a stale REPEATABLE READ snapshot
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        self._idle.put((conn, created_at, time.monotonic()))
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._stats["discarded"] += 1
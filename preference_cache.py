@@ -0,0 +1,72 @@
+"""
+Bounded in-process cache for user preferences.
+
+Entries expire after ttl seconds and the least recently used entry is
+evicted once max_size is reached. Unknown users are cached as negative
+entries with their own (shorter) negative_ttl.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class PreferenceCache:
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0, negative_ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        # user_id -> (value, expires_at, negative)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            value, expires_at, negative = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["negative_hits" if negative else "hits"] += 1
+            return value
+
+    def put(self, key, value, negative: bool = False):
+        """Store a value; negative entries mark users that do not exist."""
+        expires_at = time.monotonic() + (self.negative_ttl if negative else self.ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at, negative)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key):
+        """Drop an entry after its underlying record was written."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring."""
+        with self._lock:
+            return dict(self._stats, size=len(self._entries), max_size=self.max_size)
+
+
+# Process-wide cache shared by every get_user_preferences in this package
+preferences_cache = PreferenceCache(
+    max_size=int(os.environ.get('PREFERENCES_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('PREFERENCES_CACHE_TTL', 300)),
+    negative_ttl=float(os.environ.get('PREFERENCES_CACHE_NEGATIVE_TTL', 60))
+)
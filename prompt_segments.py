@@ -0,0 +1,49 @@
+"""
+Prompt layout for the companion, ordered from most to least stable:
+
+    system   static instructions, identical for every request
+    persona  companion identity (avatar), shared by every user of that avatar
+    profile  the user's profile, changes only when their preferences do
+    turn     conversation type, packed context and the user message
+
+Provider-side prompt caching matches on an exact prefix, so nothing that
+changes per turn may appear before the turn segment. The bedrock-converse
+backend puts the companion instructions and stable_prefix() in the system
+prompt, ahead of a cache checkpoint; consecutive turns of a user then reuse
+it, and the provider's cache read/write token counts are recorded.
+"""
+from collections import namedtuple
+
+SYSTEM_SEGMENT = (
+    "Instructions: Follow your Bible Companion prompt exactly. The COMPANION IDENTITY and USER PROFILE "
+    "sections below describe who you are and who you are talking to; CURRENT TURN holds this message."
+)
+
+PromptSegments = namedtuple("PromptSegments", "system persona profile turn")
+
+
+def persona_segment(preferences: dict) -> str:
+    return f"""COMPANION IDENTITY:
+- avatarName: {preferences.get('avatarName') or 'Not specified'}"""
+
+
+def profile_segment(preferences: dict) -> str:
+    return f"""USER PROFILE (from database):
+- firstName: {preferences.get('firstName', 'Friend')}
+- bibleVersion: {preferences.get('bibleVersion', 'NIV')}
+- denomination: {preferences.get('denomination') or 'Christian'}
+- birthday: {preferences.get('birthday') or 'Not specified'}"""
+
+
+def build_segments(preferences: dict, turn: str) -> PromptSegments:
+    return PromptSegments(SYSTEM_SEGMENT, persona_segment(preferences), profile_segment(preferences),
+                          "CURRENT TURN:\n" + turn.strip())
+
+
+def render(segments: PromptSegments) -> str:
+    return "\n\n".join(segment for segment in segments if segment)
+
+
+def stable_prefix(segments: PromptSegments) -> str:
+    """Everything before the turn segment: the part a provider cache can reuse."""
+    return render(segments._replace(turn="")) + "\n\n"
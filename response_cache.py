@@ -0,0 +1,250 @@
+"""
+Semantic cache for companion responses.
+
+Many questions are near-identical across users ("verse for anxiety", "what
+does John 3:16 mean"). A response is cached under its partition (Bible
+version, denomination, avatar, conversation type) and a cheap local
+embedding of the normalized question: a bag of content words and word
+bigrams, compared by cosine similarity. A lookup hits when a cached question
+in the same partition is at least RESPONSE_CACHE_THRESHOLD similar and cites
+exactly the same Bible references.
+
+Only answers that are not about the asking user are stored. A turn whose
+prompt used personal context, i.e. the packer kept recent turns or memory
+records that bear on this question (context["personal_items"]), is
+answered for that user alone; unrelated history or a birthday merely being
+on the profile does not count. Nor is an answer stored when it mentions the
+user's birthday or their name anywhere but a leading greeting. Names inside
+Bible references and quoted scripture ("John 3:16", "Grace be to you") are
+scripture, not the user. The cached answer itself is name-free: the greeting
+("Hi John! ") is split off and kept as a shape with a placeholder, then
+rendered with the new user's name on a hit. Turns that refer to personal
+history ("remember what I told you", "like last time") or follow up on the
+conversation ("tell me more") always go to the model and are never stored.
+
+Lookups need only the question and preferences, so callers check the cache
+before loading memories into a prompt:
+
+    response = response_cache.lookup(input_text, preferences)
+    if response is None:
+        response = generate(build_contextual_prompt(input_text, preferences, context))
+        response_cache.store(input_text, preferences, response, context=context)
+
+Entries expire after ttl seconds; the least recently used entry is evicted
+once max_entries is reached.
+"""
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from bible_references import REFERENCE_PATTERN, find_references, format_reference
+
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() != 'false'
+RESPONSE_CACHE_THRESHOLD = float(os.environ.get('RESPONSE_CACHE_THRESHOLD', 0.9))
+
+NAME_PLACEHOLDER = "\x00firstName\x00"
+DEFAULT_NAME = "Friend"
+
+_SALUTATION = r"\s*(?i:(?:hi|hello|hey|hola|dear|welcome back|good (?:morning|afternoon|evening)|buen(?:os|as) \w+)[ ,]+)?"
+_GREETING_END = r"\s*[,!.:;\u2014\u2013-]+\s*"
+_QUOTE_PATTERN = re.compile(r'"[^"]*"|\u201c[^\u201d]*\u201d')
+_BIRTHDAY_PATTERN = re.compile(r"\b(?:birthday|cumplea\u00f1os)\b", re.IGNORECASE)
+
+_HISTORY_PATTERN = re.compile(
+    r"\b(?:remember|last time|yesterday|earlier|before|you (?:said|told|mentioned|suggested)"
+    r"|we (?:talked|discussed|spoke|prayed)|i (?:told|mentioned|said)|as i said|our (?:last|previous)"
+    r"|my (?:last|previous) (?:message|question)|again)\b",
+    re.IGNORECASE)
+_FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(?:and|but|so|also|then|what about|how about|tell me more|more|why|that|this|it|those|these)\b"
+    r"|\b(?:that|this) (?:verse|passage|prayer|one)\b",
+    re.IGNORECASE)
+
+_WORD_PATTERN = re.compile(r"[^\W\d_]+")
+STOPWORDS = frozenset(
+    "a an the and or but of to in on for with about from at by is are was be am do does did can could "
+    "would should will shall i me my im you your please give show tell share some any one what which "
+    "who how it this that there here just really very so".split())
+
+
+def normalize_intent(text: str) -> tuple:
+    """(content words, canonical references) of a question."""
+    references = tuple(sorted(format_reference(reference) for reference in find_references(text)))
+    words = [word for word in _WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+    # Fold simple plurals so "verses for worries" matches "verse for worry"
+    words = [word[:-1] if len(word) > 4 and word.endswith("s") and not word.endswith("ss") else word
+             for word in words]
+    return tuple(words), references
+
+
+def embed(words: tuple) -> dict:
+    """Sparse unit vector over words and word bigrams."""
+    features = Counter(words)
+    features.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    norm = math.sqrt(sum(count * count for count in features.values()))
+    return {feature: count / norm for feature, count in features.items()} if norm else {}
+
+
+def cosine(left: dict, right: dict) -> float:
+    if len(left) > len(right):
+        left, right = right, left
+    return sum(weight * right.get(feature, 0.0) for feature, weight in left.items())
+
+
+def bypass_reason(input_text: str):
+    """Why a turn must not use the cache, or None."""
+    if _HISTORY_PATTERN.search(input_text):
+        return "personal_history"
+    if _FOLLOW_UP_PATTERN.search(input_text):
+        return "follow_up"
+    return None
+
+
+def personal_context(context: dict) -> bool:
+    """Whether the prompt used recent turns or memory records relevant to the question (or is unknown)."""
+    return context is None or context.get("personal_items", 1) > 0
+
+
+def split_greeting(response: str, name: str):
+    """
+    (greeting shape with NAME_PLACEHOLDER or "", name-free body), or None when
+    the name appears in the body outside references and quoted scripture.
+    """
+    greeting = ""
+    match = re.match(_SALUTATION + re.escape(name) + r"\b" + _GREETING_END, response)
+    if match:
+        greeting = response[:match.end()].replace(name, NAME_PLACEHOLDER)
+        response = response[match.end():]
+    scripture = REFERENCE_PATTERN.sub(" ", _QUOTE_PATTERN.sub(" ", response))
+    if re.search(rf"\b{re.escape(name)}\b", scripture):
+        return None
+    return greeting, response
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 2048, ttl: float = 3600.0, threshold: float = RESPONSE_CACHE_THRESHOLD,
+                 max_per_partition: int = 256, enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.max_per_partition = max_per_partition
+        self.enabled = enabled
+
+        # (partition, words, references) -> (vector, greeting, body, expires_at)
+        self._entries = OrderedDict()
+        # partition -> keys in that partition, scanned for similar questions
+        self._partitions = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "similar_hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "personal": 0,
+                       "evictions": 0}
+
+    @staticmethod
+    def partition(preferences: dict, conversation_type: str = "") -> tuple:
+        return (
+            (preferences.get('bibleVersion') or 'NIV').upper(),
+            preferences.get('denomination') or '',
+            preferences.get('avatarName') or '',
+            conversation_type,
+        )
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._partitions.get(key[0])
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self._partitions[key[0]]
+
+    def lookup(self, input_text: str, preferences: dict, conversation_type: str = ""):
+        """Cached response rendered for this user, or None (miss or bypass)."""
+        if not self.enabled:
+            return None
+        if bypass_reason(input_text):
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+
+        partition = self.partition(preferences, conversation_type)
+        words, references = normalize_intent(input_text)
+        key = (partition, words, references)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[3] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._render(entry, preferences)
+
+            vector = embed(words)
+            best_key, best_score = None, self.threshold
+            for candidate in list(self._partitions.get(partition, ())):
+                candidate_vector, _, _, expires_at = self._entries[candidate]
+                if expires_at <= now:
+                    self._remove(candidate)
+                    continue
+                if candidate[2] != references:
+                    continue
+                score = cosine(vector, candidate_vector)
+                if score >= best_score:
+                    best_key, best_score = candidate, score
+            if best_key is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self._stats["similar_hits"] += 1
+            return self._render(self._entries[best_key], preferences)
+
+    def store(self, input_text: str, preferences: dict, response: str, conversation_type: str = "",
+              context: dict = None):
+        """
+        Cache a generated response unless the turn or the answer is personal, or it is empty.
+        context is the prompt's context (see personal_context); without it nothing is stored.
+        """
+        if not self.enabled or not response or not response.strip() or bypass_reason(input_text):
+            return
+        split = None
+        if not personal_context(context) and not _BIRTHDAY_PATTERN.search(response):
+            split = split_greeting(response, preferences.get('firstName') or DEFAULT_NAME)
+        if split is None:
+            with self._lock:
+                self._stats["personal"] += 1
+            return
+        partition = self.partition(preferences, conversation_type)
+        words, references = normalize_intent(input_text)
+        if not words and not references:
+            return
+        key = (partition, words, references)
+        entry = (embed(words), split[0], split[1], time.monotonic() + self.ttl)
+        with self._lock:
+            self._remove(key)
+            while len(self._partitions.get(partition, ())) >= self.max_per_partition:
+                self._remove(next(iter(self._partitions[partition])))
+                self._stats["evictions"] += 1
+            self._entries[key] = entry
+            self._partitions.setdefault(partition, OrderedDict())[key] = None
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    @staticmethod
+    def _render(entry: tuple, preferences: dict) -> str:
+        greeting = entry[1].replace(NAME_PLACEHOLDER, preferences.get('firstName') or DEFAULT_NAME)
+        return greeting + entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._partitions.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 2048)),
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 3600))
+)
@@ -0,0 +1,225 @@
+"""
+Local lexicon-based sentiment scoring.
+
+Text is tokenized once and each token is looked up in a weighted lexicon
+(terms ending in "*" are stems, as in themes.py). A negation word ("not",
+"never", "don't") flips and dampens the positive terms in the next few
+tokens ("not happy" is mildly negative) and damps negative ones toward
+neutral ("not sad" is not happy). "stop", "quit" and "help" end a negation
+("can't stop worrying" is still worrying), and some negations are
+emphatic: "could ... be" before a comparative ("couldn't be happier") and
+"never" before "so"/"more" ("never felt so alone"). An intensifier
+("very", "so", "slightly") scales the term after it. Clause punctuation
+ends both windows. The summed weight is squashed into a
+score in [-1, 1] and labelled positive / struggling / neutral.
+
+Everything runs in-process: no Comprehend call, just a regex pass and
+dict lookups per message.
+
+    >>> sentiment_scorer.score("I'm not feeling hopeful, just really anxious")
+    Sentiment(score=-0.7027, label='struggling', positive=0.0, negative=3.825)
+"""
+import math
+import re
+from collections import namedtuple
+
+# term -> weight; negative weights mark struggle
+DEFAULT_LEXICON = {
+    # positive
+    "bless*": 1.5, "grateful": 1.5, "gratitude": 1.5, "thankful": 1.5, "thank*": 1.0, "joy*": 2.0,
+    "peace*": 1.5, "hope": 1.2, "hopeful*": 1.5, "love": 1.2, "loved": 1.2, "loving": 1.2,
+    "happy": 1.5, "happier": 1.5, "glad": 1.2, "comfort*": 1.0, "encourag*": 1.2, "strong": 0.8, "strength*": 0.8,
+    "calm*": 1.0, "content": 0.8, "rejoic*": 2.0, "healed": 1.5, "heal*": 1.0, "better": 0.8,
+    "good": 0.8, "great": 1.2, "wonderful": 1.8, "amazing": 1.8, "excited": 1.5, "confident": 1.2,
+    "forgiven": 1.2, "free": 0.8, "safe": 1.0, "trust*": 0.8, "faithful": 0.8, "praise*": 1.0,
+    # negative
+    "struggl*": -1.5, "worr*": -1.5, "anxi*": -1.8, "sad": -1.5, "sadness": -1.5, "lost": -1.2,
+    "angry": -1.8, "anger": -1.5, "afraid": -1.5, "fear*": -1.5, "scared": -1.5, "stress*": -1.5,
+    "depress*": -2.2, "hopeless*": -2.5, "despair*": -2.5, "lonely": -1.8, "loneliness": -1.8,
+    "alone": -1.0, "hurt*": -1.5, "pain*": -1.5, "grief": -2.0, "griev*": -2.0, "mourn*": -1.8,
+    "guilt*": -1.5, "shame*": -1.8, "ashamed": -1.8, "doubt*": -1.0, "confus*": -1.0,
+    "tired": -0.8, "exhausted": -1.2, "overwhelm*": -1.8, "broken": -1.8, "empty": -1.2,
+    "bitter*": -1.5, "resent*": -1.5, "sick": -1.0, "suffer*": -1.8, "cry*": -1.2, "tears": -1.0,
+    "bad": -1.0, "terrible": -2.0, "awful": -2.0, "worse": -1.2, "worst": -1.8, "hate*": -2.0,
+    "panic*": -2.0, "nervous*": -1.2, "weak": -0.8, "unworthy": -1.8, "abandon*": -1.8,
+}
+
+NEGATIONS = frozenset({
+    "not", "no", "never", "nothing", "nobody", "none", "neither", "nor", "without", "hardly",
+    "barely", "cannot", "cant", "dont", "doesnt", "didnt", "isnt", "arent", "wasnt", "werent",
+    "wont", "wouldnt", "shouldnt", "couldnt", "havent", "hasnt", "aint",
+})
+
+# After a negation these keep the negated verb's meaning: "can't stop worrying"
+NEGATION_BREAKERS = frozenset({"stop", "quit", "help"})
+# "could not be happier", "can't be better": a negated can/could + "be" + comparative is emphatic
+MODALS = frozenset({"can", "could"})
+MODAL_NEGATIONS = frozenset({"cant", "cannot", "couldnt"})
+COMPARATIVES = frozenset({"happier", "better", "calmer", "stronger", "safer", "closer"})
+# "never felt so alone", "never been more grateful": "never" + one of these intensifies instead
+NEVER_EMPHASIS = frozenset({"so", "more"})
+
+# word -> multiplier for the next sentiment term
+INTENSIFIERS = {
+    "very": 1.5, "really": 1.5, "so": 1.4, "too": 1.3, "extremely": 2.0, "incredibly": 1.8,
+    "deeply": 1.6, "truly": 1.4, "totally": 1.5, "completely": 1.6, "absolutely": 1.7,
+    "always": 1.3, "constantly": 1.5, "more": 1.2, "most": 1.4, "super": 1.5, "quite": 1.2,
+    "slightly": 0.5, "somewhat": 0.6, "little": 0.6, "kinda": 0.6,
+}
+
+NEGATION_WINDOW = 3        # tokens after a negation that it reaches
+INTENSIFIER_WINDOW = 2     # tokens after an intensifier that it reaches
+NEGATION_FACTOR = -0.75    # "not happy" is negative, but less so than "sad"
+NEGATED_NEGATIVE_FACTOR = 0.1  # "not sad" is close to neutral, not happy
+NORMALIZATION_ALPHA = 15.0  # score = total / sqrt(total^2 + alpha)
+LABEL_THRESHOLD = 0.05
+
+Sentiment = namedtuple("Sentiment", "score label positive negative")
+
+# Words, with apostrophes folded in ("don't" -> "dont"), or clause punctuation
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*|[.!?;:,\x00]")
+_CLAUSE_BREAKS = frozenset(".!?;:,")
+_SEPARATOR = "\x00"
+
+
+def label_for(score: float) -> str:
+    if score >= LABEL_THRESHOLD:
+        return "positive"
+    if score <= -LABEL_THRESHOLD:
+        return "struggling"
+    return "neutral"
+
+
+class SentimentScorer:
+    def __init__(self, lexicon: dict = None):
+        lexicon = lexicon or DEFAULT_LEXICON
+        self._exact = {}
+        self._stems = {}
+        for term, weight in lexicon.items():
+            term = term.lower().strip()
+            if term.endswith("*"):
+                self._stems[term[:-1]] = float(weight)
+            else:
+                self._exact[term] = float(weight)
+        self._stem_lengths = sorted({len(stem) for stem in self._stems}, reverse=True)
+        self._cache = {}
+
+    def _weight(self, token: str):
+        """Lexicon weight for a token (exact match first, then longest stem), memoized."""
+        try:
+            return self._cache[token]
+        except KeyError:
+            pass
+        weight = self._exact.get(token)
+        if weight is None:
+            for length in self._stem_lengths:
+                if length <= len(token):
+                    weight = self._stems.get(token[:length])
+                    if weight is not None:
+                        break
+        if len(self._cache) < 50000:
+            self._cache[token] = weight
+        return weight
+
+    def _accumulate(self, tokens, totals: list):
+        """
+        Walk tokens once, adding (positive, negative) sums into totals[i] for
+        message i. The separator token advances to the next message.
+        """
+        index = 0
+        positive = negative = 0.0
+        negation_left = intensifier_left = 0
+        multiplier = 1.0
+        # the current negation word; modal: it is "can't"/"could not"; emphatic: ... followed by "be"
+        negator = None
+        modal = emphatic = False
+        previous = None
+        for token in tokens:
+            if len(token) == 1 and token in _CLAUSE_BREAKS:
+                negation_left = intensifier_left = 0
+                previous = None
+                continue
+            if token == _SEPARATOR:
+                totals[index] = (positive, negative)
+                index += 1
+                positive = negative = 0.0
+                negation_left = intensifier_left = 0
+                previous = None
+                continue
+            token = token.replace("'", "").replace("’", "")
+            if token in NEGATIONS:
+                negation_left = NEGATION_WINDOW
+                negator = token
+                modal = token in MODAL_NEGATIONS or previous in MODALS
+                emphatic = False
+                previous = token
+                continue
+            previous = token
+            if negation_left and token in NEGATION_BREAKERS:
+                negation_left = 0
+                continue
+            if negation_left and modal and token == "be":
+                emphatic = True
+            boost = INTENSIFIERS.get(token)
+            if boost is not None:
+                if negation_left and negator == "never" and token in NEVER_EMPHASIS:
+                    negation_left = 0
+                multiplier = boost if intensifier_left == 0 else multiplier * boost
+                intensifier_left = INTENSIFIER_WINDOW
+                continue
+
+            weight = self._weight(token)
+            if weight is not None:
+                if intensifier_left:
+                    weight *= multiplier
+                    intensifier_left = 0
+                if negation_left and not (emphatic and token in COMPARATIVES):
+                    weight *= NEGATION_FACTOR if weight > 0 else NEGATED_NEGATIVE_FACTOR
+                if weight > 0:
+                    positive += weight
+                else:
+                    negative -= weight
+            if negation_left:
+                negation_left -= 1
+            if intensifier_left:
+                intensifier_left -= 1
+        totals[index] = (positive, negative)
+
+    @staticmethod
+    def _result(positive: float, negative: float) -> Sentiment:
+        total = positive - negative
+        score = total / math.sqrt(total * total + NORMALIZATION_ALPHA) if total else 0.0
+        return Sentiment(round(score, 4), label_for(score), round(positive, 4), round(negative, 4))
+
+    def score(self, text: str) -> Sentiment:
+        return self.score_tokens(_TOKEN_PATTERN.findall(text.lower()))
+
+    def score_tokens(self, tokens) -> Sentiment:
+        """Score already-lowercased word and clause-punctuation tokens."""
+        totals = [(0.0, 0.0)]
+        self._accumulate(tokens, totals)
+        return self._result(*totals[0])
+
+    def label(self, text: str) -> str:
+        return self.score(text).label
+
+    def score_batch(self, texts: list) -> list:
+        """Score many messages with a single tokenizer pass over their concatenation."""
+        if not texts:
+            return []
+        totals = [(0.0, 0.0)] * len(texts)
+        joined = _SEPARATOR.join(text.lower().replace(_SEPARATOR, " ") for text in texts)
+        self._accumulate(_TOKEN_PATTERN.findall(joined), totals)
+        return [self._result(positive, negative) for positive, negative in totals]
+
+    def summarize_batch(self, texts: list) -> dict:
+        """Aggregate scores for analytics: mean score and label counts."""
+        results = self.score_batch(texts)
+        labels = {"positive": 0, "neutral": 0, "struggling": 0}
+        for result in results:
+            labels[result.label] += 1
+        mean = sum(result.score for result in results) / len(results) if results else 0.0
+        return {"count": len(results), "mean_score": round(mean, 4), "labels": labels}
+
+
+sentiment_scorer = SentimentScorer()
@@ -0,0 +1,115 @@
+"""
+Per-session ring buffer of recent conversation events.
+
+AgentCore routes every turn of a session to the same container, and that
+container writes each turn itself (save_to_memory), so after the first read
+it already knows the session's recent events. The buffer keeps the last
+max_events events per session in the shape list_events returns:
+
+    get_recent_events:  buffered = session_events.get(user_id, session_id)
+                        if buffered is None: buffered = session_events.fill(..., list_events(...))
+    save_to_memory:     session_events.append(user_id, session_id, payload, event_timestamp)
+
+A session is served from the buffer only once it has been filled from
+AgentCore (appends alone never make it warm) and until stale_after seconds
+have passed since that read; then the next get reconciles with list_events.
+Local events newer than anything AgentCore returned are kept on reconcile,
+since the event writer may not have delivered them yet.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+
+def _epoch(value) -> float:
+    """eventTimestamp (datetime, epoch millis or ISO string) as epoch seconds."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return value / 1000.0
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class SessionEventBuffer:
+    def __init__(self, max_events: int = 10, max_sessions: int = 1024, stale_after: float = 300.0):
+        self.max_events = max_events
+        self.max_sessions = max_sessions
+        self.stale_after = stale_after
+
+        # (actor_id, session_id) -> [deque of events oldest first, synced_at or None]
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "cold": 0, "stale": 0, "fills": 0, "appends": 0, "evictions": 0}
+
+    def _session(self, key):
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = [deque(maxlen=self.max_events), None]
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._stats["evictions"] += 1
+        self._sessions.move_to_end(key)
+        return session
+
+    def get(self, actor_id: str, session_id: str):
+        """Buffered events newest first, or None when the session must be read from AgentCore."""
+        with self._lock:
+            session = self._sessions.get((actor_id, session_id))
+            if session is None or session[1] is None:
+                self._stats["cold"] += 1
+                return None
+            if time.monotonic() - session[1] >= self.stale_after:
+                self._stats["stale"] += 1
+                return None
+            self._sessions.move_to_end((actor_id, session_id))
+            self._stats["hits"] += 1
+            return list(reversed(session[0]))
+
+    def fill(self, actor_id: str, session_id: str, events: list) -> list:
+        """Reconcile with events just read from list_events; returns the merged events newest first."""
+        events = sorted(events, key=lambda event: _epoch(event.get('eventTimestamp')))
+        newest = _epoch(events[-1].get('eventTimestamp')) if events else 0.0
+        with self._lock:
+            session = self._session((actor_id, session_id))
+            unsent = [event for event in session[0] if _epoch(event.get('eventTimestamp')) > newest]
+            session[0].clear()
+            session[0].extend(events + unsent)
+            session[1] = time.monotonic()
+            self._stats["fills"] += 1
+            return list(reversed(session[0]))
+
+    def append(self, actor_id: str, session_id: str, payload: list, event_timestamp: int):
+        """Record an event this container is writing (event_timestamp in epoch millis)."""
+        event = {
+            "actorId": actor_id,
+            "sessionId": session_id,
+            "eventTimestamp": datetime.fromtimestamp(event_timestamp / 1000.0, timezone.utc),
+            "payload": payload,
+        }
+        with self._lock:
+            self._session((actor_id, session_id))[0].append(event)
+            self._stats["appends"] += 1
+
+    def invalidate(self, actor_id: str, session_id: str):
+        with self._lock:
+            self._sessions.pop((actor_id, session_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, sessions=len(self._sessions))
+
+
+session_events = SessionEventBuffer(
+    max_events=int(os.environ.get('SESSION_EVENTS_MAX', 10)),
+    max_sessions=int(os.environ.get('SESSION_EVENTS_SESSIONS', 1024)),
+    stale_after=float(os.environ.get('SESSION_EVENTS_STALE_AFTER', 300))
+)
@@ -0,0 +1,142 @@
+"""
+Rolling session summaries.
+
+Each interaction is folded into its session's RollingSessionSummary as it
+is saved: theme counters, the verses shared (first mention order) and the
+first few significant user inputs. The interaction count comes from the
+same state, so deciding whether a session is due and producing its
+long-term summary never re-reads the session:
+
+    rolling = session_summaries.observe(session_id, input_text, metadata)
+    if rolling.count % SUMMARY_INTERVAL == 0:
+        save_long_term_memory(content=rolling.summary(), ...)
+
+Themes are ranked by how many interactions mentioned them (ties by first
+mention). Per turn cost is bounded by the size of the theme lexicon, not
+the length of the session. State lives in the container that serves the
+session; AgentCore keeps a session on one container. When a session is
+first seen by a container (a restart or recycle mid-session), observe (or
+seed, for a session that is ended without a new turn) calls its seed once
+to fold the interactions already stored for the session, so the count and
+summary carry on where they left off.
+"""
+import os
+import threading
+from collections import Counter, OrderedDict
+
+SUMMARY_INTERVAL = int(os.environ.get('SUMMARY_INTERVAL', 10))
+# User inputs longer than this are key points; at most MAX_KEY_POINTS are kept
+KEY_POINT_MIN_CHARS = 50
+KEY_POINT_MAX_CHARS = 100
+MAX_KEY_POINTS = 3
+SUMMARY_TOP_N = 3
+
+
+class RollingSessionSummary:
+    def __init__(self):
+        self.count = 0
+        self.themes = Counter()
+        # theme -> interaction index of its first mention, the ranking tie-break
+        self._first_seen = {}
+        # canonical reference -> None, in first mention order
+        self.verses = OrderedDict()
+        self.key_points = []
+
+    def add(self, user_input: str, metadata: dict):
+        """Fold one interaction (with its analysis metadata) into the summary."""
+        self.count += 1
+        for theme in dict.fromkeys(metadata.get('spiritual_themes', [])):
+            self.themes[theme] += 1
+            self._first_seen.setdefault(theme, self.count)
+        for verse in metadata.get('verses_shared', []):
+            self.verses.setdefault(verse, None)
+        if len(self.key_points) < MAX_KEY_POINTS and len(user_input) > KEY_POINT_MIN_CHARS:
+            self.key_points.append(
+                user_input[:KEY_POINT_MAX_CHARS] + "..." if len(user_input) > KEY_POINT_MAX_CHARS else user_input)
+
+    def top_themes(self, n: int = SUMMARY_TOP_N) -> list:
+        ranked = sorted(self.themes, key=lambda theme: (-self.themes[theme], self._first_seen[theme]))
+        return ranked[:n]
+
+    def top_verses(self, n: int = SUMMARY_TOP_N) -> list:
+        return list(self.verses)[:n]
+
+    def summary(self) -> str:
+        """Concise long-term summary: "Themes: ... | Verses: ... | Key discussion: ..."."""
+        if not self.count:
+            return "No interactions in session"
+        summary_parts = []
+        if self.themes:
+            summary_parts.append(f"Themes: {', '.join(self.top_themes())}")
+        if self.verses:
+            summary_parts.append(f"Verses: {', '.join(self.top_verses())}")
+        if self.key_points:
+            summary_parts.append(f"Key discussion: {self.key_points[0]}")
+        return " | ".join(summary_parts)
+
+
+class SessionSummaries:
+    def __init__(self, max_sessions: int = 1024):
+        self.max_sessions = max_sessions
+        # session_id -> RollingSessionSummary, least recently used first
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, session_id: str, user_input: str, metadata: dict, seed=None) -> RollingSessionSummary:
+        """
+        Add an interaction to its session and return the session's summary.
+        seed() returns the session's stored interactions (excluding this one)
+        and is only called the first time this container sees the session.
+        """
+        if seed is not None:
+            self.seed(session_id, seed)
+        with self._lock:
+            rolling = self._install(session_id, RollingSessionSummary())
+            rolling.add(user_input, metadata)
+            return rolling
+
+    def seed(self, session_id: str, seed):
+        """
+        The session's summary; the first time this container sees the session
+        it is built from seed(), the session's stored interactions. None if
+        seed() fails.
+        """
+        rolling = self.get(session_id)
+        if rolling is not None:
+            return rolling
+        try:
+            seeded = summarize_interactions(seed())
+        except Exception as e:
+            print(f"Error seeding session summary for {session_id}: {e}")
+            return None
+        with self._lock:
+            return self._install(session_id, seeded)
+
+    def _install(self, session_id: str, rolling: RollingSessionSummary) -> RollingSessionSummary:
+        """The session's summary, or rolling if it has none yet (call with the lock held)."""
+        existing = self._sessions.get(session_id)
+        if existing is None:
+            existing = self._sessions[session_id] = rolling
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return existing
+
+    def get(self, session_id: str):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+def summarize_interactions(interactions: list) -> RollingSessionSummary:
+    """Rolling summary of stored interactions ({"user_input": ..., "metadata": {...}})."""
+    rolling = RollingSessionSummary()
+    for interaction in interactions:
+        rolling.add(interaction.get('user_input', ''), interaction.get('metadata', {}))
+    return rolling
+
+
+session_summaries = SessionSummaries(max_sessions=int(os.environ.get('SESSION_SUMMARIES_MAX', 1024)))
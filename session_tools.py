@@ -3,10 +3,10 @@ from agentcore_runtime import summarize_and_save_session
 
 @Tool(name="end_session")
 def end_session(user_id: str, session_id: str) -> dict:
-    """Explicitly end session and create summary."""
+    """Explicitly end session; its summary is queued and saved in the background."""
     try:
-        summarize_and_save_session(user_id, session_id)
-        return {"success": True, "message": "Session summarized and saved"}
+        queued = summarize_and_save_session(user_id, session_id)
+        return {"success": True, "message": "Session summary queued" if queued else "Session summary already queued or saved"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
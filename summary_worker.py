@@ -0,0 +1,181 @@
+"""
+Background worker for session summaries and long-term memory writes.
+
+Summaries are queued from the request path and written by a daemon thread,
+so the turn that crosses a summary checkpoint (or end_session) returns
+without waiting on save_long_term_memory.
+
+Jobs are spooled to SQLite in /tmp, like the event writer's events, so jobs
+queued before a container freeze or recycle are replayed on the next start
+instead of lost. A row is only deleted once its write succeeded or it ran
+out of attempts.
+
+Jobs are idempotent per (session, checkpoint): a checkpoint that is already
+queued or written is not queued again, and failed writes are retried by the
+worker itself with backoff, never re-enqueued by the caller. Written
+checkpoints are remembered in the spool (the newest max_completed of them),
+which covers retries and repeated end_session calls within a container.
+
+    summary_worker = SummaryWorker(write=save_summary_job)
+    summary_worker.enqueue(user_id, session_id, checkpoint=10, summary="Themes: ...")
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# summary is None when it has to be built from the stored session
+SummaryJob = namedtuple("SummaryJob", "user_id session_id checkpoint summary")
+
+
+def checkpoint_key(session_id: str, checkpoint) -> str:
+    return f"{session_id}#{checkpoint}"
+
+
+class SummaryWorker:
+    def __init__(self, write, spool_path: str = '/tmp/summary_spool.db', max_queue: int = 1000,
+                 max_attempts: int = 3, base_backoff: float = 0.5, max_completed: int = 4096,
+                 idle_interval: float = 5.0):
+        self.write = write
+        self.spool_path = spool_path
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_completed = max_completed
+        self.idle_interval = idle_interval
+
+        self._db = sqlite3.connect(spool_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                   key TEXT PRIMARY KEY,
+                   user_id TEXT NOT NULL,
+                   session_id TEXT NOT NULL,
+                   checkpoint TEXT NOT NULL,
+                   summary TEXT,
+                   attempts INTEGER NOT NULL DEFAULT 0,
+                   next_attempt_at REAL NOT NULL DEFAULT 0,
+                   queued_at REAL NOT NULL
+               )"""
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completed (key TEXT PRIMARY KEY, completed_at REAL NOT NULL)"
+        )
+        # Jobs left by a previous process are due immediately, not after their old backoff
+        self._db.execute("UPDATE jobs SET next_attempt_at = 0")
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stats = {"enqueued": 0, "duplicates": 0, "written": 0, "retried": 0, "dropped": 0, "rejected": 0}
+
+        self.ensure_started()
+
+    def enqueue(self, user_id: str, session_id: str, checkpoint, summary: str = None) -> bool:
+        """Queue a summary write; False if this checkpoint is already queued/written or the queue is full."""
+        key = checkpoint_key(session_id, checkpoint)
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM completed WHERE key = ?", (key,)).fetchone():
+                self._stats["duplicates"] += 1
+                return False
+            if self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] >= self.max_queue:
+                print(f"Summary queue full, dropping {key}")
+                self._stats["rejected"] += 1
+                return False
+            inserted = self._db.execute(
+                """INSERT OR IGNORE INTO jobs (key, user_id, session_id, checkpoint, summary, queued_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (key, user_id, session_id, json.dumps(checkpoint), summary, time.time())
+            ).rowcount
+            if not inserted:
+                self._stats["duplicates"] += 1
+                return False
+            self._stats["enqueued"] += 1
+        self.ensure_started()
+        self._wakeup.set()
+        return True
+
+    def ensure_started(self):
+        """Start (or restart) the background worker thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='summary-worker', daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until every queued job is finished or timeout expires. Returns True if drained."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.pending() == 0:
+                return True
+            self._wakeup.set()
+            time.sleep(0.01)
+        return self.pending() == 0
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def stats(self) -> dict:
+        return dict(self._stats, pending=self.pending())
+
+    def _run(self):
+        while True:
+            try:
+                delay = self._process_due()
+            except Exception as e:
+                print(f"Summary worker error: {e}")
+                delay = self.idle_interval
+            self._wakeup.wait(timeout=delay)
+            self._wakeup.clear()
+
+    def _process_due(self) -> float:
+        """Write every due job; return how long to sleep before the next pass."""
+        while True:
+            now = time.time()
+            with self._lock:
+                row = self._db.execute(
+                    """SELECT key, user_id, session_id, checkpoint, summary, attempts
+                       FROM jobs WHERE next_attempt_at <= ? ORDER BY queued_at LIMIT 1""",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    next_due = self._db.execute("SELECT MIN(next_attempt_at) FROM jobs").fetchone()[0]
+                    if next_due is None:
+                        return self.idle_interval
+                    return min(max(next_due - now, 0.01), self.idle_interval)
+            self._process(*row)
+
+    def _process(self, key, user_id, session_id, checkpoint, summary, attempts):
+        try:
+            self.write(SummaryJob(user_id, session_id, json.loads(checkpoint), summary))
+        except Exception as e:
+            self._retry_later(key, attempts + 1, e)
+            return
+
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM jobs WHERE key = ?", (key,))
+            self._db.execute("INSERT OR REPLACE INTO completed (key, completed_at) VALUES (?, ?)", (key, time.time()))
+            self._db.execute(
+                """DELETE FROM completed WHERE key NOT IN (
+                       SELECT key FROM completed ORDER BY completed_at DESC LIMIT ?)""",
+                (self.max_completed,)
+            )
+            self._db.execute("COMMIT")
+        self._stats["written"] += 1
+
+    def _retry_later(self, key, attempts, error):
+        if attempts >= self.max_attempts:
+            print(f"Dropping session summary {key} after {attempts} attempts: {error}")
+            with self._lock:
+                self._db.execute("DELETE FROM jobs WHERE key = ?", (key,))
+            self._stats["dropped"] += 1
+            return
+
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET attempts = ?, next_attempt_at = ? WHERE key = ?",
+                (attempts, time.time() + self.base_backoff * (2 ** (attempts - 1)), key)
+            )
+        self._stats["retried"] += 1
@@ -0,0 +1,12 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPANION_DIR = os.path.join(ROOT, "agents", "bible-companion")
+
+# Shared modules come from the repo root (ahead of any copies made by `make shared`),
+# companion-only modules (verse_search, verse_vectors) from the agent directory
+for path in (COMPANION_DIR, ROOT):
+    if path in sys.path:
+        sys.path.remove(path)
+    sys.path.insert(0, path)
@@ -0,0 +1,22 @@
+from context_packer import ContextPacker, packed_record_keys, record_items, record_key
+
+RECORDS = [
+    {"content": {"text": "Prays every morning for their family"}, "memoryRecordId": "r1"},
+    {"content": {"text": "Worried about losing their job " * 20}, "memoryRecordId": "r2"},
+    {"summary": "Asked about hope in hard times"},
+]
+
+
+def test_packed_record_keys_names_the_included_records():
+    packed = ContextPacker(budget=40).pack(record_items(RECORDS), query="pray for my family")
+    keys = packed_record_keys(packed, RECORDS)
+    assert "r1" in keys
+    assert keys <= {record_key(record) for record in RECORDS}
+    assert record_key(RECORDS[2]) == "Asked about hope in hard times"
+
+
+def test_a_second_pack_only_gets_the_remaining_budget():
+    packer = ContextPacker(budget=60)
+    first = packer.pack(record_items(RECORDS[1:2]), query="job")
+    second = packer.pack(record_items(RECORDS), query="job", budget=packer.budget - first.used_tokens)
+    assert first.used_tokens + second.used_tokens <= packer.budget
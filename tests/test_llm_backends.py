@@ -0,0 +1,35 @@
+import llm_backends
+from llm_backends import BedrockConverseBackend
+from prompt_segments import build_segments, render, stable_prefix
+
+PREFERENCES = {"firstName": "Ruth", "bibleVersion": "KJV", "avatarName": "Grace"}
+
+
+def converse_backend(instructions: str) -> BedrockConverseBackend:
+    # request() only needs the model settings, not a boto3 client
+    backend = BedrockConverseBackend.__new__(BedrockConverseBackend)
+    backend.model_id = "model"
+    backend.max_tokens = 256
+    backend.instructions = instructions
+    return backend
+
+
+def test_request_places_cache_points_after_shared_part_and_profile(monkeypatch):
+    monkeypatch.setattr(llm_backends, "PROMPT_CACHE_MIN_TOKENS", 10)
+    segments = build_segments(PREFERENCES, "USER MESSAGE: I feel anxious")
+    request = converse_backend("Be kind. " * 20).request(render(segments), stable_prefix(segments))
+
+    system = request["system"]
+    cache_points = [i for i, block in enumerate(system) if "cachePoint" in block]
+    assert len(cache_points) == 2
+    assert system[cache_points[0] - 1]["text"] == segments.persona
+    assert system[cache_points[1] - 1]["text"] == segments.profile
+    assert system[-1] == {"cachePoint": {"type": "default"}}
+    assert request["messages"][0]["content"][0]["text"] == segments.turn
+
+
+def test_request_skips_cache_points_below_the_minimum(monkeypatch):
+    monkeypatch.setattr(llm_backends, "PROMPT_CACHE_MIN_TOKENS", 100000)
+    segments = build_segments(PREFERENCES, "USER MESSAGE: hello")
+    request = converse_backend("Be kind.").request(render(segments), stable_prefix(segments))
+    assert not any("cachePoint" in block for block in request["system"])
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+from context_packer import context_packer, record_items, turn_items
+from response_cache import ResponseCache
+
+PREFERENCES = {"bibleVersion": "KJV", "denomination": "Baptist", "avatarName": "Grace"}
+
+
+def packed_context(input_text: str, events: list = (), records: list = ()) -> dict:
+    """The context build_contextual_prompt leaves behind, for the parts the cache reads."""
+    packed = context_packer.pack(turn_items(list(events)) + record_items(list(records)), query=input_text)
+    return {"personal_items": len(packed.relevant("recent_turn", "long_term"))}
+
+
+def event(user_text: str, companion_text: str) -> dict:
+    return {
+        "eventTimestamp": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "payload": [
+            {"conversational": {"content": {"text": user_text}, "role": "USER"}},
+            {"conversational": {"content": {"text": companion_text}, "role": "ASSISTANT"}},
+        ],
+    }
+
+
+def test_greeting_is_rendered_for_the_new_user_and_references_are_untouched():
+    cache = ResponseCache()
+    john = dict(PREFERENCES, firstName="John")
+    cache.store("what does John 3:16 mean", john, "John, John 3:16 tells us how God loved the world.",
+                context={"personal_items": 0})
+    maria = dict(PREFERENCES, firstName="Maria")
+    assert cache.lookup("what does John 3:16 mean", maria) == "Maria, John 3:16 tells us how God loved the world."
+
+
+def test_name_that_is_also_a_word_is_not_stored():
+    cache = ResponseCache()
+    grace = dict(PREFERENCES, firstName="Grace")
+    cache.store("a blessing for today", grace, "Grace be to you and peace from God our Father.",
+                context={"personal_items": 0})
+    assert cache.lookup("a blessing for today", dict(PREFERENCES, firstName="Tom")) is None
+    assert cache.stats()["personal"] == 1
+
+
+def test_name_inside_quoted_scripture_is_kept():
+    cache = ResponseCache()
+    grace = dict(PREFERENCES, firstName="Grace")
+    cache.store("a blessing for today", grace, 'Hi Grace! "Grace be to you and peace" (Romans 1:7).',
+                context={"personal_items": 0})
+    tom = dict(PREFERENCES, firstName="Tom")
+    assert cache.lookup("a blessing for today", tom) == 'Hi Tom! "Grace be to you and peace" (Romans 1:7).'
+
+
+def test_returning_user_with_unrelated_history_shares_and_gets_hits():
+    cache = ResponseCache()
+    question = "give me a verse for anxiety"
+    history = [event("I lost my job last week", "I'm sorry to hear about your job.")]
+    records = [{"content": {"text": "User enjoys the Psalms and prays for family"}}]
+
+    first = dict(PREFERENCES, firstName="Ana", birthday="1990-05-01")
+    cache.store(question, first, "Ana, read Philippians 4:6-7 and be anxious for nothing.",
+                context=packed_context(question, history, records))
+
+    second = dict(PREFERENCES, firstName="Luis", birthday="1985-02-11")
+    second_context = packed_context(question, [event("Thanks for the prayer", "Amen, Luis.")])
+    assert second_context["personal_items"] == 0
+    assert cache.lookup(question, second) == "Luis, read Philippians 4:6-7 and be anxious for nothing."
+
+
+def test_history_relevant_to_the_question_is_not_shared():
+    cache = ResponseCache()
+    question = "give me a verse for my anxiety about work"
+    history = [event("My anxiety about work keeps me awake", "Let's pray about your work together.")]
+    cache.store(question, dict(PREFERENCES, firstName="Ana"), "Ana, read Matthew 6:34.",
+                context=packed_context(question, history))
+    assert cache.lookup(question, dict(PREFERENCES, firstName="Luis")) is None
+
+
+def test_birthday_answers_and_unknown_context_are_not_stored():
+    cache = ResponseCache()
+    ana = dict(PREFERENCES, firstName="Ana", birthday="1990-05-01")
+    cache.store("a verse for today", ana, "Happy birthday, Ana! Read Psalm 118:24.", context={"personal_items": 0})
+    cache.store("a verse for peace", ana, "Read John 14:27.")
+    assert cache.lookup("a verse for today", ana) is None
+    assert cache.lookup("a verse for peace", ana) is None
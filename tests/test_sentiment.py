@@ -0,0 +1,28 @@
+import pytest
+
+from sentiment import sentiment_scorer
+
+
+@pytest.mark.parametrize("text", ["I can't stop worrying", "I can't help feeling sad", "I never felt so alone"])
+def test_negated_phrases_that_still_mean_struggle(text):
+    assert sentiment_scorer.label(text) == "struggling"
+
+
+@pytest.mark.parametrize("text", ["I am not sad", "I'm not worried anymore", "I never worry"])
+def test_a_negated_negative_is_not_positive(text):
+    assert sentiment_scorer.label(text) != "positive"
+
+
+@pytest.mark.parametrize("text", ["I could not be happier", "I couldn't be better", "I have never been more grateful"])
+def test_emphatic_negations_are_positive(text):
+    assert sentiment_scorer.label(text) == "positive"
+
+
+def test_a_negated_positive_is_still_negative():
+    assert sentiment_scorer.label("I am not happy") == "struggling"
+    assert sentiment_scorer.label("I don't feel better") == "struggling"
+
+
+def test_batch_scores_match_single_scores():
+    texts = ["I can't stop worrying", "I am not sad", "I could not be happier"]
+    assert sentiment_scorer.score_batch(texts) == [sentiment_scorer.score(text) for text in texts]
@@ -0,0 +1,77 @@
+import threading
+
+from session_summary import SessionSummaries
+from summary_worker import SummaryWorker
+
+METADATA = {"spiritual_themes": ["anxiety"], "verses_shared": ["Philippians 4:6"]}
+
+
+def recording_worker(tmp_path, fail_times: int = 0):
+    written = []
+    failures = [fail_times]
+    lock = threading.Lock()
+
+    def write(job):
+        with lock:
+            if failures[0]:
+                failures[0] -= 1
+                raise RuntimeError("memory unavailable")
+            written.append(job)
+
+    worker = SummaryWorker(write, spool_path=str(tmp_path / "spool.db"), base_backoff=0.01, idle_interval=0.05)
+    return worker, written
+
+
+def test_a_checkpoint_is_written_once(tmp_path):
+    worker, written = recording_worker(tmp_path)
+    assert worker.enqueue("u1", "s1", 10, "Themes: anxiety")
+    assert worker.flush()
+    assert not worker.enqueue("u1", "s1", 10, "Themes: anxiety")
+    assert worker.flush()
+    assert [(job.session_id, job.checkpoint) for job in written] == [("s1", 10)]
+    assert worker.stats()["duplicates"] == 1
+
+
+def test_each_turn_count_is_its_own_checkpoint(tmp_path):
+    worker, written = recording_worker(tmp_path)
+    summaries = SessionSummaries()
+    for _ in range(3):
+        summaries.observe("s1", "I keep worrying about my job", METADATA)
+    assert worker.enqueue("u1", "s1", summaries.get("s1").count, summaries.get("s1").summary())
+    summaries.observe("s1", "Thank you, that helps", METADATA)
+    assert worker.enqueue("u1", "s1", summaries.get("s1").count, summaries.get("s1").summary())
+    assert worker.flush()
+    assert [job.checkpoint for job in written] == [3, 4]
+
+
+def test_failed_writes_are_retried_not_duplicated(tmp_path):
+    worker, written = recording_worker(tmp_path, fail_times=1)
+    assert worker.enqueue("u1", "s1", 10, "Themes: anxiety")
+    assert worker.flush()
+    assert len(written) == 1
+    assert worker.stats()["retried"] == 1
+
+
+def test_completed_checkpoints_survive_a_restart(tmp_path):
+    worker, written = recording_worker(tmp_path)
+    worker.enqueue("u1", "s1", 10, "Themes: anxiety")
+    assert worker.flush()
+    restarted, rewritten = recording_worker(tmp_path)
+    assert not restarted.enqueue("u1", "s1", 10, "Themes: anxiety")
+    assert restarted.flush()
+    assert rewritten == []
+
+
+def test_seed_rebuilds_a_session_once(tmp_path):
+    summaries = SessionSummaries()
+    calls = []
+
+    def stored():
+        calls.append(1)
+        return [{"user_input": "How do I stop worrying?", "metadata": METADATA}] * 2
+
+    assert summaries.seed("s1", stored).count == 2
+    summaries.observe("s1", "Thank you", METADATA, seed=stored)
+    assert summaries.get("s1").count == 3
+    assert len(calls) == 1
+    assert summaries.seed("s2", lambda: 1 / 0) is None
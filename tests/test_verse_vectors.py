@@ -0,0 +1,56 @@
+import importlib.util
+import os
+
+import pytest
+
+from verse_store import VerseStore, write_store
+from verse_vectors import VerseVectorIndex, build_index
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUILD_SCRIPT = os.path.join(ROOT, "agents", "verse-of-the-day", "build_verse_store.py")
+CORPUS = os.path.join(ROOT, "agents", "verse-of-the-day", "corpus", "KJV.tsv.gz")
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    spec = importlib.util.spec_from_file_location("build_verse_store", BUILD_SCRIPT)
+    build_verse_store = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(build_verse_store)
+
+    directory = tmp_path_factory.mktemp("verses")
+    store_path = str(directory / "KJV.bvs")
+    write_store(store_path, "KJV", build_verse_store.load_tsv(CORPUS))
+    store = VerseStore(store_path)
+    build_index(store, str(directory / "KJV.bvx"))
+    yield VerseVectorIndex(str(directory / "KJV.bvx"), store)
+    store.close()
+
+
+def references(index, query: str, limit: int = 10) -> list:
+    return [verse["reference"] for verse in index.search_verses(query, limit)]
+
+
+@pytest.mark.parametrize("query", ["I feel anxiety and worry", "I am so anxious about tomorrow"])
+def test_anxiety_finds_the_do_not_worry_verses(index, query):
+    top = references(index, query)
+    assert top[0] == "1 Peter 5:7"
+    assert "Matthew 6:34" in top
+
+
+def test_topical_queries_find_their_verses(index):
+    assert {"Colossians 1:14", "Ephesians 1:7"} <= set(references(index, "I need forgiveness for my sins"))
+    assert "1 Thessalonians 5:18" in references(index, "I am so grateful today")
+    assert "Proverbs 3:5" in references(index, "I struggle to trust God")
+
+
+def test_unrelated_topics_do_not_share_results(index):
+    anxiety = set(references(index, "I feel anxiety and worry"))
+    forgiveness = set(references(index, "I need forgiveness for my sins"))
+    assert not anxiety & forgiveness
+
+
+def test_scores_are_ranked_cosines(index):
+    scores = [verse["score"] for verse in index.search_verses("how do I pray", 5)]
+    assert scores == sorted(scores, reverse=True)
+    assert 0 < scores[-1] <= scores[0] <= 1.0
+    assert index.search_verses("qwertyuiop", 5) == []
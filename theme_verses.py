@@ -0,0 +1,68 @@
+"""
+Theme -> suggested verses.
+
+theme_verses.json is built offline by agents/bible-companion/build_theme_verses.py
+from curated lists and the verse corpus, and ranks the verses for each theme
+in themes.DEFAULT_LEXICON:
+
+    {"themes": {"anxiety": ["Philippians 4:6-7", "1 Peter 5:7", ...], ...}}
+
+It is loaded once into a dict of tuples, so suggestions for a detected
+theme are a single dict lookup and a slice.
+
+    theme_verse_index.suggest(["anxiety", "work"], per_theme=2)
+    -> [("anxiety", ("Philippians 4:6-7", "1 Peter 5:7")), ("work", ("Colossians 3:23", ...))]
+"""
+import json
+import os
+
+THEME_VERSES_PATH = os.environ.get(
+    'THEME_VERSES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'theme_verses.json'))
+DEFAULT_PER_THEME = 2
+
+
+class ThemeVerseIndex:
+    def __init__(self, path: str = THEME_VERSES_PATH):
+        self.path = path
+        self._verses = {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                themes = json.load(f).get('themes', {})
+            self._verses = {theme.lower(): tuple(references) for theme, references in themes.items()}
+        except FileNotFoundError:
+            print(f"Theme verse index {path} not found; no verse suggestions")
+        except Exception as e:
+            print(f"Error loading theme verse index {path}: {e}")
+
+    def verses_for(self, theme: str, limit: int = DEFAULT_PER_THEME) -> tuple:
+        """Top verses for one theme, best first; empty for unknown themes."""
+        return self._verses.get(theme, ())[:limit]
+
+    def suggest(self, themes, per_theme: int = DEFAULT_PER_THEME, limit: int = 6) -> list:
+        """
+        (theme, references) for each theme in order, without repeating a
+        verse already suggested for an earlier theme. At most limit verses.
+        """
+        suggestions = []
+        seen = set()
+        for theme in themes:
+            if limit <= 0:
+                break
+            references = tuple(reference for reference in self._verses.get(theme, ())
+                               if reference not in seen)[:min(per_theme, limit)]
+            if references:
+                seen.update(references)
+                suggestions.append((theme, references))
+                limit -= len(references)
+        return suggestions
+
+    def __contains__(self, theme: str) -> bool:
+        return theme in self._verses
+
+
+def format_suggestions(suggestions: list, indent: str = "") -> str:
+    """One prompt line per theme: "- anxiety: Philippians 4:6-7, 1 Peter 5:7"."""
+    return ("\n" + indent).join(f"- {theme}: {', '.join(references)}" for theme, references in suggestions)
+
+
+theme_verse_index = ThemeVerseIndex()
@@ -0,0 +1,227 @@
+"""
+Spiritual theme extraction.
+
+The theme lexicon maps canonical themes to weighted terms. A term ending in
+"*" is a stem ("forgiv*" matches forgive, forgiveness, forgiving). All terms
+are compiled into a single prefix-trie regex with word boundaries, so the
+text is scanned once regardless of lexicon size and "love" no longer
+matches "glove". Themes are ranked by weighted frequency.
+
+Extra terms can be merged from a JSON file via THEME_LEXICON_PATH:
+
+    {"anxiety": {"dread": 1.0, "restless*": 0.5}, "grief": ["grie*", "loss"]}
+"""
+import bisect
+import json
+import os
+import re
+from collections import Counter
+
+# theme -> {term: weight}; themes keep this order when scores tie
+DEFAULT_LEXICON = {
+    "prayer": {"pray*": 1.0, "intercede": 1.0, "intercession": 1.0, "supplication": 1.0, "amen": 0.5},
+    "faith": {"faith": 1.0, "faithful*": 1.0, "believe": 1.0, "believing": 1.0, "belief": 1.0, "doubt*": 1.0},
+    "forgiveness": {"forgiv*": 1.0, "forgave": 1.0, "pardon*": 1.0, "mercy": 0.7, "merciful": 0.7,
+                    "grudge*": 1.0, "resent*": 1.0, "bitterness": 0.7},
+    "love": {"love": 1.0, "loved": 1.0, "loves": 1.0, "loving": 1.0, "beloved": 0.7, "charity": 0.7},
+    "hope": {"hope": 1.0, "hopes": 1.0, "hoped": 1.0, "hoping": 1.0, "hopeful*": 1.0, "promise*": 0.5},
+    "trust": {"trust*": 1.0, "rely": 0.7, "relying": 0.7, "surrender*": 0.7},
+    "family": {"family": 1.0, "families": 1.0, "parent*": 1.0, "mother": 1.0, "father": 0.7, "mom": 1.0,
+               "dad": 1.0, "child": 1.0, "children": 1.0, "kids": 1.0, "son": 0.7, "daughter": 1.0,
+               "wife": 1.0, "husband": 1.0, "marriage": 1.0, "married": 1.0, "sibling*": 1.0},
+    "relationships": {"relationship*": 1.0, "friend*": 1.0, "dating": 1.0, "boyfriend": 1.0,
+                      "girlfriend": 1.0, "breakup": 1.0, "divorc*": 1.0, "lonely": 0.7, "loneliness": 0.7},
+    "work": {"work": 1.0, "working": 1.0, "job*": 1.0, "career*": 1.0, "boss": 1.0, "coworker*": 1.0,
+             "colleague*": 1.0, "workplace": 1.0, "unemploy*": 1.0, "office": 0.5},
+    "anxiety": {"anxi*": 1.0, "worr*": 1.0, "fear*": 1.0, "afraid": 1.0, "stress*": 1.0, "panic*": 1.0,
+                "nervous*": 1.0, "overwhelm*": 1.0},
+    "depression": {"depress*": 1.0, "sad": 1.0, "sadness": 1.0, "hopeless*": 1.0, "despair*": 1.0,
+                   "grief": 1.0, "griev*": 1.0, "mourn*": 1.0, "empty": 0.5},
+    "gratitude": {"grateful": 1.0, "gratitude": 1.0, "thank*": 1.0, "bless*": 0.7},
+    "worship": {"worship*": 1.0, "prais*": 1.0, "hymn*": 1.0, "adoration": 1.0, "glorif*": 1.0},
+    "service": {"serve": 1.0, "serves": 1.0, "served": 1.0, "serving": 1.0, "service": 1.0,
+                "servant*": 1.0, "volunteer*": 1.0, "ministry": 1.0, "mission*": 0.7},
+    "community": {"community": 1.0, "communities": 1.0, "church": 1.0, "congregation*": 1.0,
+                  "fellowship": 1.0, "small group": 1.0, "neighbor*": 1.0, "neighbour*": 1.0},
+}
+
+# The user's own words count more than the companion's reply
+INPUT_WEIGHT = 2.0
+
+_SEPARATOR = "\x00"
+
+
+def _normalize_lexicon(lexicon: dict) -> dict:
+    normalized = {}
+    for theme, terms in lexicon.items():
+        if not isinstance(terms, dict):
+            terms = {term: 1.0 for term in terms}
+        normalized[theme] = {term.lower().strip(): float(weight) for term, weight in terms.items()}
+    return normalized
+
+
+def _trie_regex(terms) -> str:
+    """Build a regex from a prefix trie of terms so shared prefixes are matched once."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node) -> str:
+        if "*" in node:
+            # Stem: any word continuation is accepted, so children are redundant
+            return r"\w*"
+        terminal = "" in node
+        branches = []
+        for char in sorted(k for k in node if k):
+            piece = r"\s+" if char == " " else re.escape(char)
+            branches.append(piece + build(node[char]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            body = "(?:" + body + ")?"
+        return body
+
+    return r"\b" + build(trie) + r"\b"
+
+
+class ThemeExtractor:
+    def __init__(self, lexicon: dict = None):
+        self.lexicon = _normalize_lexicon(lexicon or DEFAULT_LEXICON)
+        self._compile()
+
+    def add_terms(self, theme: str, terms):
+        """Extend the lexicon (new or existing theme) and recompile."""
+        self.lexicon.setdefault(theme, {}).update(_normalize_lexicon({theme: terms})[theme])
+        self._compile()
+
+    def _compile(self):
+        self._exact = {}
+        self._stems = {}
+        self._theme_order = {theme: i for i, theme in enumerate(self.lexicon)}
+        patterns = []
+        for theme, terms in self.lexicon.items():
+            for term, weight in terms.items():
+                if term.endswith("*"):
+                    self._stems[term[:-1]] = (theme, weight)
+                    patterns.append(term)
+                else:
+                    self._exact[term] = (theme, weight)
+                    patterns.append(term)
+        self._stem_lengths = sorted({len(stem) for stem in self._stems}, reverse=True)
+        self._phrase_heads = {term.split()[0] for term in self._exact if " " in term}
+        self._lookup_cache = {}
+        self._pattern = re.compile(_trie_regex(patterns))
+
+    @property
+    def pattern(self):
+        """Compiled regex matching every lexicon term (lowercase text expected)."""
+        return self._pattern
+
+    def lookup(self, token: str):
+        """(theme, weight) for one lowercase term (exact match first, then longest stem), or None."""
+        try:
+            return self._lookup_cache[token]
+        except KeyError:
+            pass
+        hit = self._find(token)
+        if len(self._lookup_cache) < 50000:
+            self._lookup_cache[token] = hit
+        return hit
+
+    def _find(self, token: str):
+        if " " in token or "\t" in token or "\n" in token:
+            token = " ".join(token.split())
+        hit = self._exact.get(token)
+        if hit is not None:
+            return hit
+        for length in self._stem_lengths:
+            if length <= len(token):
+                hit = self._stems.get(token[:length])
+                if hit is not None:
+                    return hit
+        return None
+
+    def score(self, text: str) -> Counter:
+        """Weighted term frequency per theme."""
+        scores = Counter()
+        for match in self._pattern.finditer(text.lower()):
+            hit = self.lookup(match.group())
+            if hit is not None:
+                scores[hit[0]] += hit[1]
+        return scores
+
+    def score_tokens(self, tokens, scores: Counter = None, weight: float = 1.0) -> Counter:
+        """
+        Weighted theme frequency for already-lowercased word tokens, for callers
+        that tokenize once and share the tokens. Two-word terms ("small group")
+        replace the single-word hit on their first word, as the regex would.
+        """
+        scores = Counter() if scores is None else scores
+        previous = None
+        previous_hit = None
+        for token in tokens:
+            hit = None
+            if previous in self._phrase_heads:
+                hit = self._exact.get(previous + " " + token)
+                if hit is not None and previous_hit is not None:
+                    scores[previous_hit[0]] -= previous_hit[1] * weight
+                    if scores[previous_hit[0]] <= 0:
+                        del scores[previous_hit[0]]
+            if hit is None:
+                hit = self.lookup(token)
+            if hit is not None:
+                scores[hit[0]] += hit[1] * weight
+            previous, previous_hit = token, hit
+        return scores
+
+    def rank(self, scores: Counter, top_n: int = 3) -> list:
+        """Themes by descending score, ties broken by lexicon order."""
+        ranked = sorted(scores, key=lambda theme: (-scores[theme], self._theme_order[theme]))
+        return ranked[:top_n]
+
+    def extract(self, text: str, top_n: int = 3) -> list:
+        return self.rank(self.score(text), top_n)
+
+    def extract_conversation(self, input_text: str, response: str, top_n: int = 3) -> list:
+        """Themes for one exchange, weighting the user's message by INPUT_WEIGHT."""
+        scores = self.score(response)
+        for theme, value in self.score(input_text).items():
+            scores[theme] += value * INPUT_WEIGHT
+        return self.rank(scores, top_n)
+
+    def score_batch(self, texts: list) -> list:
+        """Score many messages with a single regex pass over their concatenation."""
+        lowered = [text.lower() for text in texts]
+        starts = []
+        offset = 0
+        for text in lowered:
+            starts.append(offset)
+            offset += len(text) + len(_SEPARATOR)
+
+        results = [Counter() for _ in texts]
+        for match in self._pattern.finditer(_SEPARATOR.join(lowered)):
+            hit = self.lookup(match.group())
+            if hit is not None:
+                results[bisect.bisect_right(starts, match.start()) - 1][hit[0]] += hit[1]
+        return results
+
+    def extract_batch(self, texts: list, top_n: int = 3) -> list:
+        return [self.rank(scores, top_n) for scores in self.score_batch(texts)]
+
+
+def load_lexicon(path: str = None) -> dict:
+    """Default lexicon merged with the optional JSON file at THEME_LEXICON_PATH."""
+    lexicon = _normalize_lexicon(DEFAULT_LEXICON)
+    path = path or os.environ.get('THEME_LEXICON_PATH')
+    if path:
+        with open(path) as f:
+            for theme, terms in _normalize_lexicon(json.load(f)).items():
+                lexicon.setdefault(theme, {}).update(terms)
+    return lexicon
+
+
+theme_extractor = ThemeExtractor(load_lexicon())
@@ -0,0 +1,170 @@
+"""
+Memory-mapped Bible verse corpus, one file per translation.
+
+File layout (little-endian), e.g. verses/KJV.bvs:
+
+    magic    4 bytes   b"BVS1"
+    count    uint32    verse slots, = bible_references.TOTAL_VERSES
+    version  16 bytes  translation code, NUL padded
+    offsets  (count + 1) x uint32, byte offsets into the blob
+    blob     UTF-8 text; every present verse is followed by "\\n"
+
+Slots are indexed by the canon ordinal of (book, chapter, verse), so a
+lookup is two integer reads and one slice of the mapped file; nothing is
+loaded into memory up front and the OS page cache is shared across warm
+invocations. A verse missing from the corpus has an empty slot.
+
+Verses are stored in canon order, so any passage (a range, a cross-chapter
+range, whole chapters) is one contiguous byte range: resolve() returns it
+as a memoryview over the map, with no per-verse copying or joining.
+"""
+import mmap
+import operator
+import os
+import struct
+import sys
+from collections import namedtuple
+from bible_references import TOTAL_VERSES, format_reference, ordinal_range, verse_ordinal
+
+MAGIC = b"BVS1"
+_HEADER = struct.Struct("<4sI16s")
+_OFFSET = struct.Struct("<I")
+_OFFSET_PAIR = struct.Struct("<II")
+
+VERSE_STORE_DIR = os.environ.get(
+    'VERSE_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'verses'))
+DEFAULT_VERSION = os.environ.get('DEFAULT_BIBLE_VERSION', 'KJV')
+
+# view is a memoryview of "\n"-terminated verses; missing counts verses absent from the corpus
+Passage = namedtuple("Passage", "reference version view verses missing")
+
+
+class VerseStore:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, version = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or count != TOTAL_VERSES:
+            self._map.close()
+            raise ValueError(f"{path} is not a verse store for this canon")
+        self.version = version.rstrip(b"\0").decode('ascii')
+        self._offsets_at = _HEADER.size
+        self._blob_at = _HEADER.size + (count + 1) * _OFFSET.size
+        self._view = memoryview(self._map)
+        self._blob = self._view[self._blob_at:]
+        # Zero-copy uint32 view of the offsets; the file is little-endian
+        self._offsets = self._view[self._offsets_at:self._blob_at].cast('I') if sys.byteorder == 'little' else None
+
+    def _span(self, ordinal: int) -> tuple:
+        """(start, stop) of a verse in the file, stop excluding the trailing newline."""
+        start, stop = _OFFSET_PAIR.unpack_from(self._map, self._offsets_at + ordinal * _OFFSET.size)
+        if stop == start:
+            return None
+        return self._blob_at + start, self._blob_at + stop - 1
+
+    def get_ordinal(self, ordinal: int):
+        if not 0 <= ordinal < TOTAL_VERSES:
+            return None
+        span = self._span(ordinal)
+        return self._map[span[0]:span[1]].decode('utf-8') if span else None
+
+    def get(self, book: int, chapter: int, verse: int):
+        """Verse text, or None if this translation's corpus does not include it."""
+        return self.get_ordinal(verse_ordinal(book, chapter, verse))
+
+    def __contains__(self, ordinal: int) -> bool:
+        return 0 <= ordinal < TOTAL_VERSES and self._span(ordinal) is not None
+
+    def _offset_range(self, start: int, stop: int):
+        """Offsets start..stop inclusive (stop + 1 values)."""
+        if self._offsets is not None:
+            return self._offsets[start:stop + 1]
+        return struct.unpack_from(f"<{stop - start + 1}I", self._map, self._offsets_at + start * _OFFSET.size)
+
+    def slice(self, start: int, stop: int) -> memoryview:
+        """Zero-copy view of the verses with ordinals in [start, stop)."""
+        offsets = self._offset_range(start, stop)
+        return self._blob[offsets[0]:offsets[-1]]
+
+    def resolve(self, reference) -> Passage:
+        """Passage for a BibleReference: one contiguous slice of the corpus."""
+        start, stop = ordinal_range(reference)
+        offsets = self._offset_range(start, stop)
+        # An empty slot has equal neighbouring offsets
+        missing = sum(map(operator.eq, offsets[:-1], offsets[1:]))
+        return Passage(format_reference(reference), self.version,
+                       self._blob[offsets[0]:offsets[-1]], stop - start, missing)
+
+    def resolve_many(self, references) -> list:
+        """Resolve several references (e.g. a devotional's citations) in one call, in order."""
+        return [self.resolve(reference) for reference in references]
+
+    def close(self):
+        if self._offsets is not None:
+            self._offsets.release()
+        self._blob.release()
+        self._view.release()
+        self._map.close()
+
+
+def passage_text(passage: Passage, separator: str = " ") -> str:
+    """Decode a passage once; verses are joined by separator."""
+    text = str(passage.view, 'utf-8').rstrip("\n")
+    return text if separator == "\n" else text.replace("\n", separator)
+
+
+def write_store(path: str, version: str, verses: dict):
+    """Write a store file from {ordinal: text}; verses not in the dict stay empty."""
+    blob = bytearray()
+    offsets = []
+    for ordinal in range(TOTAL_VERSES):
+        offsets.append(len(blob))
+        text = verses.get(ordinal)
+        if text:
+            blob += " ".join(text.split()).encode('utf-8') + b"\n"
+    offsets.append(len(blob))
+
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, TOTAL_VERSES, version.encode('ascii')))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(blob)
+    os.replace(temp_path, path)
+
+
+_stores = {}
+_unpackaged = set()
+
+
+def get_store(version: str = None):
+    """
+    Open store for a translation (cached per container), falling back to
+    DEFAULT_VERSION when that translation is not packaged. None if neither is.
+    """
+    for candidate in (version, DEFAULT_VERSION):
+        if not candidate:
+            continue
+        candidate = candidate.upper()
+        store = _stores.get(candidate)
+        if store is not None:
+            return store
+        if candidate in _unpackaged:
+            continue
+        path = os.path.join(VERSE_STORE_DIR, f"{candidate}.bvs")
+        try:
+            store = _stores[candidate] = VerseStore(path)
+            return store
+        except FileNotFoundError:
+            _unpackaged.add(candidate)
+        except Exception as e:
+            print(f"Error opening verse store {path}: {e}")
+            _unpackaged.add(candidate)
+    return None
+
+
+def available_versions() -> list:
+    try:
+        return sorted(name[:-4] for name in os.listdir(VERSE_STORE_DIR) if name.endswith(".bvs"))
+    except FileNotFoundError:
+        return []